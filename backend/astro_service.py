@@ -1,172 +1,385 @@
-from skyfield.api import load, wgs84
-from skyfield import almanac
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import json
+import logging
+import os
+import re
 from datetime import datetime, timedelta
 import pytz
 from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
-from skyfield.api import Angle
+from backend.geocode_cache import GeocodeCache, make_key
+from backend.geocoder import AsyncNominatim, nominatim_limiter
+from backend.chart_cache import ChartCache, Quantum, EXACT, parse_quantum
+from backend import metrics
+from backend.metrics import span, timed
+from backend.world_cities import load_gazetteer, LocationNotFoundError, GeocoderUnavailableError
+from backend.reverse_geocoder import load_reverse_geocoder
+from backend.ephemeris import get_context, BODY_NAMES, PLANET_NAMES
+from backend.positions import ZODIAC_SIGNS, zodiac_sign as zodiac_sign_of
+from backend.fast_ephemeris import load_fast_ephemeris
+from backend.ingresses import load_ingress_index
+from backend.lunations import load_lunation_table
+from backend.solar_table import load_solar_table, julian_date, iso_utc
+from backend.houses import chart_houses, check_house_system
+from backend.timezones import load_timezone_index, epoch_seconds, format_offset
+from skyfield.framelib import ecliptic_frame
+from skyfield.nutationlib import iau2000b_radians
+from skyfield.api import Angle, wgs84
 import math
+import numpy as np
 
-import os
+logger = logging.getLogger(__name__)
 
-# Robust path handling for Cloud Run
-base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-eph_path = os.path.join(base_dir, 'de421.bsp')
+# One client per process; the per-request cost is the network call, not the object.
+geolocator = Nominatim(user_agent="geoastro_compute_backend_v2")
+geocode_cache = GeocodeCache()
+nominatim = AsyncNominatim()
 
-if not os.path.exists(eph_path):
-    # Fallback to backend directory if not in root
-    eph_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'de421.bsp')
+def _geocode_steps(city, country, state=None):
+    # The lookup order shared by get_lat_lon and get_lat_lon_async: offline
+    # gazetteer, then the shared cache, then Nominatim for "city, state, country"
+    # and, if that finds nothing, the state (gazetteer first, then Nominatim). A
+    # generator: it yields each Nominatim query and is sent back (coords or None,
+    # exception or None) by the wrapper doing the I/O; it returns the coordinates
+    # or raises a GeocodingError.
+    gazetteer = load_gazetteer()
+    place = gazetteer.lookup(city, country, state)
+    if place:
+        metrics.geocode_lookups.inc(source="gazetteer")
+        return place.latitude, place.longitude
 
-print(f"Loading ephemeris from: {eph_path}")
-if not os.path.exists(eph_path):
-    print(f"WARNING: Ephemeris file not found at {eph_path}. Skyfield will attempt to download to /tmp or CWD.")
+    cache_key = make_key(city, state, country)
+    found, coords = geocode_cache.get(cache_key)
+    if found:
+        metrics.geocode_lookups.inc(source="cache")
+        if coords:
+            return coords
+        metrics.geocode_unresolved.inc(reason="not_found")
+        raise LocationNotFoundError(f"Could not resolve location: {city}, {country}")
 
-# Load Ephemeris
-# Load Ephemeris
-try:
-    if os.path.exists(eph_path):
-        eph = load(eph_path)
-    else:
-        # Try default download logic (might work if /tmp is used by Skyfield by default? No)
-        print("Ephemeris path not found, trying default load...")
-        eph = load('de421.bsp')
-except Exception as e:
-    print(f"Error loading ephemeris: {e}")
-    try:
-        # Last ditch effort: simple load which might trigger download
-        eph = load('de421.bsp')
-    except Exception as e2:
-         print(f"CRITICAL: Could not load ephemeris: {e2}")
-         raise RuntimeError(f"Ephemeris load failed: {e} -> {e2}")
+    # Only cache a negative result when Nominatim answered "no match" every time,
+    # never when we gave up because of timeouts or network errors.
+    had_errors = False
+
+    city_query = f"{city}, {state}, {country}" if state else f"{city}, {country}"
+    for kind, query in (("city", city_query), ("state", f"{state}, {country}")):
+        if kind == "state":
+            if not state:
+                break
+            logger.info("Falling back to state: %s, %s", state, country)
+            metrics.geocode_fallbacks.inc()
+            place = gazetteer.lookup_admin1(state, country)
+            if place:
+                metrics.geocode_lookups.inc(source="admin1")
+                coords = (place.latitude, place.longitude)
+                if not had_errors:
+                    geocode_cache.put(cache_key, coords)
+                return coords
+        for attempt in range(2):
+            coords, error = yield query
+            if error is None:
+                if coords:
+                    # A state stand-in is only remembered if nothing failed on the way.
+                    if kind == "city" or not had_errors:
+                        geocode_cache.put(cache_key, coords)
+                    metrics.geocode_lookups.inc(source="nominatim")
+                    return coords
+                break
+            had_errors = True
+            logger.warning("Geocoding error (%s) attempt %d: %s", query, attempt + 1, error)
+            if attempt == 0:
+                metrics.geocode_retries.inc(query=kind)
 
-sun = eph['sun']
-moon = eph['moon']
-earth = eph['earth']
+    if had_errors:
+        metrics.geocode_unresolved.inc(reason="unavailable")
+        raise GeocoderUnavailableError(f"Geocoding service unavailable for: {city}, {country}")
+    geocode_cache.put(cache_key, None)
+    metrics.geocode_unresolved.inc(reason="not_found")
+    raise LocationNotFoundError(f"Could not resolve location: {city}, {country}")
 
+@timed("geocode")
 def get_lat_lon(city, country, state=None):
-    try:
-        geolocator = Nominatim(user_agent="geoastro_compute_backend_v2")
-        
-        # Attempt 1: City, Country
-        for attempt in range(2):
-            try:
-                location = geolocator.geocode(f"{city}, {country}", timeout=10)
-                if location:
-                    return location.latitude, location.longitude
-            except (GeocoderTimedOut, Exception) as e:
-                print(f"Geocoding error (City, Country) attempt {attempt+1}: {e}")
-
-        # Attempt 2: State, Country (Fallback)
-        if state:
-            print(f"Falling back to State: {state}, {country}")
-            for attempt in range(2):
-                try:
-                    location = geolocator.geocode(f"{state}, {country}", timeout=10)
-                    if location:
-                        return location.latitude, location.longitude
-                except (GeocoderTimedOut, Exception) as e:
-                    print(f"Geocoding error (State, Country) attempt {attempt+1}: {e}")
-                
-        # If all fails, return a default for debugging instead of crashing
-        print(f"Could not resolve location for {city}, {country}. Using fallback (London).")
-        return 51.5074, -0.1278
-        
-    except Exception as e:
-        print(f"Critical geocoding failure: {e}")
-        return 51.5074, -0.1278
+    # Nominatim through geopy, paced by the shared rate limiter.
+    steps = _geocode_steps(city, country, state)
+    reply = None
+    while True:
+        try:
+            query = steps.send(reply)
+        except StopIteration as done:
+            return done.value
+        try:
+            nominatim_limiter.wait()
+            location = geolocator.geocode(query, timeout=10)
+            reply = ((location.latitude, location.longitude) if location else None, None)
+        except Exception as e:
+            reply = (None, e)
 
-def calculate_astronomy(city, country, date_str, time_str, state=None):
-    lat, lon = get_lat_lon(city, country, state)
-    
+@timed("geocode")
+async def get_lat_lon_async(city, country, state=None):
+    # get_lat_lon for the async endpoints: Nominatim goes through the pooled,
+    # coalescing, rate-limited client. Callers hand the result to the chart
+    # functions as `location`.
+    steps = _geocode_steps(city, country, state)
+    reply = None
+    while True:
+        try:
+            query = steps.send(reply)
+        except StopIteration as done:
+            return done.value
+        try:
+            reply = (await nominatim.geocode(query), None)
+        except Exception as e:
+            reply = (None, e)
+
+# 45-degree bins of the Sun-Moon elongation, starting at New Moon.
+MOON_PHASES = [
+    "New Moon", "Waxing Crescent", "First Quarter", "Waxing Gibbous",
+    "Full Moon", "Waning Gibbous", "Last Quarter", "Waning Crescent"
+]
+
+# "full" runs the position engine on DE421; "fast" reads the precomputed
+# Chebyshev fits (geocentric, a few arcseconds at worst; see fast_ephemeris.py).
+PRECISIONS = ("full", "fast")
+
+def check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+
+def chart_longitudes(ctx, t, lat, lon, precision="full"):
+    # Ecliptic longitudes of BODY_NAMES, in that order.
+    if precision == "fast":
+        longitudes, _ = load_fast_ephemeris().observe(t.tt)
+        return longitudes
+    return ctx.engine.observe(t, lat, lon).longitude
+
+def moon_phase_degrees(ctx, t, precision="full"):
+    # Same definition as almanac.moon_phase: geocentric ecliptic-of-date longitude
+    # of the Moon minus that of the Sun. Works for scalar and array times.
+    if precision == "fast":
+        longitudes, _ = load_fast_ephemeris().observe(t.tt, names=['Sun', 'Moon'])
+    else:
+        longitudes = ctx.engine.observe(t, names=['Sun', 'Moon'], frame=ecliptic_frame).longitude
+    return (longitudes[1] - longitudes[0]) % 360.0
+
+def tt_to_iso(ctx, tt_values):
+    # UTC ISO strings for TT Julian dates, None passing through.
+    present = [v for v in tt_values if v is not None]
+    iso = iter(ctx.ts.tt_jd(np.array(present)).utc_iso() if present else [])
+    return [next(iso) if v is not None else None for v in tt_values]
+
+def sign_intervals(ctx, t, names):
+    # When each body entered its current sign and when it leaves it, from the
+    # ingress index (a binary search each, no ephemeris work). The index is
+    # geocentric, so near a boundary the Moon's topocentric sign can disagree.
+    index = load_ingress_index()
+    tt = float(t.tt)
+    if not index.covers(tt):
+        return {name: {"signIngress": None, "signEgress": None} for name in names}
+    bounds = [index.interval(name, tt)[1:3] for name in names]
+    iso = tt_to_iso(ctx, [v for pair in bounds for v in pair])
+    return {name: {"signIngress": iso[2 * i], "signEgress": iso[2 * i + 1]} for i, name in enumerate(names)}
+
+def local_solar_date(dt, lon):
+    # Calendar date of local mean time at longitude `lon` for a UTC datetime.
+    return (dt + timedelta(hours=lon / 15.0)).date()
+
+def solar_day(lat, lon, dt):
+    # Equation of time at dt and the solar day it falls in (noon, sunrise, sunset,
+    # day length) from the solar table, or (None, None) outside its range.
+    table = load_solar_table()
+    day = local_solar_date(dt, lon)
+    day_jd = julian_date(datetime(day.year, day.month, day.day))
+    jd = julian_date(dt)
+    if not table.covers([jd, day_jd - 1.0, day_jd + 2.0]):
+        return None, None
+    eot, _ = table.lookup(jd)
+    days = table.days(lat, lon, [day_jd])
+    noon, sunrise, sunset = iso_utc([days["noon"][0], days["sunrise"][0], days["sunset"][0]])
+    day_length = float(days["day_length"][0])
+    return float(eot), {
+        "date": day.isoformat(),
+        "solarNoon": noon,
+        "sunrise": sunrise,
+        "sunset": sunset,
+        "dayLengthHours": None if math.isnan(day_length) else day_length,
+        "declination": float(days["declination"][0]),
+    }
+
+def moon_phase_name(phase_deg):
+    return MOON_PHASES[int(phase_deg // 45) % 8]
+
+def moon_section(ctx, t, precision, moon_longitude, interval):
+    # moonPosition: phase, lunation (Brown numbering), age and the surrounding
+    # principal phases from the lunation table, the sign from the chart's Moon
+    # longitude and `interval` from sign_intervals(). Only outside the table's
+    # span does the phase cost an ephemeris evaluation.
+    section = {"phase": None, "constellation": zodiac_sign_of(moon_longitude), **interval,
+               "lunation": None, "ageDays": None, "previousPhase": None, "nextPhase": None,
+               "nextNewMoon": None, "nextFullMoon": None}
+    table = load_lunation_table()
+    tt = float(t.tt)
+    if not table.covers(tt):
+        section["phase"] = moon_phase_name(float(moon_phase_degrees(ctx, t, precision)))
+        return section
+    lunation = table.lookup(tt)
+    (previous_tt, previous), (next_tt, upcoming) = lunation["previous"], lunation["next"]
+    iso = tt_to_iso(ctx, [previous_tt, next_tt, lunation["next_new_moon"], lunation["next_full_moon"]])
+    section.update({
+        "phase": MOON_PHASES[lunation["octant"]],
+        "lunation": lunation["lunation"],
+        "ageDays": lunation["age_days"],
+        "previousPhase": {"phase": MOON_PHASES[previous], "time": iso[0]},
+        "nextPhase": {"phase": MOON_PHASES[upcoming], "time": iso[1]},
+        "nextNewMoon": iso[2],
+        "nextFullMoon": iso[3],
+    })
+    return section
+
+def decimal_hours_to_hms(hours):
+    h = int(hours)
+    m = int((hours - h) * 60)
+    s = int(((hours - h) * 60 - m) * 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+def shift_hms(hms, seconds):
+    h, m, s = (int(part) for part in hms.split(":"))
+    total = int(h * 3600 + m * 60 + s + seconds) % 86400
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+def civil_offset_minutes(solar_time_hours, input_hours):
+    # Apparent solar time minus clock time, wrapped to +/-12 hours.
+    diff_hours = np.asarray(solar_time_hours - input_hours)
+    diff_hours = np.where(diff_hours > 12, diff_hours - 24, diff_hours)
+    diff_hours = np.where(diff_hours < -12, diff_hours + 24, diff_hours)
+    return diff_hours * 60
+
+def parse_datetime(date_str, time_str):
     dt_str = f"{date_str} {time_str}"
     try:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
+        return datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
     except ValueError:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-        
-    ts = load.timescale()
-    t = ts.from_datetime(dt.replace(tzinfo=pytz.utc))
-    
-    observer = earth + wgs84.latlon(lat, lon)
-    
-    # Sun Position
-    astrometric = observer.at(t).observe(sun)
-    app = astrometric.apparent()
-    alt, az, distance = app.altaz()
-    ha, dec, dist = app.hadec()
+        return datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
+
+def resolve_chart_input(city, country, date_str, time_str, state=None, location=None):
+    # Geocode and parse once; returns (ctx, lat, lon, dt, t). `location`: (lat, lon)
+    # when the caller already resolved the place (the async endpoints do).
+    # date_str/time_str are civil time at the place; dt is the same instant as a
+    # naive UTC datetime.
+    lat, lon = location or get_lat_lon(city, country, state)
+    ctx = get_context()
+    with span("time"):
+        dt = load_timezone_index().localize(lat, lon, parse_datetime(date_str, time_str)).utc
+        t = ctx.ts.from_datetime(dt.replace(tzinfo=pytz.utc))
+    return ctx, lat, lon, dt, t
+
+def timezone_section(civil):
+    return {"zone": civil.zone, "utcOffset": format_offset(civil.offset_seconds), "dst": civil.dst}
+
+def calculate_astronomy(city, country, date_str, time_str, state=None, precision="full", location=None,
+                        quantization=None):
+    # quantization: None computes the chart as given (still memoized on the exact
+    # inputs); CURRENT_SKY_QUANTIZATION opts in to sharing results across nearby
+    # places and times.
+    check_precision(precision)
+    ctx, lat, lon, dt, t = resolve_chart_input(city, country, date_str, time_str, state, location)
+    return cached_astronomy_chart(ctx, lat, lon, dt, precision, quantization or EXACT_QUANTIZATION)
+
+# astronomy_chart's output fields, grouped by how fast they change with place and
+# time: the local Sun (alt/az moves ~0.25 deg a minute, solar time tracks the
+# clock) and the sky (zodiac, Moon phase and planets move at most ~0.5 deg an hour
+# and don't depend on where you stand).
+LOCAL_FIELDS = ("trueSolarTime", "civilTimeDifference", "sunPosition", "solarDay", "timezone")
+SKY_FIELDS = ("zodiacSign", "moonPosition", "planets", "cosmicFact", "equationOfTime", "temperature")
+
+EXACT_QUANTIZATION = {LOCAL_FIELDS: EXACT, SKY_FIELDS: EXACT}
+# For "now" at the user's city: 0.01 deg (~1 km) and one-minute buckets for the
+# local Sun, 1 deg and ten minutes for the sky. Override with
+# CHART_CACHE_LOCAL_QUANTUM / CHART_CACHE_SKY_QUANTUM ("degrees,seconds").
+CURRENT_SKY_QUANTIZATION = {
+    LOCAL_FIELDS: parse_quantum(os.environ.get("CHART_CACHE_LOCAL_QUANTUM"), Quantum(0.01, 60)),
+    SKY_FIELDS: parse_quantum(os.environ.get("CHART_CACHE_SKY_QUANTUM"), Quantum(1.0, 600)),
+}
+
+chart_cache = ChartCache()
+
+def cached_astronomy_chart(ctx, lat, lon, dt, precision="full", quantization=EXACT_QUANTIZATION):
+    # astronomy_chart through chart_cache. Each field group is looked up under its
+    # own quantized inputs and, on a miss, computed at the snapped place and time,
+    # so a cached group is the same whoever filled it. Groups snapped to the same
+    # point share one computation; with EXACT_QUANTIZATION that is the plain chart.
+    result = {"coordinates": {"latitude": lat, "longitude": lon}}
+    charts = {}
+    for fields, quantum in quantization.items():
+        snapped = quantum.snap(lat, lon, dt)
+
+        def compute():
+            if snapped not in charts:
+                lat_q, lon_q, dt_q = snapped
+                with span("time"):
+                    t_q = ctx.ts.from_datetime(dt_q.replace(tzinfo=pytz.utc))
+                charts[snapped] = astronomy_chart(ctx, lat_q, lon_q, dt_q, t_q, precision)
+            return {field: charts[snapped][field] for field in fields}
+
+        group = chart_cache.get_or_compute((fields, precision) + snapped, compute)
+        if "trueSolarTime" in group and snapped[2] != dt:
+            # Solar time runs at the clock's rate to a few ppm, so carry it from the
+            # bucket start to the requested second.
+            group = dict(group, trueSolarTime=shift_hms(group["trueSolarTime"], (dt - snapped[2]).total_seconds()))
+        result.update(group)
+    # Callers own their copy; the cached one is shared.
+    return copy.deepcopy(result)
+
+def astronomy_chart(ctx, lat, lon, dt, t, precision="full", positions=None):
+    # `positions`: an engine result for all bodies at (t, lat, lon), when the
+    # caller already has one to share.
+    # All ten bodies from the observer in one pass; the Sun's alt/az and hour
+    # angle come from the same apparent vectors. In fast mode only the Sun goes
+    # through the engine, for its local horizon coordinates.
+    if positions is None:
+        names = ['Sun'] if precision == "fast" else None
+        positions = ctx.engine.observe(t, lat, lon, names=names)
+    if precision == "fast":
+        longitudes = chart_longitudes(ctx, t, lat, lon, precision)
+    else:
+        longitudes = positions.longitude
+    alt_deg, az_deg = positions.altaz('Sun')
+    ha_hours, _ = positions.hadec('Sun')
     
     # True Solar Time
-    solar_time_hours = (ha.hours + 12) % 24
+    solar_time_hours = (ha_hours + 12) % 24
     
-    def decimal_hours_to_hms(hours):
-        h = int(hours)
-        m = int((hours - h) * 60)
-        s = int(((hours - h) * 60 - m) * 60)
-        return f"{h:02d}:{m:02d}:{s:02d}"
-        
     true_solar_time_str = decimal_hours_to_hms(solar_time_hours)
     
-    # Civil Offset
-    input_hours = dt.hour + dt.minute / 60 + dt.second / 3600
-    diff_hours = solar_time_hours - input_hours
-    if diff_hours > 12: diff_hours -= 24
-    if diff_hours < -12: diff_hours += 24
-    diff_minutes = diff_hours * 60
+    # Civil Offset: solar time against the clock on the wall at the place.
+    civil = load_timezone_index().to_local(lat, lon, dt)
+    input_hours = civil.local.hour + civil.local.minute / 60 + civil.local.second / 3600
+    diff_minutes = float(civil_offset_minutes(solar_time_hours, input_hours))
     civil_diff_str = f"{diff_minutes:+.1f} mins"
 
     # Zodiac Sign (Longitude)
-    _, lon_ecl, _ = app.ecliptic_latlon()
-    longitude = lon_ecl.degrees
-    
-    zodiac_signs = [
-        "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", 
-        "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
-    ]
-    zodiac_index = int(longitude / 30)
-    zodiac_sign = zodiac_signs[zodiac_index % 12]
+    longitude = float(longitudes[BODY_NAMES.index('Sun')])
+    zodiac_sign = zodiac_sign_of(longitude)
     
+    intervals = sign_intervals(ctx, t, BODY_NAMES)
+
     # Moon Phase
-    phase_angle = almanac.moon_phase(eph, t)
-    phase_deg = phase_angle.degrees
-    
-    phase_name = "New Moon"
-    if 0 <= phase_deg < 45: phase_name = "New Moon"
-    elif 45 <= phase_deg < 90: phase_name = "Waxing Crescent"
-    elif 90 <= phase_deg < 135: phase_name = "First Quarter"
-    elif 135 <= phase_deg < 180: phase_name = "Waxing Gibbous"
-    elif 180 <= phase_deg < 225: phase_name = "Full Moon"
-    elif 225 <= phase_deg < 270: phase_name = "Waning Gibbous"
-    elif 270 <= phase_deg < 315: phase_name = "Last Quarter"
-    else: phase_name = "Waning Crescent"
+    moon = moon_section(ctx, t, precision, float(longitudes[BODY_NAMES.index('Moon')]), intervals['Moon'])
+    phase_name = moon["phase"]
 
     # Planets
-    planets = {
-        'Mercury': eph['mercury'],
-        'Venus': eph['venus'],
-        'Mars': eph['mars'],
-        'Jupiter': eph['jupiter_barycenter'],
-        'Saturn': eph['saturn_barycenter'],
-        'Uranus': eph['uranus_barycenter'],
-        'Neptune': eph['neptune_barycenter'],
-        'Pluto': eph['pluto_barycenter']
-    }
-    
     planetary_positions = {}
     
-    for name, body in planets.items():
-        astrometric = observer.at(t).observe(body)
-        _, lon, _ = astrometric.apparent().ecliptic_latlon()
-        planet_lon = lon.degrees
-        
-        z_index = int(planet_lon / 30)
-        z_sign = zodiac_signs[z_index % 12]
-        
+    for name in PLANET_NAMES:
+        planet_lon = float(longitudes[BODY_NAMES.index(name)])
         planetary_positions[name] = {
             "longitude": planet_lon,
-            "zodiacSign": z_sign,
-            "degree": planet_lon % 30
+            "zodiacSign": zodiac_sign_of(planet_lon),
+            "degree": planet_lon % 30,
+            **intervals[name]
         }
 
+    eot_minutes, solar_day_info = solar_day(lat, lon, dt)
+
     # Generate Cosmic Fact
     # Simple deterministic fact generation based on positions
     fact = f"The Sun is in {zodiac_sign} and the Moon is in its {phase_name} phase."
@@ -186,103 +399,237 @@ def calculate_astronomy(city, country, date_str, time_str, state=None):
         "trueSolarTime": true_solar_time_str,
         "civilTimeDifference": civil_diff_str,
         "sunPosition": {
-            "azimuth": az.degrees,
-            "altitude": alt.degrees,
+            "azimuth": float(az_deg),
+            "altitude": float(alt_deg),
             "constellation": zodiac_sign, 
-            "longitude": longitude
+            "longitude": longitude,
+            **intervals['Sun']
         },
         "zodiacSign": zodiac_sign,
-        "moonPosition": {
-            "phase": phase_name,
-            "constellation": "Unknown" 
-        },
+        "moonPosition": moon,
         "planets": planetary_positions,
         "cosmicFact": fact,
-        "equationOfTime": "N/A",
+        "equationOfTime": f"{eot_minutes:+.1f} minutes" if eot_minutes is not None else "N/A",
+        "solarDay": solar_day_info,
+        "timezone": timezone_section(civil),
         "temperature": ""
     }
 
-def calculate_solar_return(birth_date_str, birth_time_str, target_year, city, country, state=None):
-    lat, lon = get_lat_lon(city, country, state)
-    
-    dt_str = f"{birth_date_str} {birth_time_str}"
-    try:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-    
-    ts = load.timescale()
-    t_birth = ts.from_datetime(dt.replace(tzinfo=pytz.utc))
-    
-    observer = earth + wgs84.latlon(lat, lon)
-    birth_sun = observer.at(t_birth).observe(sun).apparent()
-    _, birth_lon_ecl, _ = birth_sun.ecliptic_latlon()
-    target_lon = birth_lon_ecl.degrees
-    
-    # Search window: Birthday in target year +/- 2 days
-    birth_dt = dt
-    start_search_dt = datetime(target_year, birth_dt.month, birth_dt.day) - timedelta(days=2)
-    end_search_dt = datetime(target_year, birth_dt.month, birth_dt.day) + timedelta(days=2)
-    
-    t1 = ts.from_datetime(start_search_dt.replace(tzinfo=pytz.utc))
-    t2 = ts.from_datetime(end_search_dt.replace(tzinfo=pytz.utc))
-    
-    def sun_longitude_difference(t):
-        s = earth.at(t).observe(sun).apparent()
-        _, l, _ = s.ecliptic_latlon()
-        current_lon = l.degrees
-        diff = current_lon - target_lon
-        if diff > 180: diff -= 360
-        if diff < -180: diff += 360
-        return diff
-
-    # Bisection Search
-    y1 = sun_longitude_difference(t1)
-    y2 = sun_longitude_difference(t2)
-    
-    if y1 * y2 > 0:
-        return None # Should not happen
-        
-    low = t1.tt
-    high = t2.tt
-    
-    t_final = t1
-    
-    for _ in range(20):
-        mid = (low + high) / 2
-        t_mid = ts.tt_jd(mid)
-        y_mid = sun_longitude_difference(t_mid)
-        if y_mid == 0: 
-            t_final = t_mid
-            break
-        if y1 * y_mid < 0:
-            high = mid
-            y2 = y_mid
+def batch_location_key(record):
+    return record["city"], record["country"], record.get("state") or None
+
+def calculate_astronomy_batch(records, house_system="placidus", locations=None):
+    # Vectorized /analyze for many rows. records: dicts with city, country, date,
+    # time and optional state. Every row shares one Time array and one engine pass,
+    # and houses (in `house_system`) one chart_houses() call; results are
+    # column-oriented, with None and an "error" entry for rows that could not be
+    # geocoded or parsed. locations: {batch_location_key(record): (lat, lon) or the
+    # GeocodingError} for places the caller already resolved (the async endpoint
+    # resolves them all); the rest are geocoded here.
+    check_house_system(house_system)
+    n = len(records)
+    errors = [None] * n
+    lats = np.zeros(n)
+    lons = np.zeros(n)
+    parts = np.zeros((n, 6))
+
+    # Geocode each distinct location once.
+    locations = dict(locations or {})
+    for i, record in enumerate(records):
+        key = batch_location_key(record)
+        if key not in locations:
+            try:
+                locations[key] = get_lat_lon(*key)
+            except (LocationNotFoundError, GeocoderUnavailableError) as e:
+                locations[key] = e
+        location = locations[key]
+        if isinstance(location, Exception):
+            errors[i] = str(location)
+            continue
+        try:
+            dt = parse_datetime(record["date"], record["time"])
+        except ValueError as e:
+            errors[i] = f"Invalid date/time: {e}"
+            continue
+        lats[i], lons[i] = location
+        parts[i] = (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+
+    ok = np.array([error is None for error in errors])
+    arrays = batch_chart_arrays(get_context(), lats, lons, parts, ok, errors, house_system)
+    longitudes = arrays["longitudes"]
+    houses = arrays["houses"]
+
+    def column(values, convert=float):
+        return [convert(v) if good else None for v, good in zip(values, ok)]
+
+    sun_lon = longitudes[0]
+    zone_names = load_timezone_index().zone_names
+    return {
+        "count": n,
+        "latitude": column(lats),
+        "longitude": column(lons),
+        "timezone": column(arrays["zone_ids"], lambda z: zone_names[z]),
+        "utcOffsetMinutes": column(arrays["utc_offset_seconds"], lambda v: int(v) // 60),
+        "trueSolarTime": column(arrays["solar_time_hours"], decimal_hours_to_hms),
+        "civilTimeDifferenceMinutes": column(arrays["civil_minutes"]),
+        "sunAltitude": column(arrays["sun_altitude"]),
+        "sunAzimuth": column(arrays["sun_azimuth"]),
+        "sunHourAngle": column(arrays["sun_hour_angle"]),
+        "sunLongitude": column(sun_lon),
+        "zodiacSign": column(sun_lon, zodiac_sign_of),
+        "moonPhaseAngle": column(arrays["moon_phase_angle"]),
+        "moonPhase": column(arrays["moon_phase_angle"], moon_phase_name),
+        "planets": {name: column(longitudes[BODY_NAMES.index(name)]) for name in PLANET_NAMES},
+        "houseSystem": house_system,
+        "ascendant": column(houses["ascendant"]),
+        "midheaven": column(houses["midheaven"]),
+        "houseCusps": column(houses["cusps"], lambda cusps: [float(c) for c in cusps]),
+        "houseFallback": column(houses["fallback"], bool),
+        "error": errors,
+    }
+
+def batch_chart_arrays(ctx, lats, lons, parts, ok, errors, house_system="placidus"):
+    # The vectorized part of calculate_astronomy_batch, shared with
+    # scripts/bulk_charts.py. parts: (n, 6) year, month, day, hour, minute, second
+    # of civil time at each row's place; ok/errors: rows already rejected. Rows
+    # outside the ephemeris are rejected here (ok and errors are updated in place);
+    # every rejected row is computed at a placeholder instant so the arrays stay
+    # aligned. Returns numpy arrays: body longitudes (bodies, n) in BODY_NAMES
+    # order, Sun alt/az/hour angle, true solar time, civil offset, Moon phase
+    # angle, chart_houses(), and each row's zone (index into the timezone index's
+    # zone_names) and UTC offset in seconds.
+    timezones = load_timezone_index()
+    zone_ids = timezones.zone_ids(lats, lons)
+
+    def utc_times():
+        parts[~ok] = (2000, 1, 1, 0, 0, 0)
+        offsets, _ = timezones.local_offsets(zone_ids, epoch_seconds(parts))
+        return ctx.ts.utc(*parts[:, :5].T, parts[:, 5] - offsets), offsets
+
+    t, utc_offsets = utc_times()
+    in_range = (t.tdb > ctx.engine.start_jd + 1) & (t.tdb < ctx.engine.end_jd - 1)
+    if not in_range.all():
+        for i in np.nonzero(~in_range & ok)[0]:
+            errors[i] = "Date outside the supported ephemeris range"
+        ok &= in_range
+        t, utc_offsets = utc_times()
+    # Earth orientation from the IAU 2000B nutation series: a few milliarcseconds
+    # from 2000A in the horizon frame and in sidereal time, at a fraction of the
+    # cost, which otherwise dominates large batches.
+    t._nutation_angles_radians = iau2000b_radians(t)
+
+    positions = ctx.engine.observe(t, lats, lons)
+    alt_deg, az_deg = positions.altaz('Sun')
+    ha_hours, _ = positions.hadec('Sun')
+    solar_time_hours = (ha_hours + 12) % 24
+    input_hours = parts[:, 3] + parts[:, 4] / 60 + parts[:, 5] / 3600
+    return {
+        "longitudes": positions.longitude,
+        "sun_altitude": alt_deg,
+        "sun_azimuth": az_deg,
+        "sun_hour_angle": ha_hours,
+        "solar_time_hours": solar_time_hours,
+        "civil_minutes": civil_offset_minutes(solar_time_hours, input_hours),
+        "moon_phase_angle": moon_phase_degrees(ctx, t),
+        "houses": chart_houses(t, lats, lons, house_system),
+        "zone_ids": zone_ids,
+        "utc_offset_seconds": utc_offsets,
+    }
+
+# The search runs in the fixed J2000 ecliptic (as ecliptic_latlon() does), where
+# the Sun comes back to the same longitude once per sidereal year.
+SIDEREAL_YEAR_DAYS = 365.256363
+# The Sun's apparent motion stays within these rates (degrees/day) all year;
+# secant slopes are clamped to them so a bad step can't run away.
+SUN_RATE_MIN = 0.95
+SUN_RATE_MAX = 1.02
+SUN_RATE_MEAN = 360.0 / SIDEREAL_YEAR_DAYS
+SOLAR_RETURN_TOLERANCE_DAYS = 1e-7  # ~9 ms
+SOLAR_RETURN_MAX_ITERATIONS = 12
+
+@timed("solar_return")
+def solve_solar_returns(ctx, target_lon, guess_tt, precision="full"):
+    # Secant iteration on f(t) = Sun longitude(t) - target, for an array of first
+    # guesses (TT Julian dates), all years at once. f is wrapped to +/-180 so the
+    # 0/360 crossing needs no bracket, and the first step uses the mean solar rate.
+    jd = np.asarray(guess_tt, dtype=float)
+    prev_jd = prev_f = None
+    for _ in range(SOLAR_RETURN_MAX_ITERATIONS):
+        if precision == "fast":
+            sun_lon = load_fast_ephemeris().observe(jd, names=['Sun'])[0][0]
         else:
-            low = mid
-            y1 = y_mid
-        t_final = t_mid
-            
-    return t_final.utc_iso()
+            sun_lon = ctx.engine.observe(ctx.ts.tt_jd(jd), names=['Sun']).longitude[0]
+        f = (sun_lon - target_lon + 180.0) % 360.0 - 180.0
+        rate = np.full(jd.shape, SUN_RATE_MEAN)
+        if prev_jd is not None:
+            step_days = jd - prev_jd
+            moved = step_days != 0
+            rate[moved] = (f[moved] - prev_f[moved]) / step_days[moved]
+            rate = np.clip(rate, SUN_RATE_MIN, SUN_RATE_MAX)
+        step = -f / rate
+        prev_jd, prev_f = jd, f
+        jd = jd + step
+        if np.max(np.abs(step)) < SOLAR_RETURN_TOLERANCE_DAYS:
+            break
+    else:
+        raise ValueError("Solar return search did not converge")
+    return ctx.ts.tt_jd(jd)
 
-def calculate_perfect_alignment(birth_date, birth_time, birth_city, birth_country, birth_state, solar_return_iso):
+def calculate_solar_return(birth_date_str, birth_time_str, target_year, city, country, state=None, precision="full",
+                           location=None):
+    return calculate_solar_returns(birth_date_str, birth_time_str, target_year, target_year, city, country, state,
+                                   precision, location)[0]["solar_return"]
+
+def calculate_solar_returns(birth_date_str, birth_time_str, start_year, end_year, city, country, state=None,
+                            precision="full", location=None):
+    # Solar returns for every year in [start_year, end_year] in one vectorized solve.
+    # The target is the Sun's apparent longitude seen from the birthplace; the
+    # returns are found for the geocentric Sun.
+    check_precision(precision)
+    ctx, lat, lon, dt, t_birth = resolve_chart_input(city, country, birth_date_str, birth_time_str, state, location)
+    return solar_returns(ctx, lat, lon, dt, t_birth, start_year, end_year, precision)
+
+def solar_returns(ctx, lat, lon, dt, t_birth, start_year, end_year, precision="full", birth_positions=None):
+    if birth_positions is None:
+        birth_positions = ctx.engine.observe(t_birth, lat, lon, names=['Sun'])
+    target_lon = float(birth_positions.longitude[birth_positions['Sun']])
+
+    years = np.arange(start_year, end_year + 1)
+    guess = t_birth.tt + (years - dt.year) * SIDEREAL_YEAR_DAYS
+    source = load_fast_ephemeris() if precision == "fast" else ctx.engine
+    if guess.min() - 2 < source.start_jd or guess.max() + 2 > source.end_jd:
+        first = ctx.ts.tt_jd(source.start_jd + 2).utc_strftime('%Y-%m-%d')
+        last = ctx.ts.tt_jd(source.end_jd - 2).utc_strftime('%Y-%m-%d')
+        raise ValueError(f"Solar returns are only available between {first} and {last}")
+    t_returns = solve_solar_returns(ctx, target_lon, guess, precision)
+
+    return [
+        {"year": int(year), "solar_return": iso}
+        for year, iso in zip(years, t_returns.utc_iso())
+    ]
+
+ALIGNMENT_MODES = ("longitude", "grid")
+
+def calculate_perfect_alignment(birth_date, birth_time, birth_city, birth_country, birth_state, solar_return_iso,
+                                location=None, mode="longitude", bodies=None, top_k=5):
+    # mode "longitude" keeps the birth latitude and matches the Sun's hour angle;
+    # "grid" searches every latitude and longitude for the best match of the
+    # Sun's (and optionally other bodies') alt/az, see perfect_alignment_grid.
+    if mode not in ALIGNMENT_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(ALIGNMENT_MODES)}")
+    ctx, lat, lon, dt, t_birth = resolve_chart_input(birth_city, birth_country, birth_date, birth_time, birth_state,
+                                                     location)
+    with span("time"):
+        t_return = ctx.ts.from_datetime(datetime.fromisoformat(solar_return_iso.replace('Z', '+00:00')))
+    if mode == "grid":
+        return perfect_alignment_grid(ctx, lat, lon, t_birth, t_return, bodies or ['Sun'], top_k)
+    return perfect_alignment(ctx, lat, lon, t_birth, t_return)
+
+def perfect_alignment(ctx, lat, lon, t_birth, t_return, birth_positions=None):
     # 1. Calculate Birth Sun Position (Alt/Az)
-    lat, lon = get_lat_lon(birth_city, birth_country, birth_state)
-    
-    dt_str = f"{birth_date} {birth_time}"
-    try:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-        
-    ts = load.timescale()
-    t_birth = ts.from_datetime(dt.replace(tzinfo=pytz.utc))
-    
-    observer = earth + wgs84.latlon(lat, lon)
-    birth_sun = observer.at(t_birth).observe(sun).apparent()
-    alt, az, _ = birth_sun.altaz()
-    target_altitude = alt.degrees
-    target_azimuth = az.degrees
+    if birth_positions is None:
+        birth_positions = ctx.engine.observe(t_birth, lat, lon, names=['Sun'])
+    target_altitude, target_azimuth = (float(v) for v in birth_positions.altaz('Sun'))
     
     # Calculate GHA at birth
     # GHA = Greenwich Apparent Sidereal Time - Right Ascension
@@ -293,20 +640,16 @@ def calculate_perfect_alignment(birth_date, birth_time, birth_city, birth_countr
     
     # To get GHA, we can use: GHA = LHA - Lon
     # LHA can be derived from HA (Hour Angle) from hadec()
-    ha, _, _ = birth_sun.hadec()
+    ha_hours, _ = birth_positions.hadec('Sun')
     # ha is the hour angle. 
     # LHA (in degrees) = ha.hours * 15
-    birth_lha_deg = ha.hours * 15
+    birth_lha_deg = float(ha_hours) * 15
     
     # 2. At Solar Return Time
-    t_return = ts.from_datetime(datetime.fromisoformat(solar_return_iso.replace('Z', '+00:00')))
-    
     # We need the GHA of the Sun at t_return
     # We can calculate it by observing from Lon=0
-    observer_greenwich = earth + wgs84.latlon(0, 0)
-    sun_return_greenwich = observer_greenwich.at(t_return).observe(sun).apparent()
-    ha_return, _, _ = sun_return_greenwich.hadec()
-    return_gha_deg = ha_return.hours * 15
+    ha_return_hours, _ = ctx.engine.observe(t_return, 0.0, 0.0, names=['Sun']).hadec('Sun')
+    return_gha_deg = float(ha_return_hours) * 15
     
     # Calculate required Longitude
     # birth_lha = return_gha + required_lon
@@ -320,112 +663,16 @@ def calculate_perfect_alignment(birth_date, birth_time, birth_city, birth_countr
     best_lat = lat # Latitude stays the same to match Declination effect on Alt/Az (mostly)
     best_lon = required_lon
     
-    # Reverse Geocode to find city with improved fallback logic
-    geolocator = Nominatim(user_agent="geoastro_compute_v1_backend")
-    city = "Unknown"
-    country = "Unknown"
-    country_code = None
-    
-    # Try reverse geocoding with retry logic
-    for attempt in range(2):
-        try:
-            # Try to find a location near these coordinates
-            # reverse() returns a location object with address details
-            location = geolocator.reverse((best_lat, best_lon), language='en', timeout=10, zoom=10)
-            
-            if location:
-                address = location.raw.get('address', {})
-                
-                # Try multiple address fields in order of preference
-                city = (
-                    address.get('city') or 
-                    address.get('town') or 
-                    address.get('village') or 
-                    address.get('municipality') or
-                    address.get('hamlet') or
-                    address.get('county') or
-                    address.get('state_district') or
-                    address.get('state') or
-                    address.get('region') or
-                    None
-                )
-                
-                # Get country information
-                country = address.get('country') or "Unknown"
-                country_code = address.get('country_code')
-                
-                # If still no city, try to extract from display_name
-                if not city and location.raw.get('display_name'):
-                    display_name = location.raw.get('display_name')
-                    # display_name format is usually: "Place, Region, Country"
-                    parts = [p.strip() for p in display_name.split(',')]
-                    if len(parts) >= 2:
-                        # Use the first meaningful part as city
-                        city = parts[0] if parts[0] else None
-                
-                # If we found a location but no specific city, provide descriptive fallback
-                if not city:
-                    if address.get('ocean') or address.get('sea'):
-                        # Location is in ocean/sea
-                        ocean_name = address.get('ocean') or address.get('sea')
-                        city = f"Ocean ({ocean_name})" if ocean_name else "Ocean Location"
-                    elif country != "Unknown":
-                        # We have country but no city - use region/state
-                        region = address.get('state') or address.get('region')
-                        city = f"{region}, {country}" if region else country
-                    else:
-                        city = "Remote Location"
-                
-                break  # Success, exit retry loop
-                
-        except GeocoderTimedOut:
-            print(f"Reverse geocoding timeout (attempt {attempt + 1}/2)")
-            if attempt == 1:  # Last attempt failed
-                city = "Location Unavailable"
-        except Exception as e:
-            print(f"Reverse geocoding error (attempt {attempt + 1}/2): {e}")
-            if attempt == 1:  # Last attempt failed
-                city = "Geocoding Error"
-        
-    # Fallback for country if unknown (improved ocean and region detection)
-    if country == "Unknown":
-        # Check if location is in ocean based on coordinates
-        if -180 <= best_lon <= -30:  # Western Hemisphere oceans
-            if 0 <= best_lat <= 70:
-                country = "North Atlantic Ocean"
-                city = "Ocean Location" if city == "Unknown" else city
-            elif -60 <= best_lat < 0:
-                country = "South Atlantic Ocean"
-                city = "Ocean Location" if city == "Unknown" else city
-            elif best_lon < -100:  # Pacific side
-                if best_lat >= 0:
-                    country = "North Pacific Ocean"
-                    city = "Ocean Location" if city == "Unknown" else city
-                else:
-                    country = "South Pacific Ocean"
-                    city = "Ocean Location" if city == "Unknown" else city
-        elif 30 <= best_lon <= 180:  # Eastern Hemisphere oceans
-            if best_lat >= 0:
-                country = "North Pacific Ocean"
-                city = "Ocean Location" if city == "Unknown" else city
-            else:
-                country = "Indian Ocean"
-                city = "Ocean Location" if city == "Unknown" else city
-        # Land-based fallbacks
-        elif 50 <= best_lat <= 80 and 20 <= best_lon <= 180:
-            country = "Russia"
-            country_code = "ru"
-        elif -10 <= best_lat <= 60 and -10 <= best_lon <= 40:
-            country = "Europe/Africa"
-        elif 25 <= best_lat <= 50 and -130 <= best_lon <= -65:
-            country = "United States"
-            country_code = "us"
-        else:
-            country = f"Coordinates: {best_lat:.2f}°, {best_lon:.2f}°"
+    # Offline reverse geocode: nearest gazetteer place for land, basin name for water
+    with span("reverse_geocode"):
+        location = load_reverse_geocoder().reverse(best_lat, best_lon)
+    city = location["city"]
+    country = location["country"]
+    country_code = location["countryCode"]
 
-    solar_return_dt = t_return.utc_datetime()
-    local_time_str = solar_return_dt.strftime("%H:%M:%S")
-    local_date_str = solar_return_dt.strftime("%Y-%m-%d")
+    civil = load_timezone_index().to_local(best_lat, best_lon, t_return.utc_datetime().replace(tzinfo=None))
+    local_time_str = civil.local.strftime("%H:%M:%S")
+    local_date_str = civil.local.strftime("%Y-%m-%d")
 
     reasoning = f"Optimal location where solar geometry at {local_date_str} matches birth alignment. Sun altitude: {target_altitude:.1f}°, azimuth: {target_azimuth:.1f}°."
 
@@ -439,89 +686,205 @@ def calculate_perfect_alignment(birth_date, birth_time, birth_city, birth_countr
         },
         "reasoning": reasoning,
         "localDateAtReturn": local_date_str,
-        "localTimeAtReturn": local_time_str
+        "localTimeAtReturn": local_time_str,
+        "timezone": timezone_section(civil)
     }
 
-def calculate_arroyo_analysis(birth_date, birth_time, city, country, state=None):
-    lat, lon = get_lat_lon(city, country, state)
-    
-    dt_str = f"{birth_date} {birth_time}"
-    try:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-        
-    ts = load.timescale()
-    t = ts.from_datetime(dt.replace(tzinfo=pytz.utc))
-    
-    observer = earth + wgs84.latlon(lat, lon)
-    
-    # Zodiac Data
-    zodiac_signs = [
-        "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", 
-        "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
-    ]
-    
-    elements = {
-        "Fire": ["Aries", "Leo", "Sagittarius"],
-        "Earth": ["Taurus", "Virgo", "Capricorn"],
-        "Air": ["Gemini", "Libra", "Aquarius"],
-        "Water": ["Cancer", "Scorpio", "Pisces"]
+# Grid search: a coarse lat/lon grid over the globe, then each of the best
+# separated cells is refined on a finer grid around it until the spacing is
+# below ALIGNMENT_FINEST_DEG. Every level is one array evaluation.
+ALIGNMENT_COARSE_DEG = 2.0
+ALIGNMENT_REFINE_POINTS = 9  # per axis, spanning one spacing of the level above
+ALIGNMENT_FINEST_DEG = 1e-5  # ~1 m
+# Candidates closer than this (great-circle degrees) count as the same minimum.
+ALIGNMENT_MIN_SEPARATION_DEG = 5.0
+ALIGNMENT_MAX_TOP_K = 20
+
+def _horizon_vectors(rotation, vectors):
+    # Unit (north, east, up) vectors from (3, 3, n) horizon rotations and (3, n) vectors.
+    h = np.einsum('ijn,jn->in', rotation, vectors)
+    return h / np.sqrt((h ** 2).sum(axis=0))
+
+def _altaz_vector(alt_deg, az_deg):
+    alt, az = np.radians(alt_deg), np.radians(az_deg)
+    return np.array([np.cos(alt) * np.cos(az), np.cos(alt) * np.sin(az), np.sin(alt)])
+
+def _separation_deg(a, b):
+    # Angle between unit vectors, stable for tiny angles.
+    return np.degrees(2.0 * np.arcsin(np.clip(np.sqrt(((a - b) ** 2).sum(axis=0)) / 2.0, 0.0, 1.0)))
+
+def alignment_errors(t, lats, lons, geocentric, targets):
+    # RMS over bodies of the angle (degrees) between each body's direction in the
+    # local sky at t and its birth direction, for arrays of observers. geocentric:
+    # apparent geocentric vectors (3, bodies) in au; targets: birth (north, east,
+    # up) unit vectors (3, bodies). Parallax comes from shifting the geocentric
+    # vectors to each observer; diurnal aberration (< 0.4") is left out.
+    topos = wgs84.latlon(lats, lons)
+    observer = topos.at(t).xyz.au
+    rotation = topos.rotation_at(t)
+    squared = np.zeros(len(lats))
+    for b in range(geocentric.shape[1]):
+        local = _horizon_vectors(rotation, geocentric[:, b, None] - observer)
+        squared += _separation_deg(local, targets[:, b, None]) ** 2
+    return np.sqrt(squared / geocentric.shape[1])
+
+def _great_circle_deg(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))))
+
+def _distinct(lats, lons, errors, k):
+    # Indices of the k lowest errors, skipping points near one already taken.
+    chosen = []
+    for i in np.argsort(errors):
+        if all(_great_circle_deg(lats[i], lons[i], lats[j], lons[j]) >= ALIGNMENT_MIN_SEPARATION_DEG for j in chosen):
+            chosen.append(i)
+            if len(chosen) == k:
+                break
+    return np.array(chosen, dtype=np.int64)
+
+def perfect_alignment_grid(ctx, lat, lon, t_birth, t_return, bodies=('Sun',), top_k=5):
+    # The top_k places whose sky at t_return best reproduces the birth alt/az of
+    # `bodies`, each refined to its local minimum.
+    bodies = list(dict.fromkeys(bodies))
+    unknown = [name for name in bodies if name not in BODY_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown bodies: {', '.join(unknown)}")
+    top_k = max(1, min(int(top_k), ALIGNMENT_MAX_TOP_K))
+
+    birth = ctx.engine.observe(t_birth, lat, lon, names=bodies)
+    birth_altaz = [birth.altaz(name) for name in bodies]
+    targets = np.stack([_altaz_vector(alt, az) for alt, az in birth_altaz], axis=1)
+    geocentric = ctx.engine.observe(t_return, names=bodies).apparent
+
+    with span("alignment_search"):
+        step = ALIGNMENT_COARSE_DEG
+        grid_lats, grid_lons = np.meshgrid(np.arange(-90.0 + step / 2, 90.0, step), np.arange(-180.0, 180.0, step),
+                                           indexing='ij')
+        lats, lons = grid_lats.ravel(), grid_lons.ravel()
+        errors = alignment_errors(t_return, lats, lons, geocentric, targets)
+        best = _distinct(lats, lons, errors, top_k)
+        lats, lons, errors = lats[best], lons[best], errors[best]
+
+        offsets = np.linspace(-1.0, 1.0, ALIGNMENT_REFINE_POINTS)
+        d_lat, d_lon = (a.ravel() for a in np.meshgrid(offsets, offsets, indexing='ij'))
+        while step > ALIGNMENT_FINEST_DEG:
+            fine_lats = np.clip(lats[:, None] + step * d_lat, -90.0, 90.0)
+            fine_lons = (lons[:, None] + step * d_lon + 180.0) % 360.0 - 180.0
+            fine_errors = alignment_errors(t_return, fine_lats.ravel(), fine_lons.ravel(), geocentric,
+                                           targets).reshape(fine_lats.shape)
+            pick = fine_errors.argmin(axis=1)
+            rows = np.arange(len(lats))
+            lats, lons, errors = fine_lats[rows, pick], fine_lons[rows, pick], fine_errors[rows, pick]
+            step *= 2.0 / (ALIGNMENT_REFINE_POINTS - 1)
+        # Neighbouring coarse cells can settle into the same minimum.
+        keep = _distinct(lats, lons, errors, top_k)
+        lats, lons = lats[keep], lons[keep]
+
+    # Check the winners with the full topocentric pipeline.
+    n = len(lats)
+    t_candidates = ctx.ts.tdb_jd(np.full(n, t_return.whole), np.full(n, t_return.tdb_fraction))
+    exact = ctx.engine.observe(t_candidates, lats, lons, names=bodies)
+    reverse = load_reverse_geocoder()
+    candidates = []
+    for i in range(n):
+        matches = {}
+        squared = 0.0
+        for b, name in enumerate(bodies):
+            alt, az = (float(v[i]) for v in exact.altaz(name))
+            error = float(_separation_deg(_altaz_vector(alt, az), targets[:, b]))
+            squared += error ** 2
+            matches[name] = {"altitude": alt, "azimuth": az, "birthAltitude": float(birth_altaz[b][0]),
+                             "birthAzimuth": float(birth_altaz[b][1]), "errorDegrees": error}
+        with span("reverse_geocode"):
+            place = reverse.reverse(float(lats[i]), float(lons[i]))
+        candidates.append({
+            "city": place["city"],
+            "country": place["country"],
+            "countryCode": place["countryCode"],
+            "coordinates": {"latitude": float(lats[i]), "longitude": float(lons[i])},
+            "errorDegrees": math.sqrt(squared / len(bodies)),
+            "bodies": matches,
+        })
+    candidates.sort(key=lambda c: c["errorDegrees"])
+
+    best = candidates[0]
+    civil = load_timezone_index().to_local(best["coordinates"]["latitude"], best["coordinates"]["longitude"],
+                                           t_return.utc_datetime().replace(tzinfo=None))
+    local_date_str = civil.local.strftime("%Y-%m-%d")
+    sun = best["bodies"].get("Sun")
+    if sun:
+        geometry = f"Sun altitude: {sun['birthAltitude']:.1f}°, azimuth: {sun['birthAzimuth']:.1f}°."
+    else:
+        geometry = f"Bodies: {', '.join(bodies)}."
+    return {
+        "city": best["city"],
+        "country": best["country"],
+        "countryCode": best["countryCode"],
+        "coordinates": best["coordinates"],
+        "reasoning": f"Location whose sky at {local_date_str} best reproduces the birth alt/az "
+                     f"(RMS error {best['errorDegrees']:.4f}°). {geometry}",
+        "localDateAtReturn": local_date_str,
+        "localTimeAtReturn": civil.local.strftime("%H:%M:%S"),
+        "timezone": timezone_section(civil),
+        "candidates": candidates,
     }
-    
-    modalities = {
-        "Cardinal": ["Aries", "Cancer", "Libra", "Capricorn"],
-        "Fixed": ["Taurus", "Leo", "Scorpio", "Aquarius"],
-        "Mutable": ["Gemini", "Virgo", "Sagittarius", "Pisces"]
+
+def calculate_arroyo_analysis(birth_date, birth_time, city, country, state=None, precision="full", location=None,
+                              house_system="placidus"):
+    check_precision(precision)
+    check_house_system(house_system)
+    ctx, lat, lon, dt, t = resolve_chart_input(city, country, birth_date, birth_time, state, location)
+    return arroyo_chart(ctx, lat, lon, t, precision, house_system=house_system)
+
+def house_section(houses, i=0):
+    # JSON form of row i of a chart_houses() result.
+    return {
+        "ascendant": float(houses["ascendant"][i]),
+        "midheaven": float(houses["midheaven"][i]),
+        "cusps": [float(c) for c in houses["cusps"][i]],
+        "fallback": bool(houses["fallback"][i]),
     }
+
+ARROYO_ELEMENTS = {
+    "Fire": ["Aries", "Leo", "Sagittarius"],
+    "Earth": ["Taurus", "Virgo", "Capricorn"],
+    "Air": ["Gemini", "Libra", "Aquarius"],
+    "Water": ["Cancer", "Scorpio", "Pisces"]
+}
+
+ARROYO_MODALITIES = {
+    "Cardinal": ["Aries", "Cancer", "Libra", "Capricorn"],
+    "Fixed": ["Taurus", "Leo", "Scorpio", "Aquarius"],
+    "Mutable": ["Gemini", "Virgo", "Sagittarius", "Pisces"]
+}
+
+ARROYO_WEIGHTS = {
+    'Sun': 2, 'Moon': 2, 'Ascendant': 2,
+    'Mercury': 1, 'Venus': 1, 'Mars': 1,
+    'Jupiter': 1, 'Saturn': 1, 'Uranus': 1, 'Neptune': 1, 'Pluto': 1
+}
+
+def arroyo_chart(ctx, lat, lon, t, precision="full", positions=None, house_system="placidus"):
+    elements = ARROYO_ELEMENTS
+    modalities = ARROYO_MODALITIES
     
     # Calculate Positions
-    bodies = {
-        'Sun': sun,
-        'Moon': moon,
-        'Mercury': eph['mercury'],
-        'Venus': eph['venus'],
-        'Mars': eph['mars'],
-        'Jupiter': eph['jupiter_barycenter'],
-        'Saturn': eph['saturn_barycenter'],
-        'Uranus': eph['uranus_barycenter'],
-        'Neptune': eph['neptune_barycenter'],
-        'Pluto': eph['pluto_barycenter']
-    }
-    
+    if positions is not None and precision != "fast":
+        longitudes = positions.longitude
+    else:
+        longitudes = chart_longitudes(ctx, t, lat, lon, precision)
     positions = {}
     
-    for name, body in bodies.items():
-        astrometric = observer.at(t).observe(body)
-        _, lon_ecl, _ = astrometric.apparent().ecliptic_latlon()
-        lon_deg = lon_ecl.degrees
-        z_index = int(lon_deg / 30)
-        z_sign = zodiac_signs[z_index % 12]
-        positions[name] = {"sign": z_sign, "longitude": lon_deg}
-
-    # Calculate Ascendant (Approximate)
-    from skyfield.api import Angle
-    import math
-    
-    # Get GAST from skyfield
-    gast_hours = t.gast
-    lst_hours = gast_hours + lon / 15.0
-    lst_rad = lst_hours * 15.0 * (math.pi / 180.0)
-    
-    lat_rad = lat * (math.pi / 180.0)
-    eps_rad = 23.44 * (math.pi / 180.0) # Approx obliquity
-    
-    # Formula for Ascendant
-    y = -math.cos(lst_rad)
-    x = math.sin(lst_rad) * math.cos(eps_rad) + math.tan(lat_rad) * math.sin(eps_rad)
-    
-    asc_rad = math.atan2(y, x)
-    asc_deg = asc_rad * (180.0 / math.pi)
-    if asc_deg < 0: asc_deg += 360.0
-    
-    asc_index = int(asc_deg / 30)
-    asc_sign = zodiac_signs[asc_index % 12]
-    positions['Ascendant'] = {"sign": asc_sign, "longitude": asc_deg}
+    for name, lon_deg in zip(BODY_NAMES, longitudes):
+        lon_deg = float(lon_deg)
+        positions[name] = {"sign": zodiac_sign_of(lon_deg), "longitude": lon_deg}
+
+    # Ascendant, Midheaven and cusps in the ecliptic of date (true obliquity,
+    # apparent sidereal time).
+    houses = chart_houses(t, lat, lon, house_system)
+    asc_deg = float(houses["ascendant"][0])
+    positions['Ascendant'] = {"sign": zodiac_sign_of(asc_deg), "longitude": asc_deg}
     
     # Scoring
     scores = {
@@ -529,11 +892,7 @@ def calculate_arroyo_analysis(birth_date, birth_time, city, country, state=None)
         "Cardinal": 0, "Fixed": 0, "Mutable": 0
     }
     
-    weights = {
-        'Sun': 2, 'Moon': 2, 'Ascendant': 2,
-        'Mercury': 1, 'Venus': 1, 'Mars': 1,
-        'Jupiter': 1, 'Saturn': 1, 'Uranus': 1, 'Neptune': 1, 'Pluto': 1
-    }
+    weights = ARROYO_WEIGHTS
     
     for name, data in positions.items():
         sign = data['sign']
@@ -571,5 +930,244 @@ def calculate_arroyo_analysis(birth_date, birth_time, city, country, state=None)
         "positions": positions,
         "dominantElement": dominant_element,
         "dominantModality": max(modalities.keys(), key=lambda k: scores[k]),
-        "interpretation": interpretation
-    }
\ No newline at end of file
+        "interpretation": interpretation,
+        "houses": {"system": house_system, **house_section(houses)},
+    }
+
+def arroyo_scores(longitudes, ascendant):
+    # arroyo_chart's element and modality scores for many charts at once.
+    # longitudes: (bodies, n) in BODY_NAMES order; ascendant: (n,). Returns
+    # ({score name: (n,) int array}, dominant element names, dominant modality
+    # names), with ties going to the first name in table order as max() does.
+    names = BODY_NAMES + ['Ascendant']
+    signs = (np.vstack([longitudes, ascendant[None, :]]) // 30.0).astype(np.int64) % 12
+    weights = np.array([ARROYO_WEIGHTS.get(name, 1) for name in names])[:, None]
+    scores = {}
+    for table in (ARROYO_ELEMENTS, ARROYO_MODALITIES):
+        for key, members in table.items():
+            member = np.isin(signs, [ZODIAC_SIGNS.index(sign) for sign in members])
+            scores[key] = (member * weights).sum(axis=0)
+    dominant = []
+    for table in (ARROYO_ELEMENTS, ARROYO_MODALITIES):
+        keys = list(table)
+        best = np.argmax(np.stack([scores[key] for key in keys]), axis=0)
+        dominant.append(np.array(keys, dtype=object)[best])
+    return scores, dominant[0], dominant[1]
+
+# Shared by every /report request; the sections of one report run side by side on it.
+report_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="report")
+
+def next_return_year(birth_dt, current_dt):
+    # The year of the first birthday (by calendar date) on or after current_dt.
+    if (current_dt.month, current_dt.day) > (birth_dt.month, birth_dt.day):
+        return current_dt.year + 1
+    return current_dt.year
+
+def calculate_report(birth, current, target_year=None, precision="full", birth_location=None, current_location=None):
+    # Birth analysis, current sky, solar return, perfect alignment and Arroyo in one
+    # call. birth/current: dicts with city, country, date, time and optional state;
+    # birth_location/current_location: (lat, lon) if already resolved.
+    # Each place is geocoded and each instant parsed once (the two concurrently),
+    # the birth chart shares one engine pass, and the independent sections run in
+    # parallel. The current sky comes from chart_cache under
+    # CURRENT_SKY_QUANTIZATION when current["approximate"] opts in, exact
+    # otherwise; the birth sections are always exact. A solar return outside the
+    # ephemeris span leaves solarReturn and perfectAlignment as None with a message
+    # in "errors"; geocoding and parse errors propagate as they do for the single
+    # endpoints.
+    check_precision(precision)
+    current_input = metrics.submit(
+        report_executor, resolve_chart_input, current["city"], current["country"], current["date"], current["time"],
+        current.get("state"), current_location
+    )
+    ctx, lat, lon, dt, t_birth = resolve_chart_input(
+        birth["city"], birth["country"], birth["date"], birth["time"], birth.get("state"), birth_location
+    )
+    names = ['Sun'] if precision == "fast" else None
+    birth_positions = ctx.engine.observe(t_birth, lat, lon, names=names)
+
+    birth_chart = metrics.submit(report_executor, astronomy_chart, ctx, lat, lon, dt, t_birth, precision,
+                                 birth_positions)
+    arroyo = metrics.submit(report_executor, arroyo_chart, ctx, lat, lon, t_birth, precision, birth_positions)
+
+    _, current_lat, current_lon, current_dt, _ = current_input.result()
+    quantization = CURRENT_SKY_QUANTIZATION if current.get("approximate") else EXACT_QUANTIZATION
+    current_chart = metrics.submit(report_executor, cached_astronomy_chart, ctx, current_lat, current_lon,
+                                   current_dt, precision, quantization)
+
+    if target_year is None:
+        # Birthdays go by the calendar at each place, not in UTC.
+        target_year = next_return_year(parse_datetime(birth["date"], birth["time"]),
+                                       parse_datetime(current["date"], current["time"]))
+    errors = {}
+    solar_return = alignment = None
+    try:
+        returns = solar_returns(ctx, lat, lon, dt, t_birth, target_year, target_year, precision, birth_positions)
+    except ValueError as e:
+        errors["solarReturn"] = str(e)
+    else:
+        solar_return = returns[0]["solar_return"]
+        with span("time"):
+            t_return = ctx.ts.from_datetime(datetime.fromisoformat(solar_return.replace('Z', '+00:00')))
+        alignment = perfect_alignment(ctx, lat, lon, t_birth, t_return, birth_positions)
+
+    return {
+        "birthAnalysis": birth_chart.result(),
+        "currentAnalysis": current_chart.result(),
+        "solarReturn": {"year": target_year, "solar_return": solar_return},
+        "perfectAlignment": alignment,
+        "arroyoAnalysis": arroyo.result(),
+        "errors": errors,
+    }
+
+# Time series (/ephemeris/series): Sun alt/az, Moon phase and every body's ecliptic
+# longitude for one place at evenly spaced instants. The range is cut into chunks of
+# SERIES_CHUNK instants, each computed with one engine pass over a Time array and
+# returned as NDJSON lines, so memory depends on the chunk size, not on the range.
+SERIES_CHUNK = int(os.environ.get("SERIES_CHUNK", "1024"))
+# Upper bound on rows per series (a century at hourly steps is ~877k).
+SERIES_MAX_ROWS = int(os.environ.get("SERIES_MAX_ROWS", "1000000"))
+SERIES_STEP_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_step(step):
+    # "30m", "1h", "1d", ... -> seconds
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd])\s*", step or "")
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid step '{step}', expected a number followed by s, m, h or d (e.g. 1h)")
+    return float(match.group(1)) * SERIES_STEP_UNITS[match.group(2)]
+
+def series_plan(lat, lon, start_date, start_time, end_date, end_time, step, precision="full", chunk=SERIES_CHUNK):
+    # Validates a range and cuts it into chunks: returns (start_dt, step_seconds,
+    # [(first row, row count), ...]) for series_chunk. The range is given in civil
+    # time at the place; start_dt is UTC and the steps are elapsed time.
+    check_precision(precision)
+    timezones = load_timezone_index()
+    start_dt = timezones.localize(lat, lon, parse_datetime(start_date, start_time)).utc
+    end_dt = timezones.localize(lat, lon, parse_datetime(end_date, end_time)).utc
+    step_seconds = parse_step(step)
+    if end_dt < start_dt:
+        raise ValueError("The end of the range must not be before its start")
+    rows = int((end_dt - start_dt).total_seconds() // step_seconds) + 1
+    if rows > SERIES_MAX_ROWS:
+        raise ValueError(f"{rows} rows requested, at most {SERIES_MAX_ROWS} per series; use a larger step")
+
+    ctx = get_context()
+    with span("time"):
+        t = ctx.ts.from_datetimes([start_dt.replace(tzinfo=pytz.utc), end_dt.replace(tzinfo=pytz.utc)])
+    if precision == "fast":
+        fast = load_fast_ephemeris()
+        low, high = fast.start_jd, fast.end_jd
+    else:
+        low, high = ctx.engine.start_jd, ctx.engine.end_jd
+    if t.tdb[0] < low + 1 or t.tdb[1] > high - 1:
+        raise ValueError("Range outside the supported ephemeris range")
+    return start_dt, step_seconds, [(first, min(chunk, rows - first)) for first in range(0, rows, chunk)]
+
+def series_chunk(lat, lon, start_dt, step_seconds, first, count, precision="full"):
+    # Rows first..first+count-1 of a series as NDJSON text, one object per line.
+    ctx = get_context()
+    with span("time"):
+        offsets = step_seconds * np.arange(first, first + count)
+        # Whole days plus seconds of the day, so rows keep their clock times
+        # across leap seconds.
+        days, seconds = np.divmod(start_dt.hour * 3600 + start_dt.minute * 60 + start_dt.second + offsets, 86400)
+        t = ctx.ts.utc(start_dt.year, start_dt.month, start_dt.day + days, 0, 0, seconds)
+        stamps = np.datetime_as_string(
+            np.datetime64(start_dt, "ms") + (offsets * 1000).astype("timedelta64[ms]"), unit="s")
+    names = ['Sun'] if precision == "fast" else None
+    positions = ctx.engine.observe(t, lat, lon, names=names)
+    longitudes = chart_longitudes(ctx, t, lat, lon, precision) if precision == "fast" else positions.longitude
+    alt_deg, az_deg = positions.altaz('Sun')
+    phase_deg = moon_phase_degrees(ctx, t, precision)
+
+    with span("serialize"):
+        lines = []
+        for i in range(count):
+            lines.append(json.dumps({
+                "time": stamps[i] + "Z",
+                "sunAltitude": float(alt_deg[i]),
+                "sunAzimuth": float(az_deg[i]),
+                "moonPhaseAngle": float(phase_deg[i]),
+                "moonPhase": moon_phase_name(phase_deg[i]),
+                "longitudes": {name: float(longitudes[b, i]) for b, name in enumerate(BODY_NAMES)},
+            }))
+        return "\n".join(lines) + "\n"
+
+def ephemeris_series(lat, lon, start_date, start_time, end_date, end_time, step, precision="full",
+                     chunk=SERIES_CHUNK):
+    # Generator of NDJSON chunks for a whole range, computed one chunk at a time as
+    # the consumer pulls them. main.py walks the same series_plan but sends each
+    # series_chunk to the chart pool.
+    start_dt, step_seconds, chunks = series_plan(lat, lon, start_date, start_time, end_date, end_time, step, precision,
+                                                 chunk)
+    for first, count in chunks:
+        yield series_chunk(lat, lon, start_dt, step_seconds, first, count, precision)
+
+def zodiac_ingresses(date_str, time_str, bodies=None, count=3):
+    # Current sign of each body with its ingress/egress, and the next `count`
+    # ingresses (sign entered, direct or retrograde), all from the ingress index.
+    # The index is geocentric and there is no place, so date_str/time_str are UTC.
+    index = load_ingress_index()
+    bodies = list(bodies or BODY_NAMES)
+    unknown = [name for name in bodies if name not in BODY_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown bodies: {', '.join(unknown)}")
+    ctx = get_context()
+    with span("time"):
+        t = ctx.ts.from_datetime(parse_datetime(date_str, time_str).replace(tzinfo=pytz.utc))
+    tt = float(t.tt)
+    if not index.covers(tt):
+        raise ValueError("Date outside the ingress index range")
+    directions = {1: "direct", -1: "retrograde", None: None}
+    result = {}
+    for name in bodies:
+        sign, ingress, egress, direction = index.interval(name, tt)
+        times, signs, moves = index.upcoming(name, tt, count)
+        ingress_iso, egress_iso, *upcoming_iso = tt_to_iso(ctx, [ingress, egress] + [float(v) for v in times])
+        result[name] = {
+            "zodiacSign": ZODIAC_SIGNS[sign],
+            "signIngress": ingress_iso,
+            "signEgress": egress_iso,
+            "ingressDirection": directions[direction],
+            "upcoming": [{"time": iso, "zodiacSign": ZODIAC_SIGNS[int(s)], "direction": directions[int(m)]}
+                         for iso, s, m in zip(upcoming_iso, signs, moves)],
+        }
+    return {"time": t.utc_iso(), "bodies": result}
+
+# Upper bound on days per /solar-calendar request
+SOLAR_CALENDAR_MAX_DAYS = int(os.environ.get("SOLAR_CALENDAR_MAX_DAYS", "36600"))
+
+def calculate_solar_calendar(city, country, start_date, end_date, state=None, location=None):
+    # Solar noon, sunrise, sunset, day length, equation of time and declination for
+    # every local date from start_date to end_date, column-oriented, in one pass
+    # over the solar table. Times are UTC, with the place's zone alongside;
+    # sunrise/sunset are None on days without them (polar day has dayLengthHours
+    # 24, polar night 0).
+    lat, lon = location or get_lat_lon(city, country, state)
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    count = (end - start).days + 1
+    if count > SOLAR_CALENDAR_MAX_DAYS:
+        raise ValueError(f"At most {SOLAR_CALENDAR_MAX_DAYS} days per request")
+    table = load_solar_table()
+    day_jd = julian_date(start) + np.arange(count)
+    if not table.covers([day_jd[0] - 1.0, day_jd[-1] + 2.0]):
+        raise ValueError("Dates outside the solar table range")
+    days = table.days(lat, lon, day_jd)
+    with span("serialize"):
+        dates = np.datetime_as_string(np.datetime64(start.date()) + np.arange(count), unit='D')
+        day_length = days["day_length"]
+        return {
+            "coordinates": {"latitude": lat, "longitude": lon},
+            "timezone": load_timezone_index().zone_name(lat, lon),
+            "count": count,
+            "date": dates.tolist(),
+            "solarNoon": iso_utc(days["noon"]),
+            "sunrise": iso_utc(days["sunrise"]),
+            "sunset": iso_utc(days["sunset"]),
+            "dayLengthHours": [None if np.isnan(v) else float(v) for v in day_length],
+            "equationOfTimeMinutes": days["equation_of_time"].astype(float).tolist(),
+            "declination": days["declination"].astype(float).tolist(),
+        }
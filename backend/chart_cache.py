@@ -0,0 +1,88 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+# In-process memo for chart results.
+# Entries are keyed on quantized inputs: a Quantum snaps coordinates to a grid of
+# `degrees` and times to buckets of `seconds` (None keeps that input exact), so
+# everyone asking for the sky over the same city in the same minute shares one
+# computation. Bounded by entry count (least recently used go first) and by age.
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("CHART_CACHE_MAX_ENTRIES", 4096))
+DEFAULT_TTL_SECONDS = float(os.environ.get("CHART_CACHE_TTL", 3600))
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class Quantum(namedtuple('Quantum', ['degrees', 'seconds'])):
+    def snap(self, lat, lon, dt):
+        # Grid point / bucket start the inputs fall in; the chart is computed there.
+        if self.degrees:
+            lat = round(round(lat / self.degrees) * self.degrees, 9)
+            lon = round(round(lon / self.degrees) * self.degrees, 9)
+        if self.seconds:
+            offset = (dt - EPOCH).total_seconds()
+            dt = EPOCH + timedelta(seconds=math.floor(offset / self.seconds) * self.seconds)
+        return lat, lon, dt
+
+
+EXACT = Quantum(None, None)
+
+
+def parse_quantum(value, default):
+    # "degrees,seconds" from the environment; an empty part means exact.
+    if not value:
+        return default
+    degrees, seconds = (part.strip() for part in value.split(","))
+    return Quantum(float(degrees) if degrees else None, float(seconds) if seconds else None)
+
+
+class ChartCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return value
+                del self._entries[key]
+                self.counters["expired"] += 1
+            self.counters["misses"] += 1
+
+        # Computed outside the lock; two threads missing the same key both compute
+        # and the later one wins, which is harmless for deterministic results.
+        value = compute()
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        return stats
@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend import metrics
+
+# Process pool for chart math.
+# The async handlers resolve places on the event loop and hand the CPU-bound part
+# (calculate_astronomy, calculate_report, ...) to a pool of worker processes, each
+# with its own ephemeris context loaded once by the initializer, so one uvicorn
+# process spreads chart work over every core without the GIL in the way.
+# CHART_POOL_SIZE=0 runs the same calls in the threadpool instead.
+#
+# Every uvicorn worker has its own pool, each process with its own ephemeris,
+# fast-ephemeris and reverse-geocoder copy, so by default the cores are split
+# between the WEB_CONCURRENCY uvicorn workers (the variable uvicorn itself reads
+# for --workers) rather than given to each of them. Set CHART_POOL_SIZE to
+# override; keep workers x CHART_POOL_SIZE near the core count.
+
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+DEFAULT_POOL_SIZE = int(os.environ.get("CHART_POOL_SIZE", max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)))
+
+
+def _init_worker():
+    # Imported here so the parent doesn't pay for it when the pool is disabled.
+    from backend.ephemeris import get_context
+    from backend.fast_ephemeris import load_fast_ephemeris
+    from backend.reverse_geocoder import load_reverse_geocoder
+    from backend.ingresses import load_ingress_index
+    from backend.lunations import load_lunation_table
+    from backend.solar_table import load_solar_table
+    from backend.timezones import load_timezone_index
+    get_context()
+    load_fast_ephemeris()
+    load_reverse_geocoder()
+    load_ingress_index()
+    load_lunation_table()
+    load_solar_table()
+    load_timezone_index()
+
+
+def _call(fn, args):
+    # Runs in a worker. Each worker memoizes charts in its own chart_cache, so its
+    # counters travel back with every result for /api/chart-cache, along with the
+    # stage timings for the request's Server-Timing.
+    from backend.astro_service import chart_cache
+    spans = metrics.start_spans()
+    try:
+        result = fn(*args)
+    except ValueError as e:
+        # The handlers map ValueError to 422. skyfield's EphemerisRangeError holds
+        # on to the kernel and can't be pickled back to the parent, so subclasses
+        # cross as a plain ValueError with the same message.
+        if type(e) is not ValueError:
+            raise ValueError(str(e)) from None
+        raise
+    return result, os.getpid(), chart_cache.stats(), spans.snapshot()
+
+
+def _warm():
+    return os.getpid()
+
+
+class ChartPool:
+    def __init__(self, size=DEFAULT_POOL_SIZE):
+        self.size = size
+        self._executor = None
+        self.worker_stats = {}
+        self.startup_seconds = None
+
+    def start(self):
+        # Spawned rather than forked: the parent has threads and an event loop by now.
+        if self.size > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+    async def warm_up(self):
+        # One task per worker: the executor starts a process for each while none is
+        # idle, so every worker has run its initializer before we report ready.
+        self.start()
+        if self._executor is None:
+            return
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _warm) for _ in range(self.size)))
+        self.startup_seconds = time.perf_counter() - start
+
+    async def run(self, fn, *args):
+        if self.size <= 0:
+            return await run_in_threadpool(fn, *args)
+        self.start()
+        loop = asyncio.get_running_loop()
+        with metrics.span("pool"):
+            result, pid, cache_stats, stages = await loop.run_in_executor(self._executor, _call, fn, args)
+        self.worker_stats[pid] = cache_stats
+        spans = metrics.current_spans()
+        if spans is not None:
+            spans.merge(stages)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        return {"size": self.size, "startup_seconds": self.startup_seconds, "workers": len(self.worker_stats)}
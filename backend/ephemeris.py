@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+
+from skyfield.api import Loader, load, wgs84
+
+from backend.positions import PositionEngine
+
+logger = logging.getLogger(__name__)
+
+# Process-wide ephemeris context.
+# Holds the timescale, the DE421 kernel and prebuilt handles for every body the
+# charts use, so requests never reload or rebuild them. main.py initializes it in
+# the FastAPI lifespan hook; anything else (scripts, tests) gets it lazily from
+# get_context().
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BACKEND_DIR)
+EPHEMERIS_FILE = 'de421.bsp'
+# Kernel excerpted to the chart bodies and years by scripts/build_ephemeris.py.
+TRIMMED_EPHEMERIS_PATH = os.path.join(BACKEND_DIR, 'data', 'ephemeris.bsp')
+
+# Display name -> kernel target, in chart order.
+BODIES = [
+    ('Sun', 'sun'),
+    ('Moon', 'moon'),
+    ('Mercury', 'mercury'),
+    ('Venus', 'venus'),
+    ('Mars', 'mars'),
+    ('Jupiter', 'jupiter_barycenter'),
+    ('Saturn', 'saturn_barycenter'),
+    ('Uranus', 'uranus_barycenter'),
+    ('Neptune', 'neptune_barycenter'),
+    ('Pluto', 'pluto_barycenter'),
+]
+BODY_NAMES = [name for name, _ in BODIES]
+PLANET_NAMES = BODY_NAMES[2:]
+
+
+def find_ephemeris_path():
+    # EPHEMERIS_PATH wins; otherwise the trimmed kernel if one was built, then the
+    # repo root (Docker/Cloud Run layout), then backend/.
+    candidates = [
+        os.environ.get('EPHEMERIS_PATH'),
+        TRIMMED_EPHEMERIS_PATH,
+        os.path.join(BASE_DIR, EPHEMERIS_FILE),
+        os.path.join(BACKEND_DIR, EPHEMERIS_FILE),
+    ]
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def engine_block_path(kernel_path):
+    # PositionEngine's coefficient block for a kernel, written next to it by
+    # scripts/build_ephemeris.py.
+    return os.path.splitext(kernel_path)[0] + '.engine.npy'
+
+
+class EphemerisContext:
+    def __init__(self, path=None, mmap_engine=True):
+        timings = {}
+
+        start = time.perf_counter()
+        self.ts = load.timescale()
+        timings['timescale'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.path = path or find_ephemeris_path()
+        if self.path:
+            self.eph = load(self.path)
+        else:
+            # Nothing bundled: let skyfield download the kernel once into the working directory.
+            logger.warning("%s not found locally, downloading it...", EPHEMERIS_FILE)
+            self.eph = Loader('.')(EPHEMERIS_FILE)
+            self.path = os.path.abspath(EPHEMERIS_FILE)
+        timings['ephemeris'] = time.perf_counter() - start
+
+        self.bodies = {name: self.eph[target] for name, target in BODIES}
+        self.sun = self.bodies['Sun']
+        self.moon = self.bodies['Moon']
+        self.earth = self.eph['earth']
+        self.planets = {name: self.bodies[name] for name in PLANET_NAMES}
+
+        start = time.perf_counter()
+        block_path = engine_block_path(self.path) if mmap_engine else None
+        self.engine = PositionEngine(self.eph, self.bodies, block_path=block_path)
+        timings['engine'] = time.perf_counter() - start
+
+        # Touch every segment once so the first request doesn't pay for
+        # reading the kernel's coefficient arrays.
+        start = time.perf_counter()
+        t = self.ts.J2000
+        earth_at = self.earth.at(t)
+        for body in self.bodies.values():
+            earth_at.observe(body).apparent()
+        self.engine.observe(t, 0.0, 0.0)
+        timings['warmup'] = time.perf_counter() - start
+
+        self.timings = timings
+        self.startup_seconds = sum(timings.values())
+        mapped = f", engine block mapped from {self.engine.block_path}" if self.engine.block_path else ""
+        logger.info("Ephemeris context ready in %.3fs (%s%s)", self.startup_seconds, self.path, mapped)
+
+        # Observer vector sums (earth + topos) are rebuilt for every chart otherwise;
+        # charts for the same place share one.
+        self.observer = lru_cache(maxsize=1024)(self._observer)
+
+    def _observer(self, lat, lon):
+        return self.earth + wgs84.latlon(lat, lon)
+
+
+_context = None
+_context_lock = threading.Lock()
+
+
+def get_context():
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = EphemerisContext()
+    return _context
+
+
+def is_ready():
+    return _context is not None
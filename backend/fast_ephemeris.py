@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from backend.world_cities import DATA_DIR
+from backend.metrics import timed
+
+# Precomputed "fast" ephemeris.
+# Piecewise Chebyshev fits of the apparent geocentric ecliptic (J2000) longitude
+# and latitude of the ten chart bodies, built by scripts/build_fast_ephemeris.py
+# from the full engine in backend/positions.py. Evaluating a chart is one gather
+# and one short polynomial per body instead of light-time iteration, deflection
+# and aberration.
+#
+# fast_ephemeris.npy   float64 (records, 2, coefficients): per-record Chebyshev
+#                      coefficients for [unwrapped longitude, latitude] in degrees,
+#                      bodies stored one after another; memory-mapped at load.
+# fast_ephemeris.json  per-body record offset/count/interval, the covered span and
+#                      the maximum error measured against the full engine.
+#
+# Positions are geocentric: the Moon's topocentric parallax (up to about 1 degree)
+# is not applied, the other bodies move by at most a few arcseconds.
+
+FAST_EPHEMERIS_PATH = os.path.join(DATA_DIR, 'fast_ephemeris.npy')
+FAST_EPHEMERIS_META_PATH = os.path.join(DATA_DIR, 'fast_ephemeris.json')
+
+
+class FastEphemeris:
+    def __init__(self, path=FAST_EPHEMERIS_PATH, meta_path=FAST_EPHEMERIS_META_PATH):
+        with open(meta_path, encoding='utf-8') as f:
+            self.meta = json.load(f)
+        # Plain ndarray view of the memory map: same pages, cheaper indexing.
+        self.coefficients = np.load(path, mmap_mode='r').view(np.ndarray)
+        self.names = [body["name"] for body in self.meta["bodies"]]
+        self.start_jd = self.meta["start_jd"]
+        self.end_jd = self.meta["end_jd"]
+        self.max_error_arcsec = {body["name"]: body.get("max_error_arcsec") for body in self.meta["bodies"]}
+        self.width = self.coefficients.shape[2]
+        self._orders = np.arange(self.width)
+
+        self._offset = np.array([body["offset"] for body in self.meta["bodies"]])
+        self._records = np.array([body["records"] for body in self.meta["bodies"]])
+        self._interval = np.array([float(body["interval_days"]) for body in self.meta["bodies"]])
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    @timed("observe")
+    def observe(self, tt, names=None):
+        # Ecliptic (longitude, latitude) in degrees, each shaped (bodies,) for a
+        # scalar TT Julian date or (bodies, times) for an array of them.
+        bodies = np.array([self._index[name] for name in names]) if names else np.arange(len(self.names))
+        tt = np.asarray(tt, dtype=float)
+        scalar = tt.ndim == 0
+        tt = np.atleast_1d(tt)
+        if tt.min() < self.start_jd or tt.max() > self.end_jd:
+            raise ValueError(f"Date outside the fast ephemeris span (JD {self.start_jd:.1f} to {self.end_jd:.1f})")
+
+        position = (tt[None, :] - self.start_jd) / self._interval[bodies, None]
+        record = np.minimum(position.astype(np.int64), self._records[bodies, None] - 1)
+        s = 2.0 * (position - record) - 1.0
+        coefficients = self.coefficients[self._offset[bodies, None] + record]
+
+        # T_k(s) = cos(k * arccos(s)) on [-1, 1]: the whole basis in one call.
+        basis = np.cos(np.arccos(np.clip(s, -1.0, 1.0))[..., None] * self._orders)
+        values = np.einsum('btqc,btc->qbt', coefficients, basis)
+
+        longitude = values[0] % 360.0
+        latitude = values[1]
+        if scalar:
+            return longitude[:, 0], latitude[:, 0]
+        return longitude, latitude
+
+
+_fast_ephemeris = None
+_fast_ephemeris_lock = threading.Lock()
+
+
+def load_fast_ephemeris():
+    global _fast_ephemeris
+    if _fast_ephemeris is None:
+        with _fast_ephemeris_lock:
+            if _fast_ephemeris is None:
+                if not os.path.exists(FAST_EPHEMERIS_PATH):
+                    raise ValueError("Fast ephemeris data not built (run scripts/build_fast_ephemeris.py)")
+                _fast_ephemeris = FastEphemeris()
+    return _fast_ephemeris
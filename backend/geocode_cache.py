@@ -0,0 +1,162 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from backend.world_cities import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Shared on-disk geocode cache.
+# All uvicorn workers open the same SQLite file (WAL mode), so a city resolved by
+# one worker is immediately available to the others and survives restarts.
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "geoastro_geocode_cache.sqlite3")
+)
+DEFAULT_TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+DEFAULT_NEGATIVE_TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_NEGATIVE_TTL", 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("GEOCODE_CACHE_MAX_ENTRIES", 100000))
+
+# Only rewrite the access timestamp of a hot entry once in a while, so cache hits
+# from several workers don't turn into a stream of writes on the same rows.
+ACCESS_TOUCH_INTERVAL = 3600
+# Run the expiry/size sweep every N writes instead of on every write, so the table
+# can briefly hold up to max_entries + SWEEP_EVERY rows.
+SWEEP_EVERY = 100
+
+
+def make_key(city, state, country):
+    return "|".join(normalize_name(v) for v in (city, state, country))
+
+
+class GeocodeCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writes = 0
+        self.counters = {
+            "hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "stores": 0,
+            "negative_stores": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    def _connection(self):
+        # Connections must not be shared across fork(), so reopen per process.
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " key TEXT PRIMARY KEY,"
+                " lat REAL,"
+                " lon REAL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS geocode_accessed ON geocode (accessed)")
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        # Returns (found, coords). coords is None for a cached negative result.
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT lat, lon, created, accessed FROM geocode WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.counters["misses"] += 1
+                    return False, None
+
+                lat, lon, created, accessed = row
+                ttl = self.ttl if lat is not None else self.negative_ttl
+                if now - created > ttl:
+                    conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+                    self.counters["expired"] += 1
+                    self.counters["misses"] += 1
+                    return False, None
+
+                if now - accessed > ACCESS_TOUCH_INTERVAL:
+                    conn.execute("UPDATE geocode SET accessed = ? WHERE key = ?", (now, key))
+
+                if lat is None:
+                    self.counters["negative_hits"] += 1
+                    return True, None
+                self.counters["hits"] += 1
+                return True, (lat, lon)
+        except sqlite3.Error as e:
+            self.counters["errors"] += 1
+            logger.warning("Geocode cache read error: %s", e)
+            return False, None
+
+    def put(self, key, coords):
+        # coords=None records that the query could not be resolved.
+        now = time.time()
+        lat, lon = coords if coords else (None, None)
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocode (key, lat, lon, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, lat, lon, now, now)
+                )
+                self.counters["stores" if coords else "negative_stores"] += 1
+                self._writes += 1
+                if self._writes % SWEEP_EVERY == 0:
+                    self._sweep(conn, now)
+        except sqlite3.Error as e:
+            self.counters["errors"] += 1
+            logger.warning("Geocode cache write error: %s", e)
+
+    def _sweep(self, conn, now):
+        cur = conn.execute(
+            "DELETE FROM geocode WHERE (lat IS NOT NULL AND created < ?) OR (lat IS NULL AND created < ?)",
+            (now - self.ttl, now - self.negative_ttl)
+        )
+        self.counters["expired"] += max(cur.rowcount, 0)
+
+        count = conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            # Least recently accessed entries go first.
+            cur = conn.execute(
+                "DELETE FROM geocode WHERE key IN (SELECT key FROM geocode ORDER BY accessed ASC LIMIT ?)",
+                (excess,)
+            )
+            self.counters["evictions"] += max(cur.rowcount, 0)
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM geocode")
+
+    def stats(self):
+        stats = dict(self.counters)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["negative_hits"]) / lookups if lookups else 0.0
+        try:
+            with self._lock:
+                stats["entries"] = self._connection().execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        except sqlite3.Error:
+            stats["entries"] = None
+        stats["path"] = self.path
+        stats["max_entries"] = self.max_entries
+        return stats
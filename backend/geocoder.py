@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from backend.geocode_cache import DEFAULT_CACHE_PATH
+from backend.world_cities import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Async Nominatim client.
+# One pooled keep-alive HTTP client per worker, identical in-flight queries
+# coalesced into a single request, and every request (async or the sync geopy
+# path) paced by a token bucket kept in SQLite so all workers on the host share
+# Nominatim's 1 request/second budget. NOMINATIM_URL points it at a local stub.
+
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+USER_AGENT = "geoastro_compute_backend_v2"
+REQUEST_TIMEOUT = float(os.environ.get("NOMINATIM_TIMEOUT", 10))
+MAX_CONNECTIONS = int(os.environ.get("NOMINATIM_MAX_CONNECTIONS", 10))
+
+RATE_LIMIT_PATH = os.environ.get("NOMINATIM_RATE_PATH", DEFAULT_CACHE_PATH)
+RATE_PER_SECOND = float(os.environ.get("NOMINATIM_RATE", 1.0))
+RATE_BURST = float(os.environ.get("NOMINATIM_BURST", 1.0))
+# Give up instead of queueing behind more than this many seconds of other requests.
+RATE_MAX_WAIT = float(os.environ.get("NOMINATIM_MAX_WAIT", 15.0))
+
+
+class RateLimitExceeded(Exception):
+    # The shared queue for Nominatim is longer than RATE_MAX_WAIT.
+    pass
+
+
+class TokenBucket:
+    # Token bucket whose state lives in one SQLite row, updated in an immediate
+    # transaction, so every process using the same file draws from one budget.
+    # A reservation may drive the balance negative: the caller then waits until
+    # its token would have been refilled, which queues requests rate-spaced.
+
+    def __init__(self, name="nominatim", path=RATE_LIMIT_PATH, rate=RATE_PER_SECOND, burst=RATE_BURST,
+                 max_wait=RATE_MAX_WAIT):
+        self.name = name
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        # Fallback state if the SQLite file can't be used (then the limit is per process).
+        self._local = (burst, time.time())
+
+    def _connection(self):
+        # Connections must not be shared across fork(), so reopen per process.
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                " name TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _take(self, tokens, updated, now):
+        # Returns (new balance, seconds to wait), or None if the wait is too long.
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+        wait = max(0.0, -tokens / self.rate)
+        if wait > self.max_wait:
+            return None
+        return tokens, wait
+
+    def reserve(self):
+        # Claims one token; returns how long to wait before using it.
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute(
+                        "SELECT tokens, updated FROM rate_limit WHERE name = ?", (self.name,)
+                    ).fetchone()
+                    taken = self._take(*(row or (self.burst, now)), now)
+                    if taken is not None:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO rate_limit (name, tokens, updated) VALUES (?, ?, ?)",
+                            (self.name, taken[0], now)
+                        )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                logger.warning("Rate limiter error, limiting per process: %s", e)
+                taken = self._take(*self._local, now)
+                if taken is not None:
+                    self._local = (taken[0], now)
+        if taken is None:
+            raise RateLimitExceeded(f"Nominatim queue is longer than {self.max_wait:.0f}s")
+        return taken[1]
+
+    def wait(self):
+        time.sleep(self.reserve())
+
+    async def wait_async(self):
+        # reserve() may block on the SQLite lock (up to its 5 s timeout) while other
+        # workers hold it, so it runs off the event loop.
+        await asyncio.sleep(await asyncio.to_thread(self.reserve))
+
+
+nominatim_limiter = TokenBucket()
+
+
+class AsyncNominatim:
+    def __init__(self, base_url=NOMINATIM_URL, limiter=nominatim_limiter, timeout=REQUEST_TIMEOUT,
+                 max_connections=MAX_CONNECTIONS):
+        self.base_url = base_url.rstrip("/")
+        self.limiter = limiter
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._loop = None
+        self._inflight = {}
+        self.counters = {"requests": 0, "coalesced": 0, "errors": 0}
+
+    def _http(self):
+        # The client and the in-flight table belong to the running event loop
+        # (one per uvicorn worker); a new loop gets fresh ones.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"User-Agent": USER_AGENT},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._loop = loop
+            self._inflight = {}
+        return self._client
+
+    async def geocode(self, query):
+        # (lat, lon) for the best match, or None if Nominatim has no match.
+        # Raises on timeouts, HTTP errors and RateLimitExceeded.
+        self._http()
+        key = normalize_name(query)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._geocode(query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.counters["coalesced"] += 1
+        # Shielded so one caller giving up doesn't cancel the lookup for the others.
+        return await asyncio.shield(task)
+
+    async def _geocode(self, query):
+        await self.limiter.wait_async()
+        self.counters["requests"] += 1
+        try:
+            response = await self._http().get("/search", params={"q": query, "format": "json", "limit": 1})
+            response.raise_for_status()
+            results = response.json()
+        except Exception:
+            self.counters["errors"] += 1
+            raise
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats["in_flight"] = len(self._inflight)
+        stats["base_url"] = self.base_url
+        return stats
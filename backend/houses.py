@@ -0,0 +1,180 @@
+import numpy as np
+from skyfield.nutationlib import iau2000b_radians
+
+# House engine.
+# Ascendant, Midheaven and the twelve house cusps for arrays of charts at once:
+# every input is an array (or broadcasts to one), so N births at N places are a
+# handful of NumPy expressions, with no per-chart Python loop.
+#
+# Everything is in the ecliptic and equinox of date: the local apparent sidereal
+# time (skyfield's GAST plus east longitude) fixes the right ascension of the
+# meridian (RAMC), and the true obliquity (mean obliquity plus nutation in
+# obliquity) ties the equator to the ecliptic. For arrays of charts the inputs
+# come from skyfield HOUSE_CHUNK instants at a time with the IAU 2000B nutation
+# series (77 terms, within a few milliarcseconds of the full IAU 2000A one and
+# about 30 times faster); a single chart uses whatever its Time already has.
+#
+# Placidus and Koch divide semi-arcs that stop existing inside the polar circles
+# (the Midheaven or a cusp never rises or sets); those charts fall back to
+# Porphyry and are flagged in `fallback`.
+
+HOUSE_SYSTEMS = ("placidus", "koch", "regiomontanus", "campanus", "porphyry", "equal", "whole_sign")
+SEMI_ARC_SYSTEMS = ("placidus", "koch")
+HOUSE_CHUNK = 8192
+PLACIDUS_TOLERANCE_DEG = 1e-9
+PLACIDUS_MAX_ITERATIONS = 50
+
+
+def check_house_system(system):
+    if system not in HOUSE_SYSTEMS:
+        raise ValueError(f"Unknown house system {system!r} (expected one of {', '.join(HOUSE_SYSTEMS)})")
+
+
+def _oblique_point(oblique_ascension, pole, eps):
+    # Ecliptic longitude (degrees) of the point with the given oblique ascension
+    # under a pole of the given height: the eastern intersection of the ecliptic
+    # with a house circle. pole = 0 gives the point with that right ascension,
+    # pole = latitude and oblique ascension RAMC + 90 the Ascendant.
+    oa = np.radians(oblique_ascension)
+    return np.degrees(np.arctan2(np.sin(oa), np.cos(oa) * np.cos(eps) - np.tan(np.radians(pole)) * np.sin(eps))) % 360.0
+
+
+def _ascensional_difference(lat, longitude, eps):
+    # asin(tan(latitude) tan(declination)) of ecliptic points, NaN where they are
+    # circumpolar (no rising or setting).
+    declination = np.arcsin(np.sin(eps) * np.sin(np.radians(longitude)))
+    x = np.tan(np.radians(lat)) * np.tan(declination)
+    with np.errstate(invalid='ignore'):
+        return np.degrees(np.where(np.abs(x) <= 1.0, np.arcsin(np.clip(x, -1.0, 1.0)), np.nan))
+
+
+def _porphyry(asc, mc):
+    quadrant = (asc - mc) % 360.0
+    lower = 180.0 - quadrant
+    return [mc + quadrant / 3.0, mc + 2.0 * quadrant / 3.0, asc + lower / 3.0, asc + 2.0 * lower / 3.0]
+
+
+def _placidus(ramc, lat, mc, eps):
+    # Cusps 11 and 12 trisect the diurnal semi-arc above the eastern horizon,
+    # cusps 2 and 3 the nocturnal one below it: each cusp is the ecliptic point
+    # whose right ascension sits that fraction of its own semi-arc from the
+    # meridian, found by fixed-point iteration from the Porphyry cusps.
+    # Only the charts still moving are iterated; most settle in a few steps, those
+    # near the polar circles take tens.
+    cusps = []
+    start = _porphyry(_oblique_point(ramc + 90.0, lat, eps), mc)
+    for guess, (anchor, fraction, sign) in zip(start, ((0.0, 1.0 / 3.0, 1.0), (0.0, 2.0 / 3.0, 1.0),
+                                                       (180.0, 2.0 / 3.0, -1.0), (180.0, 1.0 / 3.0, -1.0))):
+        longitude = guess % 360.0
+        active = np.arange(longitude.size)
+        for _ in range(PLACIDUS_MAX_ITERATIONS):
+            ad = _ascensional_difference(lat[active], longitude[active], eps[active])
+            semi_arc = 90.0 + ad if anchor == 0.0 else 90.0 - ad
+            updated = _oblique_point(ramc[active] + anchor + sign * fraction * semi_arc, 0.0, eps[active])
+            step = np.abs((updated - longitude[active] + 180.0) % 360.0 - 180.0)
+            longitude[active] = updated
+            # NaN (circumpolar) rows drop out too.
+            active = active[step > PLACIDUS_TOLERANCE_DEG]
+            if not active.size:
+                break
+        cusps.append(longitude)
+    return cusps
+
+
+def _koch(ramc, lat, mc, eps):
+    # The Ascendants at the sidereal times that trisect the Midheaven's own
+    # diurnal (cusps 11, 12) and nocturnal (cusps 2, 3) semi-arcs.
+    ad3 = _ascensional_difference(lat, mc, eps) / 3.0
+    return [_oblique_point(ramc + 30.0 - 2.0 * ad3, lat, eps), _oblique_point(ramc + 60.0 - ad3, lat, eps),
+            _oblique_point(ramc + 120.0 + ad3, lat, eps), _oblique_point(ramc + 150.0 + 2.0 * ad3, lat, eps)]
+
+
+def _regiomontanus(ramc, lat, eps):
+    # Equal divisions of the celestial equator, projected through house circles
+    # whose poles rise with the offset from the meridian.
+    tan_lat = np.tan(np.radians(lat))
+    pole_30 = np.degrees(np.arctan(tan_lat * 0.5))
+    pole_60 = np.degrees(np.arctan(tan_lat * np.sqrt(3.0) / 2.0))
+    return [_oblique_point(ramc + 30.0, pole_30, eps), _oblique_point(ramc + 60.0, pole_60, eps),
+            _oblique_point(ramc + 120.0, pole_60, eps), _oblique_point(ramc + 150.0, pole_30, eps)]
+
+
+def _campanus(ramc, lat, eps):
+    # Equal divisions of the prime vertical.
+    phi = np.radians(lat)
+    pole_30 = np.degrees(np.arcsin(np.sin(phi) * 0.5))
+    pole_60 = np.degrees(np.arcsin(np.sin(phi) * np.sqrt(3.0) / 2.0))
+    offset_30 = np.degrees(np.arctan(np.sqrt(3.0) / np.cos(phi)))
+    offset_60 = np.degrees(np.arctan(1.0 / np.sqrt(3.0) / np.cos(phi)))
+    return [_oblique_point(ramc + 90.0 - offset_30, pole_30, eps), _oblique_point(ramc + 90.0 - offset_60, pole_60, eps),
+            _oblique_point(ramc + 90.0 + offset_60, pole_60, eps), _oblique_point(ramc + 90.0 + offset_30, pole_30, eps)]
+
+
+def house_cusps(ramc, lat, obliquity, system="placidus"):
+    # Houses from RAMC (degrees), geographic latitude (degrees) and true obliquity
+    # (degrees), all arrays or scalars that broadcast together. Returns a dict:
+    #   ascendant, midheaven  (n,) ecliptic longitudes of date, degrees
+    #   cusps                 (n, 12) cusps 1-12 (cusp 1 = Ascendant, 10 = Midheaven but
+    #                         for equal and whole-sign houses)
+    #   fallback              (n,) bool, Placidus/Koch undefined there, Porphyry used
+    check_house_system(system)
+    ramc, lat, obliquity = (np.atleast_1d(np.asarray(v, dtype=float)) for v in (ramc, lat, obliquity))
+    ramc, lat, obliquity = np.broadcast_arrays(ramc % 360.0, lat, obliquity)
+    eps = np.radians(obliquity)
+
+    mc = _oblique_point(ramc, 0.0, eps)
+    asc = _oblique_point(ramc + 90.0, lat, eps)
+    fallback = np.zeros(ramc.shape, dtype=bool)
+    if system == "equal":
+        intermediate = [asc + 300.0, asc + 330.0, asc + 30.0, asc + 60.0]
+    elif system == "whole_sign":
+        first = asc // 30.0 * 30.0
+        intermediate = [first + 300.0, first + 330.0, first + 30.0, first + 60.0]
+    elif system == "regiomontanus":
+        intermediate = _regiomontanus(ramc, lat, eps)
+    elif system == "campanus":
+        intermediate = _campanus(ramc, lat, eps)
+    else:
+        intermediate = _porphyry(asc, mc)
+        if system in SEMI_ARC_SYSTEMS:
+            semi_arc = _placidus(ramc, lat, mc, eps) if system == "placidus" else _koch(ramc, lat, mc, eps)
+            fallback = np.isnan(np.stack(semi_arc)).any(axis=0)
+            intermediate = [np.where(fallback, porphyry, cusp) for porphyry, cusp in zip(intermediate, semi_arc)]
+
+    c11, c12, c2, c3 = intermediate
+    if system == "whole_sign":
+        first_six = [first, c2, c3, first + 90.0, first + 120.0, first + 150.0]
+    elif system == "equal":
+        # Cusp 10 is the Ascendant + 270, not the Midheaven.
+        first_six = [asc, c2, c3, asc + 90.0, c11 + 180.0, c12 + 180.0]
+    else:
+        first_six = [asc, c2, c3, mc + 180.0, c11 + 180.0, c12 + 180.0]
+    cusps = np.stack(first_six + [c + 180.0 for c in first_six], axis=-1) % 360.0
+    return {"ascendant": asc, "midheaven": mc, "cusps": cusps, "fallback": fallback}
+
+
+def sidereal_inputs(t, lon):
+    # (RAMC, true obliquity), in degrees, for a skyfield Time array and east longitudes.
+    dpsi, deps = t._nutation_angles_radians
+    obliquity = np.degrees(t._mean_obliquity_radians + deps)
+    return (t.gast * 15.0 + np.asarray(lon, dtype=float)) % 360.0, obliquity
+
+
+def chart_houses(t, lat, lon, system="placidus", chunk=HOUSE_CHUNK):
+    # house_cusps() for charts at skyfield Time `t` (scalar or array) and
+    # latitudes/longitudes that broadcast with it, evaluated HOUSE_CHUNK at a time.
+    check_house_system(system)
+    n = 1 if t.shape == () else len(t)
+    lat = np.broadcast_to(np.asarray(lat, dtype=float), (n,))
+    lon = np.broadcast_to(np.asarray(lon, dtype=float), (n,))
+    if t.shape == ():
+        ramc, obliquity = sidereal_inputs(t, lon)
+        return house_cusps(ramc, lat, obliquity, system)
+    parts = []
+    for i in range(0, n, chunk):
+        part = t[i:i + chunk]
+        if '_nutation_angles_radians' not in part.__dict__:
+            part._nutation_angles_radians = iau2000b_radians(part)
+        ramc, obliquity = sidereal_inputs(part, lon[i:i + chunk])
+        parts.append(house_cusps(ramc, lat[i:i + chunk], obliquity, system))
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
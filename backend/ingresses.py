@@ -0,0 +1,85 @@
+import os
+import threading
+
+import numpy as np
+
+from backend.world_cities import DATA_DIR
+
+# Zodiac ingress index.
+# Every instant a chart body's apparent geocentric ecliptic (J2000) longitude
+# crosses a multiple of 30 degrees, found once by scripts/build_ingresses.py,
+# including the back-and-forth crossings around retrograde stations. Sign
+# intervals are then a binary search away, with no ephemeris evaluation.
+#
+# zodiac_ingresses.npz
+#   tt         float64, TT Julian dates, sorted within each body
+#   sign       int8, sign entered (0 = Aries)
+#   direction  int8, +1 entered moving direct, -1 entered moving retrograde
+#   offsets    int64 (bodies + 1), body b owns entries offsets[b]:offsets[b + 1]
+#   initial    int8 (bodies), sign at the start of the span
+#   names      body names, in BODY_NAMES order
+#   span       [start, end] TT Julian dates searched
+#
+# The index is geocentric: the Moon's topocentric parallax can move its chart
+# longitude across a boundary up to about two hours before or after the
+# geocentric ingress; for the other bodies the difference is seconds.
+
+INGRESSES_PATH = os.path.join(DATA_DIR, 'zodiac_ingresses.npz')
+
+
+class IngressIndex:
+    def __init__(self, path=INGRESSES_PATH):
+        with np.load(path) as data:
+            self.tt = data['tt']
+            self.sign = data['sign']
+            self.direction = data['direction']
+            self.offsets = data['offsets']
+            self.initial = data['initial']
+            self.names = [str(name) for name in data['names']]
+            self.start_jd, self.end_jd = (float(v) for v in data['span'])
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    def _entries(self, name):
+        b = self._index[name]
+        start, end = self.offsets[b], self.offsets[b + 1]
+        return b, start, self.tt[start:end]
+
+    def interval(self, name, tt):
+        # The sign `name` is in at TT Julian date `tt`, as (sign index, ingress,
+        # egress, direction it was entered in): TT Julian dates and +1/-1, None
+        # where the ingress or egress lies outside the indexed span.
+        b, start, times = self._entries(name)
+        i = int(np.searchsorted(times, tt, side='right')) - 1
+        egress = float(times[i + 1]) if i + 1 < len(times) else None
+        if i < 0:
+            return int(self.initial[b]), None, egress, None
+        return int(self.sign[start + i]), float(times[i]), egress, int(self.direction[start + i])
+
+    def intervals(self, tt):
+        # interval() for every body at one instant, as {name: (sign, ingress, egress, direction)}.
+        return {name: self.interval(name, tt) for name in self.names}
+
+    def upcoming(self, name, tt, count):
+        # The next `count` ingresses of `name` after `tt` as (tt, sign, direction) arrays.
+        _, start, times = self._entries(name)
+        i = start + int(np.searchsorted(times, tt, side='right'))
+        end = min(i + count, start + len(times))
+        return self.tt[i:end], self.sign[i:end], self.direction[i:end]
+
+    def covers(self, tt):
+        return self.start_jd <= tt <= self.end_jd
+
+
+_ingress_index = None
+_ingress_index_lock = threading.Lock()
+
+
+def load_ingress_index():
+    global _ingress_index
+    if _ingress_index is None:
+        with _ingress_index_lock:
+            if _ingress_index is None:
+                if not os.path.exists(INGRESSES_PATH):
+                    raise ValueError("Ingress index not built (run scripts/build_ingresses.py)")
+                _ingress_index = IngressIndex()
+    return _ingress_index
@@ -0,0 +1,76 @@
+import os
+import threading
+
+import numpy as np
+
+from backend.world_cities import DATA_DIR
+
+# Lunation table.
+# The instants the Moon's phase angle (Moon minus Sun geocentric ecliptic-of-date
+# longitude, as almanac.moon_phase and astro_service.moon_phase_degrees define it)
+# crosses each multiple of 45 degrees, found once by scripts/build_lunations.py.
+# Those are the boundaries of the eight phase names in astro_service.MOON_PHASES;
+# octants 0, 2, 4 and 6 start at the principal phases (new moon, first quarter,
+# full moon, last quarter). Phase name, lunation, age and the surrounding phase
+# instants are binary searches here instead of ephemeris evaluations.
+#
+# lunations.npz
+#   tt              float64, sorted TT Julian dates of the crossings
+#   octant          int8, phase octant entered (0 = New Moon ... 7 = Waning Crescent)
+#   first_lunation  Brown lunation number of the first new moon (1 = 1923-01-17)
+#   span            [start, end] TT Julian dates searched
+
+LUNATIONS_PATH = os.path.join(DATA_DIR, 'lunations.npz')
+
+
+class LunationTable:
+    def __init__(self, path=LUNATIONS_PATH):
+        with np.load(path) as data:
+            self.tt = data['tt']
+            self.octant = data['octant']
+            self.first_lunation = int(data['first_lunation'])
+        principal = self.octant % 2 == 0
+        self.principal_tt = self.tt[principal]
+        self.principal_octant = self.octant[principal]
+        self.new_moons = self.tt[self.octant == 0]
+        self.full_moons = self.tt[self.octant == 4]
+        # Lookups need a new moon on either side.
+        self.start_jd = float(self.new_moons[0])
+        self.end_jd = float(self.new_moons[-1])
+
+    def covers(self, tt):
+        return self.start_jd <= tt < self.end_jd
+
+    def lookup(self, tt):
+        # Everything about the Moon's phase at TT Julian date `tt` (within covers()):
+        # the current octant, the Brown lunation number and age in days since its
+        # new moon, the previous and next principal phases as (tt, octant), and the
+        # next new and full moon.
+        i = int(np.searchsorted(self.tt, tt, side='right')) - 1
+        p = int(np.searchsorted(self.principal_tt, tt, side='right')) - 1
+        n = int(np.searchsorted(self.new_moons, tt, side='right')) - 1
+        f = int(np.searchsorted(self.full_moons, tt, side='right'))
+        return {
+            "octant": int(self.octant[i]),
+            "lunation": self.first_lunation + n,
+            "age_days": float(tt - self.new_moons[n]),
+            "previous": (float(self.principal_tt[p]), int(self.principal_octant[p])),
+            "next": (float(self.principal_tt[p + 1]), int(self.principal_octant[p + 1])),
+            "next_new_moon": float(self.new_moons[n + 1]),
+            "next_full_moon": float(self.full_moons[f]) if f < len(self.full_moons) else None,
+        }
+
+
+_lunation_table = None
+_lunation_table_lock = threading.Lock()
+
+
+def load_lunation_table():
+    global _lunation_table
+    if _lunation_table is None:
+        with _lunation_table_lock:
+            if _lunation_table is None:
+                if not os.path.exists(LUNATIONS_PATH):
+                    raise ValueError("Lunation table not built (run scripts/build_lunations.py)")
+                _lunation_table = LunationTable()
+    return _lunation_table
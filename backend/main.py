@@ -1,14 +1,78 @@
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
+from typing import Annotated, List, Literal, Optional
 import uvicorn
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+import asyncio
+import json
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from backend.world_cities import LocationNotFoundError, GeocoderUnavailableError, load_gazetteer
+from backend.reverse_geocoder import load_reverse_geocoder
+from backend.ingresses import load_ingress_index
+from backend.lunations import load_lunation_table
+from backend.solar_table import load_solar_table
+from backend.timezones import load_timezone_index
+from backend.ephemeris import get_context
+from backend.compute_pool import ChartPool
+from backend import metrics
+from backend import astro_service
+from backend.response_cache import ResponseCache, request_key, etag_matches
 
-app = FastAPI(title="GeoAstro Compute API", version="1.1.012")
+# Backend modules log through `logging`; uvicorn only configures its own loggers.
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+                    format="%(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+chart_pool = ChartPool()
+
+# Filled in by the lifespan hook; /api/ready reports 503 until it is.
+startup = {"ready": False, "timings": {}, "seconds": None, "ephemeris": None}
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the ephemeris, timescale, offline geocoding data and precomputed tables
+    # before taking traffic, so the first request on a fresh instance doesn't pay for it.
+    start = time.perf_counter()
+    ctx = get_context()
+    timings = dict(ctx.timings)
+    startup["ephemeris"] = {"path": ctx.path, "engine_block": ctx.engine.block_path}
+    preload = (
+        ("gazetteer", load_gazetteer),
+        ("reverse_geocoder", load_reverse_geocoder),
+        ("ingress_index", load_ingress_index),
+        ("lunation_table", load_lunation_table),
+        ("solar_table", load_solar_table),
+        ("timezone_index", load_timezone_index),
+    )
+    for name, load in preload:
+        step = time.perf_counter()
+        load()
+        timings[name] = time.perf_counter() - step
+    step = time.perf_counter()
+    await chart_pool.warm_up()
+    timings["chart_pool"] = time.perf_counter() - step
+    startup["timings"] = {name: round(seconds, 4) for name, seconds in timings.items()}
+    startup["seconds"] = round(time.perf_counter() - start, 4)
+    startup["ready"] = True
+    logger.info("Startup complete in %.3fs: %s", startup["seconds"], startup["timings"])
+    yield
+    await astro_service.nominatim.aclose()
+    chart_pool.shutdown()
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content):
+        with metrics.span("serialize"):
+            return super().render(content)
+
+app = FastAPI(title="GeoAstro Compute API", version="1.1.012", lifespan=lifespan,
+              default_response_class=TimedJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -19,6 +83,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def instrument(request, call_next):
+    # Per-request stage spans -> Server-Timing header and the /metrics histograms.
+    spans = metrics.start_spans()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        total = time.perf_counter() - start
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "other"
+        stages = spans.snapshot()
+        metrics.requests_total.inc(endpoint=endpoint, status=status)
+        metrics.request_seconds.observe(total, endpoint=endpoint)
+        for stage, (seconds, _) in stages.items():
+            metrics.stage_seconds.observe(seconds, endpoint=endpoint, stage=stage)
+    response.headers["Server-Timing"] = metrics.server_timing(stages, total)
+    return response
+
 class AstroInput(BaseModel):
     city: str
     state: str
@@ -27,19 +112,104 @@ class AstroInput(BaseModel):
     time: str
     temperature: Optional[str] = None
     useHistoricalTemperature: bool = False
+    precision: Literal["full", "fast"] = "full"
+    # Opt in to the quantized current-sky cache (see astro_service.CURRENT_SKY_QUANTIZATION).
+    approximate: bool = False
+
+
+
+# Handlers that geocode are async: the place is resolved on the event loop through
+# the shared Nominatim client, and only the chart math goes to chart_pool.
 
+response_cache = ResponseCache()
+# Clients and shared caches revalidate every time (a 304 when the ETag still
+# matches), so a redeploy that changes the output is never masked by a stale copy.
+RESPONSE_CACHE_CONTROL = os.environ.get("RESPONSE_CACHE_CONTROL", "private, no-cache")
 
+async def cached_response(request, route, data, compute):
+    # The deterministic endpoints (/analyze for exact charts, /solar-return,
+    # /perfect-alignment, /arroyo-analysis) answer POST with a JSON body and GET
+    # with the same fields as query parameters, the form shareable links and
+    # reloads revalidate. Both go through response_cache: `compute(data)` and the
+    # JSON rendering only run on a miss, and a client holding the current ETag gets
+    # a 304. Errors (raised as HTTPException) are never cached.
+    key = request_key(route, jsonable_encoder(data))
+    entry = response_cache.get(key)
+    cache_status = "hit"
+    if entry is None:
+        result = await compute(data)
+        entry = response_cache.put(key, TimedJSONResponse(jsonable_encoder(result)).body)
+        cache_status = "miss"
+    headers = {"ETag": entry.etag, "Cache-Control": RESPONSE_CACHE_CONTROL, "X-Response-Cache": cache_status}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
 
 @app.post("/analyze")
-def analyze_astro(data: AstroInput):
+async def analyze_astro(data: AstroInput, request: Request):
+    # Quantized current-sky charts go through chart_cache instead.
+    if data.approximate:
+        return await analyze_result(data)
+    return await cached_response(request, "/analyze", data, analyze_result)
+
+@app.get("/analyze")
+async def analyze_astro_link(request: Request, data: Annotated[AstroInput, Query()]):
+    if data.approximate:
+        return await analyze_result(data)
+    return await cached_response(request, "/analyze", data, analyze_result)
+
+async def analyze_result(data):
     try:
-        from backend.astro_service import calculate_astronomy
-        result = calculate_astronomy(data.city, data.country, data.date, data.time, data.state)
+        location = await astro_service.get_lat_lon_async(data.city, data.country, data.state)
+        result = await chart_pool.run(
+            astro_service.calculate_astronomy, data.city, data.country, data.date, data.time, data.state,
+            data.precision, location, astro_service.CURRENT_SKY_QUANTIZATION if data.approximate else None
+        )
         return result
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR processing analysis: {e}")
+        logger.exception("Error processing analysis")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Upper bound on rows per /analyze/batch request
+ANALYZE_BATCH_MAX = int(os.environ.get("ANALYZE_BATCH_MAX", "10000"))
+
+HouseSystem = Literal["placidus", "koch", "regiomontanus", "campanus", "porphyry", "equal", "whole_sign"]
+
+class AstroBatchInput(BaseModel):
+    records: List[AstroInput]
+    house_system: HouseSystem = "placidus"
+
+async def resolve_batch_location(key):
+    # A row's place, or the error that goes into its "error" column.
+    try:
+        return await astro_service.get_lat_lon_async(*key)
+    except (LocationNotFoundError, GeocoderUnavailableError) as e:
+        return e
+
+@app.post("/analyze/batch")
+async def analyze_astro_batch(data: AstroBatchInput):
+    # Each distinct place is geocoded once, concurrently on the event loop; the
+    # vectorized charts go to chart_pool.
+    if not data.records:
+        raise HTTPException(status_code=422, detail="No records given")
+    if len(data.records) > ANALYZE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {ANALYZE_BATCH_MAX} records per batch")
+    try:
+        records = [record.dict() for record in data.records]
+        keys = list(dict.fromkeys(astro_service.batch_location_key(record) for record in records))
+        resolved = await asyncio.gather(*(resolve_batch_location(key) for key in keys))
+        return await chart_pool.run(
+            astro_service.calculate_astronomy_batch, records, data.house_system, dict(zip(keys, resolved))
+        )
+    except Exception as e:
+        logger.exception("Error processing batch analysis")
         raise HTTPException(status_code=500, detail=str(e))
 
 class SolarReturnInput(BaseModel):
@@ -49,14 +219,68 @@ class SolarReturnInput(BaseModel):
     city: str
     country: str
     state: Optional[str] = None
+    precision: Literal["full", "fast"] = "full"
 
 @app.post("/solar-return")
-def solar_return(data: SolarReturnInput):
-    from backend.astro_service import calculate_solar_return
+async def solar_return(data: SolarReturnInput, request: Request):
+    return await cached_response(request, "/solar-return", data, solar_return_result)
+
+@app.get("/solar-return")
+async def solar_return_link(request: Request, data: Annotated[SolarReturnInput, Query()]):
+    return await cached_response(request, "/solar-return", data, solar_return_result)
+
+async def solar_return_result(data):
     try:
-        result = calculate_solar_return(data.birth_date, data.birth_time, data.target_year, data.city, data.country, data.state)
+        location = await astro_service.get_lat_lon_async(data.city, data.country, data.state)
+        result = await chart_pool.run(
+            astro_service.calculate_solar_return, data.birth_date, data.birth_time, data.target_year, data.city,
+            data.country, data.state, data.precision, location
+        )
         return {"solar_return": result}
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        logger.exception("Error processing solar return")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Upper bound on years per /solar-return/range request
+SOLAR_RETURN_MAX_YEARS = 200
+
+class SolarReturnRangeInput(BaseModel):
+    birth_date: str
+    birth_time: str
+    start_year: int
+    end_year: int
+    city: str
+    country: str
+    state: Optional[str] = None
+    precision: Literal["full", "fast"] = "full"
+
+@app.post("/solar-return/range")
+async def solar_return_range(data: SolarReturnRangeInput):
+    if data.end_year < data.start_year:
+        raise HTTPException(status_code=422, detail="end_year must not be before start_year")
+    if data.end_year - data.start_year + 1 > SOLAR_RETURN_MAX_YEARS:
+        raise HTTPException(status_code=422, detail=f"At most {SOLAR_RETURN_MAX_YEARS} years per request")
+    try:
+        location = await astro_service.get_lat_lon_async(data.city, data.country, data.state)
+        result = await chart_pool.run(
+            astro_service.calculate_solar_returns, data.birth_date, data.birth_time, data.start_year, data.end_year,
+            data.city, data.country, data.state, data.precision, location
+        )
+        return {"solar_returns": result}
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.exception("Error processing solar return range")
         raise HTTPException(status_code=500, detail=str(e))
 
 class PerfectAlignmentInput(BaseModel):
@@ -66,21 +290,45 @@ class PerfectAlignmentInput(BaseModel):
     birth_country: str
     birth_state: Optional[str] = None
     solar_return: str
+    # "grid" searches all latitudes too, matching the alt/az of `bodies`, and
+    # returns up to top_k distinct candidates.
+    mode: Literal["longitude", "grid"] = "longitude"
+    bodies: List[str] = ["Sun"]
+    top_k: int = 5
 
 @app.post("/perfect-alignment")
-def perfect_alignment(data: PerfectAlignmentInput):
-    from backend.astro_service import calculate_perfect_alignment
+async def perfect_alignment(data: PerfectAlignmentInput, request: Request):
+    return await cached_response(request, "/perfect-alignment", data, perfect_alignment_result)
+
+@app.get("/perfect-alignment")
+async def perfect_alignment_link(request: Request, data: Annotated[PerfectAlignmentInput, Query()]):
+    return await cached_response(request, "/perfect-alignment", data, perfect_alignment_result)
+
+async def perfect_alignment_result(data):
     try:
-        result = calculate_perfect_alignment(
+        location = await astro_service.get_lat_lon_async(data.birth_city, data.birth_country, data.birth_state)
+        result = await chart_pool.run(
+            astro_service.calculate_perfect_alignment,
             data.birth_date,
             data.birth_time,
             data.birth_city,
             data.birth_country,
             data.birth_state,
-            data.solar_return
+            data.solar_return,
+            location,
+            data.mode,
+            data.bodies,
+            data.top_k
         )
         return result
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        logger.exception("Error processing perfect alignment")
         raise HTTPException(status_code=500, detail=str(e))
 
 class ArroyoInput(BaseModel):
@@ -89,20 +337,182 @@ class ArroyoInput(BaseModel):
     city: str
     country: str
     state: Optional[str] = None
+    precision: Literal["full", "fast"] = "full"
+    house_system: HouseSystem = "placidus"
 
 @app.post("/arroyo-analysis")
-def arroyo_analysis(data: ArroyoInput):
-    from backend.astro_service import calculate_arroyo_analysis
+async def arroyo_analysis(data: ArroyoInput, request: Request):
+    return await cached_response(request, "/arroyo-analysis", data, arroyo_result)
+
+@app.get("/arroyo-analysis")
+async def arroyo_analysis_link(request: Request, data: Annotated[ArroyoInput, Query()]):
+    return await cached_response(request, "/arroyo-analysis", data, arroyo_result)
+
+async def arroyo_result(data):
     try:
-        result = calculate_arroyo_analysis(data.birth_date, data.birth_time, data.city, data.country, data.state)
+        location = await astro_service.get_lat_lon_async(data.city, data.country, data.state)
+        result = await chart_pool.run(
+            astro_service.calculate_arroyo_analysis, data.birth_date, data.birth_time, data.city, data.country,
+            data.state, data.precision, location, data.house_system
+        )
         return result
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.exception("Error processing Arroyo analysis")
+        raise HTTPException(status_code=500, detail=str(e))
+
+class ReportInput(BaseModel):
+    birth: AstroInput
+    current: AstroInput
+    target_year: Optional[int] = None
+    precision: Literal["full", "fast"] = "full"
+
+@app.post("/report")
+async def report(data: ReportInput):
+    try:
+        birth_location, current_location = await asyncio.gather(
+            astro_service.get_lat_lon_async(data.birth.city, data.birth.country, data.birth.state),
+            astro_service.get_lat_lon_async(data.current.city, data.current.country, data.current.state),
+        )
+        return await chart_pool.run(
+            astro_service.calculate_report, data.birth.dict(), data.current.dict(), data.target_year, data.precision,
+            birth_location, current_location
+        )
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.exception("Error processing report")
+        raise HTTPException(status_code=500, detail=str(e))
+
+class SolarCalendarInput(BaseModel):
+    city: str
+    country: str
+    state: Optional[str] = None
+    start_date: str
+    end_date: str
+
+@app.post("/solar-calendar")
+async def solar_calendar(data: SolarCalendarInput):
+    try:
+        location = await astro_service.get_lat_lon_async(data.city, data.country, data.state)
+        return await chart_pool.run(
+            astro_service.calculate_solar_calendar, data.city, data.country, data.start_date, data.end_date,
+            data.state, location
+        )
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        logger.exception("Error processing solar calendar")
         raise HTTPException(status_code=500, detail=str(e))
 
+class IngressInput(BaseModel):
+    date: str
+    time: str = "00:00"
+    bodies: Optional[List[str]] = None
+    count: int = 3
+
+@app.post("/ingresses")
+def zodiac_ingresses(data: IngressInput):
+    # Index lookups only, so it stays in the API process.
+    try:
+        return astro_service.zodiac_ingresses(data.date, data.time, data.bodies, max(0, min(data.count, 100)))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+class EphemerisSeriesInput(BaseModel):
+    city: str
+    country: str
+    state: Optional[str] = None
+    start_date: str
+    start_time: str = "00:00"
+    end_date: str
+    end_time: str = "00:00"
+    step: str = "1h"
+    precision: Literal["full", "fast"] = "full"
+
+@app.post("/ephemeris/series")
+async def ephemeris_series(data: EphemerisSeriesInput):
+    # NDJSON, one row per instant. Chunks are computed one at a time as the client
+    # reads: the next one goes to chart_pool only after the previous one was sent.
+    try:
+        location = await astro_service.get_lat_lon_async(data.city, data.country, data.state)
+        lat, lon = location
+        start_dt, step_seconds, chunks = astro_service.series_plan(
+            lat, lon, data.start_date, data.start_time, data.end_date, data.end_time, data.step, data.precision
+        )
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except GeocoderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    async def rows():
+        for first, count in chunks:
+            try:
+                yield await chart_pool.run(
+                    astro_service.series_chunk, lat, lon, start_dt, step_seconds, first, count, data.precision
+                )
+            except Exception as e:
+                # The status line is long gone; end the stream with an error row.
+                logger.exception("Error streaming ephemeris series")
+                yield json.dumps({"error": str(e)}) + "\n"
+                return
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
 @app.get("/api/health")
 def health_check():
     return {"message": "GeoAstro Compute API is running"}
 
+@app.get("/api/ready")
+def readiness_check():
+    if not startup["ready"]:
+        raise HTTPException(status_code=503, detail="Starting up")
+    return {"status": "ready", "startup_seconds": startup["seconds"], "timings": startup["timings"],
+            "ephemeris": startup["ephemeris"]}
+
+@app.get("/api/geocode-cache")
+def geocode_cache_stats():
+    stats = astro_service.geocode_cache.stats()
+    stats["nominatim"] = astro_service.nominatim.stats()
+    return stats
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/response-cache")
+def response_cache_stats():
+    # This process's response cache (one per uvicorn worker).
+    return response_cache.stats()
+
+@app.get("/api/chart-cache")
+def chart_cache_stats():
+    # With the pool on, charts are memoized in each pool worker; these are their
+    # counters as of each worker's last task, summed.
+    if chart_pool.size <= 0:
+        return astro_service.chart_cache.stats()
+    workers = list(chart_pool.worker_stats.values())
+    stats = {name: sum(w[name] for w in workers) for name in ("hits", "misses", "expired", "evictions", "entries")}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["pool"] = chart_pool.stats()
+    return stats
+
 @app.get("/")
 def read_root():
     if os.path.exists("dist/index.html"):
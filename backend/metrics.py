@@ -0,0 +1,210 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Request instrumentation.
+# Code on the hot path wraps its stages in span()/timed(); the time lands in the
+# current request's Spans (a context variable, carried into report threads by
+# submit() and back from pool workers by compute_pool). main.py's middleware turns
+# each request's spans into a Server-Timing header and into the histograms below,
+# which /metrics renders in the Prometheus text format. Counters and histograms
+# are per process: with several uvicorn workers each one reports its own.
+
+# Seconds; stages range from microseconds (a gazetteer hit) to tens of seconds
+# (a Nominatim timeout).
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Spans:
+    # Total seconds and call count per stage for one request.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def add(self, stage, seconds, count=1):
+        with self._lock:
+            total, calls = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, calls + count)
+
+    def merge(self, stages):
+        for stage, (seconds, count) in stages.items():
+            self.add(stage, seconds, count)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stages)
+
+
+_current = contextvars.ContextVar("geoastro_spans", default=None)
+
+
+def start_spans():
+    spans = Spans()
+    _current.set(spans)
+    return spans
+
+
+def current_spans():
+    return _current.get()
+
+
+def record(stage, seconds):
+    spans = _current.get()
+    if spans is not None:
+        spans.add(stage, seconds)
+
+
+@contextmanager
+def span(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    # Decorator form of span(), for plain and async functions.
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(stage, time.perf_counter() - start)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def submit(executor, fn, *args):
+    # executor.submit that keeps the caller's spans (and other context) in the thread.
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def server_timing(stages, total=None):
+    parts = [f"{stage};dur={seconds * 1e3:.2f}" for stage, (seconds, _) in sorted(stages.items())]
+    if total is not None:
+        parts.append(f"total;dur={total * 1e3:.2f}")
+    return ", ".join(parts)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, entry):
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (repr(bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {entry[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {entry[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {entry[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+requests_total = registry.counter(
+    "geoastro_requests_total", "HTTP requests by route and status.", ("endpoint", "status"))
+request_seconds = registry.histogram(
+    "geoastro_request_seconds", "HTTP request latency by route.", ("endpoint",))
+stage_seconds = registry.histogram(
+    "geoastro_stage_seconds", "Time per request spent in each stage, by route.", ("endpoint", "stage"))
+geocode_lookups = registry.counter(
+    "geoastro_geocode_lookups_total",
+    "Forward geocoding results by where they came from (gazetteer, cache, nominatim, admin1).", ("source",))
+geocode_retries = registry.counter(
+    "geoastro_geocode_retries_total", "Nominatim queries retried after an error.", ("query",))
+geocode_fallbacks = registry.counter(
+    "geoastro_geocode_fallbacks_total", "Lookups that fell back from the city to its state/province.")
+geocode_unresolved = registry.counter(
+    "geoastro_geocode_unresolved_total",
+    "Lookups that failed (not_found, or unavailable when Nominatim errored).", ("reason",))
+response_cache_events = registry.counter(
+    "geoastro_response_cache_total",
+    "Response cache lookups and upkeep (hit, miss, not_modified, eviction, uncacheable).", ("event",))
@@ -0,0 +1,329 @@
+import json
+import logging
+import os
+
+import numpy as np
+from skyfield.api import wgs84
+from skyfield.constants import AU_KM, AU_M, C, C_AUDAY, GS
+from skyfield.earthlib import compute_limb_angle
+from skyfield.framelib import ecliptic_J2000_frame, itrs
+from skyfield.relativity import add_aberration, light_time_difference, rmasses
+
+from backend.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Vectorized multi-body position engine.
+# The per-body skyfield path (observer.at(t).observe(body).apparent()) rebuilds
+# the observer, runs its own light-time loop and evaluates each SPK segment with
+# a separate Chebyshev pass. Here the Chebyshev coefficients of every segment the
+# chart bodies need are stacked into one array, so a light-time iteration for all
+# bodies (and, for Time arrays, all instants) is a single gather + polynomial
+# evaluation. Deflection, aberration and the ecliptic rotation are then applied
+# to the whole (3, bodies[, times]) block at once, the same way
+# Astrometric.apparent() and ecliptic_latlon() do it for one body.
+
+ZODIAC_SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"
+]
+
+MAX_LIGHT_TIME_ITERATIONS = 10
+
+# Bodies whose gravity deflects the light, with their NAIF codes (Astrometric.apparent() defaults).
+DEFLECTORS = [('Sun', 10), ('Jupiter', 599), ('Saturn', 699)]
+
+
+def zodiac_sign(longitude):
+    return ZODIAC_SIGNS[int(longitude // 30) % 12]
+
+
+def _deflection(position, pe, rmass):
+    # Light deflection by a mass at `pe` (observer relative to the deflector);
+    # the same formula as skyfield.relativity, for (3, n) arrays.
+    pq = position + pe
+    pmag = np.sqrt((position ** 2).sum(axis=0))
+    qmag = np.sqrt((pq ** 2).sum(axis=0))
+    emag = np.sqrt((pe ** 2).sum(axis=0))
+    phat = position / np.where(pmag, pmag, 1.0)
+    qhat = pq / np.where(qmag, qmag, 1.0)
+    ehat = pe / np.where(emag, emag, 1.0)
+    pdotq = (phat * qhat).sum(axis=0)
+    qdote = (qhat * ehat).sum(axis=0)
+    edotp = (ehat * phat).sum(axis=0)
+    # No deflection when the deflector is the target or on the line of sight.
+    flag = np.abs(edotp) <= 0.99999999999
+    fac1 = 2.0 * GS / (C * C * emag * AU_M * rmass)
+    fac2 = 1.0 + qdote
+    return flag * fac1 * (pdotq * ehat - edotp * qhat) / fac2 * pmag
+
+
+class PositionEngine:
+    def __init__(self, eph, bodies, block_path=None):
+        # bodies: display name -> skyfield vector function (a Chebyshev segment
+        # or a VectorSum of them) from the SSB, as in EphemerisContext.bodies.
+        # block_path: a coefficient block written by save_block() for this kernel;
+        # when it matches, it is memory-mapped instead of built in memory.
+        self.eph = eph
+        self.names = list(bodies)
+        self.earth = eph['earth']
+
+        segments = []
+        segment_ids = {}
+        chains = []
+        for name in self.names:
+            chain = []
+            for function in getattr(bodies[name], 'vector_functions', [bodies[name]]):
+                segment = function.spk_segment
+                if segment.data_type != 2:
+                    raise ValueError(f"Unsupported SPK segment type {segment.data_type} for {name}")
+                key = (segment.center, segment.target)
+                if key not in segment_ids:
+                    segment_ids[key] = len(segments)
+                    segments.append(segment)
+                chain.append(segment_ids[key])
+            chains.append(chain)
+
+        # One padded coefficient block for all segments: (records, 3, coefficients).
+        # Segments with fewer coefficients get zero high-order terms.
+        arrays = [segment.load_array() for segment in segments]
+        width = max(coefficients.shape[2] for _, _, coefficients in arrays)
+        self.layout = []
+        self.seg_init = np.empty(len(arrays))
+        self.seg_intlen = np.empty(len(arrays))
+        self.seg_records = np.empty(len(arrays), dtype=np.int64)
+        self.seg_offset = np.empty(len(arrays), dtype=np.int64)
+        offset = 0
+        for k, (segment, (init, intlen, coefficients)) in enumerate(zip(segments, arrays)):
+            _, records, count = coefficients.shape
+            self.layout.append({"center": segment.center, "target": segment.target, "init": float(init),
+                                "intlen": float(intlen), "records": records, "coefficients": count})
+            self.seg_init[k] = init
+            self.seg_intlen[k] = intlen
+            self.seg_records[k] = records
+            self.seg_offset[k] = offset
+            offset += records
+        self.width = width
+        self.start_jd = max(segment.start_jd for segment in segments)
+        self.end_jd = min(segment.end_jd for segment in segments)
+
+        # A private copy of the block is the bulk of each worker's memory; a mapped
+        # file is shared through the page cache by every process that maps it.
+        self.block_path = None
+        self.coefficients = self._map_block(block_path) if block_path else None
+        if self.coefficients is not None:
+            self.block_path = block_path
+        else:
+            blocks = []
+            for _, _, coefficients in arrays:
+                _, records, count = coefficients.shape
+                block = np.zeros((records, 3, width))
+                block[:, :, :count] = coefficients.transpose(1, 0, 2)
+                blocks.append(block)
+            self.coefficients = np.concatenate(blocks)
+
+        # Flattened body chains: element e belongs to body elem_body[e] and uses
+        # segment elem_segment[e]; a body's position is the sum of its elements.
+        self.elem_segment = np.array([k for chain in chains for k in chain])
+        self.elem_body = np.array([b for b, chain in enumerate(chains) for _ in chain])
+
+    def _map_block(self, path):
+        meta_path = os.path.splitext(path)[0] + '.json'
+        if not (os.path.exists(path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("segments") != self.layout or meta.get("width") != self.width:
+            logger.warning("Ignoring %s: built from a different kernel", path)
+            return None
+        # Plain ndarray view of the memory map: same pages, cheaper indexing.
+        return np.load(path, mmap_mode='r').view(np.ndarray)
+
+    def save_block(self, path):
+        # Writes the coefficient block (.npy) and its layout (.json) for _map_block.
+        # Both are renamed into place, so running workers never map a partial file.
+        meta_path = os.path.splitext(path)[0] + '.json'
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.coefficients))
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"width": self.width, "segments": self.layout}, f, indent=1)
+        os.replace(path + '.tmp', path)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _segment_positions(self, segment, whole, fraction):
+        # Positions in km for element arrays (segment id, TDB whole, TDB fraction).
+        init = self.seg_init[segment]
+        intlen = self.seg_intlen[segment]
+        records = self.seg_records[segment]
+
+        # Same whole/fraction split as jplephem to keep full precision.
+        index1, offset1 = np.divmod(whole - init, intlen)
+        index2, offset2 = np.divmod(fraction, intlen)
+        index3, offset = np.divmod(offset1 + offset2, intlen)
+        index = (index1 + index2 + index3).astype(np.int64)
+        if (index < 0).any() or (index > records).any():
+            raise ValueError(f"Date outside the ephemeris span (JD {self.start_jd:.1f} to {self.end_jd:.1f})")
+        last = index == records
+        index[last] -= 1
+        offset[last] += intlen[last]
+
+        coefficients = self.coefficients[self.seg_offset[segment] + index]
+        s = 2.0 * offset / intlen - 1.0
+
+        # Chebyshev basis T_0..T_n at s, then one contraction for all elements.
+        basis = np.empty((len(s), self.width))
+        basis[:, 0] = 1.0
+        if self.width > 1:
+            basis[:, 1] = s
+        for k in range(2, self.width):
+            basis[:, k] = 2.0 * s * basis[:, k - 1] - basis[:, k - 2]
+        return np.einsum('eic,ec->ie', coefficients, basis)
+
+    def _body_positions(self, elements, starts, whole, fraction, light_time):
+        # Barycentric body positions (3, bodies, times) in au at TDB minus each body's
+        # light time. elements/starts come from _elements().
+        times = len(whole)
+        owner = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(elements))))
+        segment = np.repeat(self.elem_segment[elements], times)
+        w = np.tile(whole, len(elements))
+        f = (fraction[None, :] - light_time[owner]).ravel()
+        km = self._segment_positions(segment, w, f).reshape(3, len(elements), times)
+        return np.add.reduceat(km, starts, axis=1) / AU_KM
+
+    def _elements(self, bodies):
+        chains = [np.nonzero(self.elem_body == b)[0] for b in bodies]
+        starts = np.cumsum([0] + [len(chain) for chain in chains[:-1]])
+        return np.concatenate(chains), starts
+
+    @timed("observe")
+    def observe(self, t, lat=None, lon=None, names=None, frame=ecliptic_J2000_frame):
+        # Apparent positions of `names` (default: all bodies) from a place on Earth,
+        # or from the geocenter when lat/lon are None. t may be a scalar Time or a
+        # Time array; lat/lon may be arrays matching t. Ecliptic coordinates are in
+        # `frame`; the default matches Apparent.ecliptic_latlon().
+        names = names or self.names
+        bodies = np.array([self.names.index(name) for name in names])
+
+        scalar = t.shape == ()
+        whole = np.atleast_1d(t.whole).astype(float)
+        fraction = np.atleast_1d(t.tdb_fraction).astype(float)
+
+        # Observer state, computed once for every body.
+        earth = self.earth.at(t)
+        observer_au = earth.xyz.au.reshape(3, -1)
+        observer_velocity = earth.velocity.au_per_d.reshape(3, -1)
+        topos = None
+        gcrs_au = None
+        if lat is not None:
+            topos = wgs84.latlon(lat, lon)
+            geocentric = topos.at(t)
+            gcrs_au = geocentric.xyz.au.reshape(3, -1)
+            observer_au = observer_au + gcrs_au
+            observer_velocity = observer_velocity + geocentric.velocity.au_per_d.reshape(3, -1)
+
+        # Light-time iteration for all bodies at once (same convergence rule as skyfield).
+        elements, starts = self._elements(bodies)
+        observer_b = observer_au[:, None, :]
+        light_time0 = np.zeros((len(bodies), len(whole)))
+        position = self._body_positions(elements, starts, whole, fraction, light_time0) - observer_b
+        for _ in range(MAX_LIGHT_TIME_ITERATIONS):
+            light_time = np.sqrt((position ** 2).sum(axis=0)) / C_AUDAY
+            if np.max(np.abs(light_time - light_time0)) < 1e-12:
+                break
+            position = self._body_positions(elements, starts, whole, fraction, light_time) - observer_b
+            light_time0 = light_time
+        else:
+            raise ValueError('light-travel time failed to converge')
+
+        # Relativistic corrections, as in Astrometric.apparent(), with the time axis
+        # flattened into the body axis: (3, bodies * times).
+        times = len(whole)
+        target = position.reshape(3, -1)
+        observer_flat = np.broadcast_to(observer_b, position.shape).reshape(3, -1)
+        whole_flat = np.tile(whole, len(bodies))
+        fraction_flat = np.tile(fraction, len(bodies))
+        light_time_flat = light_time.ravel()
+
+        # Deflectors where they were when the light passed closest to them; the
+        # positions at t are needed first to find that moment.
+        deflectors = np.array([self.names.index(name) for name, _ in DEFLECTORS])
+        d_elements, d_starts = self._elements(deflectors)
+        at_t = self._body_positions(d_elements, d_starts, whole, fraction, np.zeros((len(deflectors), times)))
+        closest = np.empty((len(deflectors), target.shape[1]))
+        for k in range(len(deflectors)):
+            gpv = np.tile(at_t[:, k], len(bodies)) - observer_flat
+            closest[k] = np.clip(light_time_difference(target, gpv), 0.0, light_time_flat)
+        at_closest = self._body_positions(d_elements, d_starts, whole_flat, fraction_flat, closest)
+        for k, (_, code) in enumerate(DEFLECTORS):
+            target += _deflection(target, observer_flat - at_closest[:, k], rmasses[code])
+
+        # The Earth's own mass, for observers on its surface, unless the target is
+        # seen through the Earth (same limb test as skyfield).
+        if gcrs_au is not None:
+            gcrs_flat = np.broadcast_to(gcrs_au[:, None, :], position.shape).reshape(3, -1)
+            d = _deflection(target, gcrs_flat, rmasses[399])
+            _, nadir_angle = compute_limb_angle(target, gcrs_flat)
+            target += d * (nadir_angle >= 0.8)
+
+        velocity_flat = np.broadcast_to(observer_velocity[:, None, :], position.shape).reshape(3, -1)
+        add_aberration(target, velocity_flat, light_time_flat)
+        apparent = target.reshape(3, len(bodies), times)
+
+        return BodyPositions(names, t, apparent, topos, scalar, frame)
+
+
+class BodyPositions:
+    # Apparent geocentric/topocentric ICRF vectors (3, bodies[, times]) in au,
+    # with the derived ecliptic longitude/latitude (degrees) and distance (au).
+    def __init__(self, names, t, apparent, topos, scalar, frame):
+        self.names = list(names)
+        self.t = t
+        self.topos = topos
+        self._scalar = scalar
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+        rotation = frame.rotation_at(t)
+        if rotation.ndim == 2:
+            ecliptic = np.einsum('ij,jbn->ibn', rotation, apparent)
+        else:
+            ecliptic = np.einsum('ijn,jbn->ibn', rotation, apparent)
+        x, y, z = ecliptic
+        self.distance = np.sqrt(x * x + y * y + z * z)
+        self.longitude = np.degrees(np.arctan2(y, x)) % 360.0
+        self.latitude = np.degrees(np.arctan2(z, np.hypot(x, y)))
+        self.apparent = apparent
+        if scalar:
+            self.apparent = apparent[:, :, 0]
+            self.distance = self.distance[:, 0]
+            self.longitude = self.longitude[:, 0]
+            self.latitude = self.latitude[:, 0]
+
+    def __getitem__(self, name):
+        return self._index[name]
+
+    def _vector(self, name):
+        return self.apparent[:, self._index[name]]
+
+    def altaz(self, name):
+        # (altitude, azimuth) in degrees, unrefracted, like Apparent.altaz().
+        if self.topos is None:
+            raise ValueError("altaz needs an observer latitude/longitude")
+        rotation = self.topos.rotation_at(self.t)
+        if self._scalar:
+            x, y, z = rotation @ self._vector(name)
+        else:
+            x, y, z = np.einsum('ijn,jn->in', rotation, self._vector(name))
+        return np.degrees(np.arctan2(z, np.hypot(x, y))), np.degrees(np.arctan2(y, x)) % 360.0
+
+    def hadec(self, name):
+        # (hour angle in hours, declination in degrees), like Apparent.hadec().
+        if self.topos is None:
+            raise ValueError("hadec needs an observer latitude/longitude")
+        rotation = itrs.rotation_at(self.t)
+        if self._scalar:
+            x, y, z = rotation @ self._vector(name)
+        else:
+            x, y, z = np.einsum('ijn,jn->in', rotation, self._vector(name))
+        ha = self.topos.longitude.radians - np.arctan2(y, x)
+        ha = (ha + np.pi) % (2 * np.pi) - np.pi
+        return np.degrees(ha) / 15.0, np.degrees(np.arctan2(z, np.hypot(x, y)))
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from backend import metrics
+
+# In-process cache of serialized responses for the deterministic endpoints.
+# Keys are content addresses of the request: a SHA-256 of the route and the
+# validated request model as canonical JSON (sorted keys, no whitespace), so field
+# order, defaults and GET vs POST don't matter. Values are the response body bytes
+# exactly as first rendered, with a strong ETag that is the SHA-256 of those bytes;
+# a hit skips both the chart math and serialization, and a matching If-None-Match
+# skips the body too. Bounded by total body bytes, least recently used first.
+# Each uvicorn worker has its own cache; ETags agree across workers because they
+# hash the body, not the worker's state.
+
+DEFAULT_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Largest single body worth keeping, as a share of the budget.
+MAX_ENTRY_SHARE = 8
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'etag'])
+
+
+def request_key(route, fields):
+    canonical = json.dumps([route, fields], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def body_etag(body):
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored, "*" matches anything.
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "uncacheable": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+        metrics.response_cache_events.inc(event="miss" if entry is None else "hit")
+        return entry
+
+    def put(self, key, body):
+        # Stores a freshly rendered body and returns it as a CachedResponse. Two
+        # requests missing the same key both compute; the bodies are identical.
+        entry = CachedResponse(body, body_etag(body))
+        if len(body) > self.max_bytes // MAX_ENTRY_SHARE:
+            with self._lock:
+                self.counters["uncacheable"] += 1
+            metrics.response_cache_events.inc(event="uncacheable")
+            return entry
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, oldest = self._entries.popitem(last=False)
+                self._bytes -= len(oldest.body)
+                evicted += 1
+            self.counters["evictions"] += evicted
+        if evicted:
+            metrics.response_cache_events.inc(evicted, event="eviction")
+        return entry
+
+    def not_modified(self):
+        with self._lock:
+            self.counters["not_modified"] += 1
+        metrics.response_cache_events.inc(event="not_modified")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        return stats
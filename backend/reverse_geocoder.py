@@ -0,0 +1,198 @@
+import math
+import os
+import threading
+
+import numpy as np
+
+from backend.world_cities import DATA_DIR, load_gazetteer
+
+# Offline reverse geocoder.
+# Nearest-place queries use a 1-degree grid index over the gazetteer places.
+# Land/water, country and ocean/sea resolution come from the rasters in
+# backend/data/geo_rasters.npz (built by scripts/build_geo_rasters.py):
+#   land     - bit-packed land mask, 0.1 degree cells
+#   country  - index into country_codes for every land cell (0 = water), 0.1 degree
+#   ocean    - index into ocean_names for every water cell (0 = land/inland water), 0.25 degree
+# Row 0 of every raster is the southernmost band, column 0 starts at -180.
+
+RASTERS_PATH = os.path.join(DATA_DIR, 'geo_rasters.npz')
+
+EARTH_RADIUS_KM = 6371.0
+GRID_DEG = 1
+# Beyond this, the nearest place is too far away to be called "the city" of a point.
+NEAR_PLACE_KM = 150.0
+# Give up looking for a nearest place beyond this radius (about 3300 km).
+MAX_SEARCH_DEG = 30
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cell(lat, lon, res):
+    rows = int(round(180 / res))
+    cols = int(round(360 / res))
+    i = min(int((lat + 90) / res), rows - 1)
+    j = int(((lon + 180) % 360) / res) % cols
+    return i, j
+
+
+class PlaceIndex:
+    # Places bucketed into 1-degree cells, stored sorted by cell so every cell is a
+    # contiguous slice [cell_start[c], cell_start[c + 1]) of the coordinate arrays.
+    ROWS = 180 // GRID_DEG
+    COLS = 360 // GRID_DEG
+
+    def __init__(self, places):
+        lat = np.array([p.latitude for p in places])
+        lon = np.array([p.longitude for p in places])
+        cell_ids = np.array([i * self.COLS + j for i, j in (_cell(a, b, GRID_DEG) for a, b in zip(lat, lon))])
+        order = np.argsort(cell_ids, kind='stable')
+
+        self.places = [places[i] for i in order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.country = np.array([p.country_code for p in self.places])
+        self.cell_start = np.searchsorted(cell_ids[order], np.arange(self.ROWS * self.COLS + 1))
+
+    def _window(self, i0, j0, k):
+        # Indices of the places in every cell that could hold a point within k degrees
+        # of the query cell. Longitude cells shrink towards the poles, so the window
+        # gets wider there.
+        lat_edge = min(89.0, abs(i0 * GRID_DEG - 90) + k + 1)
+        half_width = int(math.ceil((k + 1) / math.cos(math.radians(lat_edge))))
+        rows = np.arange(max(0, i0 - k), min(self.ROWS - 1, i0 + k) + 1)
+        if 2 * half_width + 1 >= self.COLS:
+            cols = np.arange(self.COLS)
+        else:
+            cols = (j0 + np.arange(-half_width, half_width + 1)) % self.COLS
+        ids = (rows[:, None] * self.COLS + cols[None, :]).ravel()
+        starts = self.cell_start[ids]
+        lengths = self.cell_start[ids + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.int64)
+        # Concatenate the slices without a Python loop.
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return offsets + np.arange(total)
+
+    def nearest(self, lat, lon, country_code=None, max_degrees=MAX_SEARCH_DEG):
+        # Returns (place, distance_km), or (None, None) if nothing matches nearby.
+        i0, j0 = _cell(lat, lon, GRID_DEG)
+        for k in (1, 2, 4, 8, 16, max_degrees):
+            if k > max_degrees:
+                break
+            idx = self._window(i0, j0, k)
+            if country_code:
+                idx = idx[self.country[idx] == country_code]
+            if not len(idx):
+                continue
+            d = _haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+            m = int(np.argmin(d))
+            # Anything outside the window is at least k degrees away.
+            if d[m] <= k * 111.0:
+                return self.places[int(idx[m])], float(d[m])
+        return None, None
+
+
+class GeoRasters:
+    def __init__(self, path=RASTERS_PATH):
+        data = np.load(path)
+        self.land_res = float(data['land_res'])
+        self.land = data['land']
+        self.country = data['country']
+        self.country_codes = [str(c) for c in data['country_codes']]
+        self.ocean_res = float(data['ocean_res'])
+        self.ocean = data['ocean']
+        self.ocean_names = [str(n) for n in data['ocean_names']]
+
+    def is_land(self, lat, lon):
+        i, j = _cell(lat, lon, self.land_res)
+        return bool((self.land[i, j >> 3] >> (7 - (j & 7))) & 1)
+
+    def country_code(self, lat, lon):
+        i, j = _cell(lat, lon, self.land_res)
+        idx = self.country[i, j]
+        return self.country_codes[idx] if idx else None
+
+    def ocean_name(self, lat, lon):
+        i, j = _cell(lat, lon, self.ocean_res)
+        idx = self.ocean[i, j]
+        if not idx:
+            return None
+        name = self.ocean_names[idx]
+        if name in ("Atlantic Ocean", "Pacific Ocean"):
+            name = ("North " if lat >= 0 else "South ") + name
+        return name
+
+
+class ReverseGeocoder:
+    def __init__(self, gazetteer, rasters):
+        self.gazetteer = gazetteer
+        self.rasters = rasters
+        self.index = PlaceIndex(gazetteer.places)
+        self.country_names = {code: name for code, _, name in gazetteer.countries}
+
+    def reverse(self, lat, lon):
+        ocean = None
+        if not self.rasters.is_land(lat, lon):
+            ocean = self.rasters.ocean_name(lat, lon)
+
+        if ocean:
+            return {
+                "city": "Ocean Location",
+                "country": ocean,
+                "countryCode": None,
+                "ocean": ocean,
+                "nearestPlace": None,
+                "distanceKm": None,
+            }
+
+        # Land (or a lake): prefer places in the country the raster puts the point in,
+        # so points near a border don't pick the neighbour's city.
+        code = self.rasters.country_code(lat, lon)
+        place, distance = self.index.nearest(lat, lon, code)
+        if place is None:
+            place, distance = self.index.nearest(lat, lon)
+        if place is None:
+            country = self.country_names.get(code) or f"Coordinates: {lat:.2f}°, {lon:.2f}°"
+            return {
+                "city": "Remote Location",
+                "country": country,
+                "countryCode": code.lower() if code else None,
+                "ocean": None,
+                "nearestPlace": None,
+                "distanceKm": None,
+            }
+
+        code = code or place.country_code
+        country = self.country_names.get(code, code)
+        if distance <= NEAR_PLACE_KM:
+            city = place.name
+        elif place.admin1 and place.country_code == code:
+            city = f"{place.admin1}, {country}"
+        else:
+            city = "Remote Location"
+        return {
+            "city": city,
+            "country": country,
+            "countryCode": code.lower(),
+            "ocean": None,
+            "nearestPlace": place.name,
+            "distanceKm": distance,
+        }
+
+
+_reverse_geocoder = None
+_reverse_geocoder_lock = threading.Lock()
+
+
+def load_reverse_geocoder():
+    global _reverse_geocoder
+    if _reverse_geocoder is None:
+        with _reverse_geocoder_lock:
+            if _reverse_geocoder is None:
+                _reverse_geocoder = ReverseGeocoder(load_gazetteer(), GeoRasters())
+    return _reverse_geocoder
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from backend.world_cities import DATA_DIR
+
+# Equation of time and solar declination table.
+# Built by scripts/build_solar_table.py from the full position engine on a fixed
+# UT1 grid; values in between are interpolated linearly, which is good to well
+# under a second of time (see the errors recorded in the metadata). Solar noon,
+# sunrise, sunset and day length for any place and any run of days are then
+# plain array arithmetic on the table, with no ephemeris evaluation.
+#
+# solar_table.npy   float32 (samples, 2): [equation of time in minutes (apparent
+#                   minus mean solar time), apparent declination of date in
+#                   degrees] of the geocentric Sun; memory-mapped at load.
+# solar_table.json  start_jd/step_days of the grid (UT1 Julian dates) and the
+#                   maximum interpolation error measured against the engine.
+#
+# Lookups take UTC Julian dates; UTC stays within 0.9 s of UT1, far below the
+# table's resolution.
+
+SOLAR_TABLE_PATH = os.path.join(DATA_DIR, 'solar_table.npy')
+SOLAR_TABLE_META_PATH = os.path.join(DATA_DIR, 'solar_table.json')
+
+# Sun's centre at rise/set: 34' of refraction plus a 16' semidiameter below the horizon.
+SUNRISE_ALTITUDE_DEG = -0.8333
+J2000_JD = 2451545.0
+J2000 = datetime(2000, 1, 1, 12)
+
+
+def julian_date(dt):
+    # UTC Julian date of a naive UTC datetime.
+    return J2000_JD + (dt - J2000).total_seconds() / 86400.0
+
+
+def iso_utc(jd):
+    # ISO 8601 UTC strings (to the second) for an array of UTC Julian dates; None for NaN.
+    jd = np.atleast_1d(np.asarray(jd, dtype=float))
+    seconds = np.round((np.nan_to_num(jd, nan=J2000_JD) - J2000_JD) * 86400.0).astype(np.int64)
+    stamps = np.datetime_as_string(np.datetime64(J2000, 's') + seconds.astype('timedelta64[s]'), unit='s')
+    return [f"{stamp}Z" if not np.isnan(v) else None for stamp, v in zip(stamps, jd)]
+
+
+class SolarTable:
+    def __init__(self, path=SOLAR_TABLE_PATH, meta_path=SOLAR_TABLE_META_PATH):
+        with open(meta_path, encoding='utf-8') as f:
+            self.meta = json.load(f)
+        # Plain ndarray view of the memory map: same pages, cheaper indexing.
+        self.values = np.load(path, mmap_mode='r').view(np.ndarray)
+        self.start_jd = self.meta["start_jd"]
+        self.step_days = self.meta["step_days"]
+        self.end_jd = self.start_jd + self.step_days * (len(self.values) - 1)
+
+    def covers(self, jd):
+        jd = np.asarray(jd)
+        return bool(((jd >= self.start_jd) & (jd <= self.end_jd)).all())
+
+    def lookup(self, jd):
+        # (equation of time in minutes, declination in degrees) at UTC Julian dates.
+        jd = np.asarray(jd, dtype=float)
+        if not self.covers(jd):
+            raise ValueError("Date outside the solar table range")
+        position = (jd - self.start_jd) / self.step_days
+        i = np.minimum(position.astype(np.int64), len(self.values) - 2)
+        w = (position - i)[..., None]
+        values = self.values[i] * (1.0 - w) + self.values[i + 1] * w
+        return values[..., 0], values[..., 1]
+
+    def days(self, lat, lon, day_jd):
+        # Solar noon, sunrise and sunset (UTC Julian dates) for the local solar days
+        # starting at UTC Julian dates `day_jd` (0h UT of each date), at a place.
+        # Returns a dict of arrays; sunrise/sunset are NaN through polar day
+        # (day_length 24) and polar night (day_length 0).
+        day_jd = np.asarray(day_jd, dtype=float)
+        # Local mean noon, then twice corrected by the equation of time there.
+        noon = day_jd + 0.5 - lon / 360.0
+        for _ in range(2):
+            eot, _ = self.lookup(noon)
+            noon = day_jd + 0.5 - lon / 360.0 - eot / 1440.0
+        eot, declination = self.lookup(noon)
+
+        phi = np.radians(lat)
+        events = {}
+        for name, sign in (("sunrise", -1.0), ("sunset", 1.0)):
+            # Apparent solar time 12h -/+ the hour angle h0, with the equation of
+            # time and declination taken at the event itself.
+            when = noon
+            for _ in range(3):
+                eot_when, dec = self.lookup(when)
+                dec = np.radians(dec)
+                cos_h0 = ((np.sin(np.radians(SUNRISE_ALTITUDE_DEG)) - np.sin(phi) * np.sin(dec))
+                          / (np.cos(phi) * np.cos(dec)))
+                h0 = np.degrees(np.arccos(np.clip(cos_h0, -1.0, 1.0)))
+                when = day_jd + 0.5 - lon / 360.0 - eot_when / 1440.0 + sign * h0 / 360.0
+            events[name] = np.where(np.abs(cos_h0) < 1.0, when, np.nan)
+            events[name + "_cos_h0"] = cos_h0
+
+        day_length = (events["sunset"] - events["sunrise"]) * 24.0
+        # Both events, not only the noon declination, decide polar day or night.
+        polar_day = (events["sunrise_cos_h0"] <= -1.0) & (events["sunset_cos_h0"] <= -1.0)
+        polar_night = (events["sunrise_cos_h0"] >= 1.0) & (events["sunset_cos_h0"] >= 1.0)
+        day_length = np.where(polar_day, 24.0, np.where(polar_night, 0.0, day_length))
+        return {
+            "noon": noon,
+            "sunrise": events["sunrise"],
+            "sunset": events["sunset"],
+            "day_length": day_length,
+            "equation_of_time": eot,
+            "declination": declination,
+        }
+
+
+_solar_table = None
+_solar_table_lock = threading.Lock()
+
+
+def load_solar_table():
+    global _solar_table
+    if _solar_table is None:
+        with _solar_table_lock:
+            if _solar_table is None:
+                if not os.path.exists(SOLAR_TABLE_PATH):
+                    raise ValueError("Solar table not built (run scripts/build_solar_table.py)")
+                _solar_table = SolarTable()
+    return _solar_table
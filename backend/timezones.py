@@ -0,0 +1,178 @@
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from backend.world_cities import DATA_DIR
+
+# Offline timezone resolution.
+# backend/data/timezones.npz (built by scripts/build_timezones.py) maps every 0.1
+# degree cell to an IANA zone: land takes the zone of the nearest place in the
+# same country, coastal water the zone of the nearest land, and the open sea the
+# nautical zone of its longitude (Etc/GMT+N). Row 0 is the southernmost band,
+# column 0 starts at -180, as in geo_rasters.npz. Near zone borders inside a
+# country the answer is only as good as the density of the places it was built
+# from.
+#
+# UTC offsets come from pytz's copy of the tz database. At load every zone's
+# transitions are flattened into one sorted array keyed on (zone, second), so a
+# whole batch of (zone, instant) pairs resolves with one searchsorted and no
+# per-row Python. pytz's tables stop in 2037; zones still changing clocks then
+# repeat their last 28 years (the calendar's weekday cycle) up to 2100.
+#
+# Local times that happen twice (clocks going back) resolve to the first one, and
+# local times skipped by clocks going forward take the offset from before the
+# change, as zoneinfo does with fold=0.
+
+TIMEZONES_PATH = os.path.join(DATA_DIR, 'timezones.npz')
+
+EPOCH = datetime(1970, 1, 1)
+# Keys are zone * ZONE_STRIDE + (seconds - MIN_SECONDS); 2**38 s is over 8000 years.
+MIN_SECONDS = int((datetime(1, 1, 1) - EPOCH).total_seconds())
+ZONE_STRIDE = 2 ** 38
+CYCLE_YEARS = 28
+EXTEND_UNTIL = datetime(2100, 1, 1)
+
+CivilTime = namedtuple('CivilTime', ['utc', 'local', 'zone', 'offset_seconds', 'dst'])
+
+
+def nautical_zone(lon):
+    # Etc/GMT zones count the other way: Etc/GMT+5 is UTC-05:00.
+    hours = int(np.clip(np.round(lon / 15.0), -12, 12))
+    return "Etc/GMT" if hours == 0 else f"Etc/GMT{-hours:+d}"
+
+
+def format_offset(seconds):
+    sign = "+" if seconds >= 0 else "-"
+    minutes = abs(int(seconds)) // 60
+    return f"{sign}{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def epoch_seconds(parts):
+    # (n, 6) proleptic Gregorian year, month, day, hour, minute, second -> seconds
+    # since 1970-01-01 (civil arithmetic, no leap seconds).
+    parts = np.asarray(parts)
+    year, month, day = (parts[:, k].astype(np.int64) for k in range(3))
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    return days * 86400 + parts[:, 3].astype(np.int64) * 3600 + parts[:, 4].astype(np.int64) * 60 + parts[:, 5]
+
+
+def _to_seconds(dt):
+    return int((dt - EPOCH).total_seconds())
+
+
+def _transitions(name):
+    # (UTC start seconds, offset seconds, dst) of every period of a zone, oldest first.
+    tz = pytz.timezone(name)
+    if not hasattr(tz, '_utc_transition_times'):
+        offset = tz.utcoffset(datetime(2000, 1, 1))
+        return [MIN_SECONDS], [int(offset.total_seconds())], [False]
+    starts = [max(MIN_SECONDS, _to_seconds(t)) for t in tz._utc_transition_times]
+    offsets = [int(info[0].total_seconds()) for info in tz._transition_info]
+    dst = [bool(info[1]) for info in tz._transition_info]
+    last = tz._utc_transition_times[-1]
+    if last.year >= 2037 and len(starts) > 1:
+        # The table was cut off, not the clock changes: replay the last cycle.
+        cycle = _to_seconds(datetime(2000 + CYCLE_YEARS, 1, 1)) - _to_seconds(datetime(2000, 1, 1))
+        window = [k for k in range(len(starts)) if starts[k] > starts[-1] - cycle]
+        shift = cycle
+        while starts[window[0]] + shift < _to_seconds(EXTEND_UNTIL):
+            for k in window:
+                starts.append(starts[k] + shift)
+                offsets.append(offsets[k])
+                dst.append(dst[k])
+            shift += cycle
+    return starts, offsets, dst
+
+
+class TimezoneIndex:
+    def __init__(self, path=TIMEZONES_PATH):
+        data = np.load(path)
+        self.res = float(data['res'])
+        self.zones = data['zones']
+        self.zone_names = [str(n) for n in data['zone_names']]
+        self.zone_index = {name: i for i, name in enumerate(self.zone_names)}
+        self.rows, self.cols = self.zones.shape
+
+        utc_keys, local_keys, offsets, dst = [], [], [], []
+        for z, name in enumerate(self.zone_names):
+            starts, zone_offsets, zone_dst = (np.array(v) for v in _transitions(name))
+            base = z * ZONE_STRIDE - MIN_SECONDS
+            utc_keys.append(base + starts)
+            # Wall-clock start of each period as resolved with fold=0: the later of
+            # the two offsets around the change (skipped and repeated times both
+            # stay in the earlier period).
+            previous = np.concatenate([zone_offsets[:1], zone_offsets[:-1]])
+            wall = starts + np.maximum(previous, zone_offsets)
+            wall[0] = MIN_SECONDS
+            local_keys.append(base + np.maximum.accumulate(wall))
+            offsets.append(zone_offsets)
+            dst.append(zone_dst)
+        self.utc_keys = np.concatenate(utc_keys).astype(np.int64)
+        self.local_keys = np.concatenate(local_keys).astype(np.int64)
+        self.offsets = np.concatenate(offsets).astype(np.int32)
+        self.dst = np.concatenate(dst).astype(bool)
+
+    def zone_ids(self, lat, lon):
+        # Zone index (into zone_names) for arrays of latitudes/longitudes.
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        i = np.clip(((lat + 90.0) / self.res).astype(np.int64), 0, self.rows - 1)
+        j = ((((lon + 180.0) % 360.0) / self.res).astype(np.int64)) % self.cols
+        return self.zones[i, j]
+
+    def zone_name(self, lat, lon):
+        return self.zone_names[int(self.zone_ids(lat, lon))]
+
+    def _periods(self, keys, zone_ids, seconds):
+        seconds = np.clip(np.asarray(seconds, dtype=np.int64), MIN_SECONDS, MIN_SECONDS + ZONE_STRIDE - 1)
+        query = np.asarray(zone_ids, dtype=np.int64) * ZONE_STRIDE + (seconds - MIN_SECONDS)
+        return np.searchsorted(keys, query, side='right') - 1
+
+    def utc_offsets(self, zone_ids, utc_seconds):
+        # (offset seconds, dst) in force at UTC instants (seconds since 1970).
+        k = self._periods(self.utc_keys, zone_ids, utc_seconds)
+        return self.offsets[k], self.dst[k]
+
+    def local_offsets(self, zone_ids, local_seconds):
+        # (offset seconds, dst) for local wall-clock times (seconds since 1970 on
+        # the local calendar); UTC = local - offset.
+        k = self._periods(self.local_keys, zone_ids, local_seconds)
+        return self.offsets[k], self.dst[k]
+
+    def localize(self, lat, lon, dt):
+        # Civil time for a naive local datetime at a place.
+        zone = int(self.zone_ids(lat, lon))
+        offset, dst = self.local_offsets(zone, _to_seconds(dt))
+        offset = int(offset)
+        return CivilTime(dt - timedelta(seconds=offset), dt, self.zone_names[zone], offset, bool(dst))
+
+    def to_local(self, lat, lon, dt_utc):
+        # Civil time for a naive UTC datetime at a place.
+        zone = int(self.zone_ids(lat, lon))
+        offset, dst = self.utc_offsets(zone, _to_seconds(dt_utc))
+        offset = int(offset)
+        return CivilTime(dt_utc, dt_utc + timedelta(seconds=offset), self.zone_names[zone], offset, bool(dst))
+
+
+_timezone_index = None
+_timezone_index_lock = threading.Lock()
+
+
+def load_timezone_index():
+    global _timezone_index
+    if _timezone_index is None:
+        with _timezone_index_lock:
+            if _timezone_index is None:
+                if not os.path.exists(TIMEZONES_PATH):
+                    raise ValueError("Timezone index not built (run scripts/build_timezones.py)")
+                _timezone_index = TimezoneIndex()
+    return _timezone_index
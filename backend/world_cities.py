@@ -1,84 +1,198 @@
-cities = [
-    {"name": "New York", "country": "USA", "lat": 40.7128, "lon": -74.0060},
-    {"name": "London", "country": "UK", "lat": 51.5074, "lon": -0.1278},
-    {"name": "Tokyo", "country": "Japan", "lat": 35.6762, "lon": 139.6503},
-    {"name": "Paris", "country": "France", "lat": 48.8566, "lon": 2.3522},
-    {"name": "Sydney", "country": "Australia", "lat": -33.8688, "lon": 151.2093},
-    {"name": "Los Angeles", "country": "USA", "lat": 34.0522, "lon": -118.2437},
-    {"name": "Chicago", "country": "USA", "lat": 41.8781, "lon": -87.6298},
-    {"name": "Toronto", "country": "Canada", "lat": 43.6532, "lon": -79.3832},
-    {"name": "Vancouver", "country": "Canada", "lat": 49.2827, "lon": -123.1207},
-    {"name": "Berlin", "country": "Germany", "lat": 52.5200, "lon": 13.4050},
-    {"name": "Rome", "country": "Italy", "lat": 41.9028, "lon": 12.4964},
-    {"name": "Madrid", "country": "Spain", "lat": 40.4168, "lon": -3.7038},
-    {"name": "Moscow", "country": "Russia", "lat": 55.7558, "lon": 37.6173},
-    {"name": "Beijing", "country": "China", "lat": 39.9042, "lon": 116.4074},
-    {"name": "Shanghai", "country": "China", "lat": 31.2304, "lon": 121.4737},
-    {"name": "Hong Kong", "country": "China", "lat": 22.3193, "lon": 114.1694},
-    {"name": "Singapore", "country": "Singapore", "lat": 1.3521, "lon": 103.8198},
-    {"name": "Bangkok", "country": "Thailand", "lat": 13.7563, "lon": 100.5018},
-    {"name": "Dubai", "country": "UAE", "lat": 25.2048, "lon": 55.2708},
-    {"name": "Mumbai", "country": "India", "lat": 19.0760, "lon": 72.8777},
-    {"name": "New Delhi", "country": "India", "lat": 28.6139, "lon": 77.2090},
-    {"name": "Cairo", "country": "Egypt", "lat": 30.0444, "lon": 31.2357},
-    {"name": "Johannesburg", "country": "South Africa", "lat": -26.2041, "lon": 28.0473},
-    {"name": "Cape Town", "country": "South Africa", "lat": -33.9249, "lon": 18.4241},
-    {"name": "Rio de Janeiro", "country": "Brazil", "lat": -22.9068, "lon": -43.1729},
-    {"name": "Sao Paulo", "country": "Brazil", "lat": -23.5505, "lon": -46.6333},
-    {"name": "Buenos Aires", "country": "Argentina", "lat": -34.6037, "lon": -58.3816},
-    {"name": "Mexico City", "country": "Mexico", "lat": 19.4326, "lon": -99.1332},
-    {"name": "Istanbul", "country": "Turkey", "lat": 41.0082, "lon": 28.9784},
-    {"name": "Seoul", "country": "South Korea", "lat": 37.5665, "lon": 126.9780},
-    {"name": "Jakarta", "country": "Indonesia", "lat": -6.2088, "lon": 106.8456},
-    {"name": "Kuala Lumpur", "country": "Malaysia", "lat": 3.1390, "lon": 101.6869},
-    {"name": "Manila", "country": "Philippines", "lat": 14.5995, "lon": 120.9842},
-    {"name": "Auckland", "country": "New Zealand", "lat": -36.8485, "lon": 174.7633},
-    {"name": "Wellington", "country": "New Zealand", "lat": -41.2865, "lon": 174.7762},
-    {"name": "Honolulu", "country": "USA", "lat": 21.3069, "lon": -157.8583},
-    {"name": "Anchorage", "country": "USA", "lat": 61.2181, "lon": -149.9003},
-    {"name": "Reykjavik", "country": "Iceland", "lat": 64.1466, "lon": -21.9426},
-    {"name": "Dublin", "country": "Ireland", "lat": 53.3498, "lon": -6.2603},
-    {"name": "Lisbon", "country": "Portugal", "lat": 38.7223, "lon": -9.1393},
-    {"name": "Athens", "country": "Greece", "lat": 37.9838, "lon": 23.7275},
-    {"name": "Tel Aviv", "country": "Israel", "lat": 32.0853, "lon": 34.7818},
-    {"name": "Nairobi", "country": "Kenya", "lat": -1.2921, "lon": 36.8219},
-    {"name": "Lagos", "country": "Nigeria", "lat": 6.5244, "lon": 3.3792},
-    {"name": "Casablanca", "country": "Morocco", "lat": 33.5731, "lon": -7.5898},
-    {"name": "Santiago", "country": "Chile", "lat": -33.4489, "lon": -70.6693},
-    {"name": "Lima", "country": "Peru", "lat": -12.0464, "lon": -77.0428},
-    {"name": "Bogota", "country": "Colombia", "lat": 4.7110, "lon": -74.0721},
-    {"name": "Caracas", "country": "Venezuela", "lat": 10.4806, "lon": -66.9036},
-    {"name": "San Francisco", "country": "USA", "lat": 37.7749, "lon": -122.4194},
-    {"name": "Seattle", "country": "USA", "lat": 47.6062, "lon": -122.3321},
-    {"name": "Miami", "country": "USA", "lat": 25.7617, "lon": -80.1918},
-    {"name": "Boston", "country": "USA", "lat": 42.3601, "lon": -71.0589},
-    {"name": "Denver", "country": "USA", "lat": 39.7392, "lon": -104.9903},
-    {"name": "Houston", "country": "USA", "lat": 29.7604, "lon": -95.3698},
-    {"name": "Atlanta", "country": "USA", "lat": 33.7490, "lon": -84.3880},
-    {"name": "Montreal", "country": "Canada", "lat": 45.5017, "lon": -73.5673},
-    {"name": "Vienna", "country": "Austria", "lat": 48.2082, "lon": 16.3738},
-    {"name": "Zurich", "country": "Switzerland", "lat": 47.3769, "lon": 8.5417},
-    {"name": "Amsterdam", "country": "Netherlands", "lat": 52.3676, "lon": 4.9041},
-    {"name": "Brussels", "country": "Belgium", "lat": 50.8503, "lon": 4.3517},
-    {"name": "Copenhagen", "country": "Denmark", "lat": 55.6761, "lon": 12.5683},
-    {"name": "Stockholm", "country": "Sweden", "lat": 59.3293, "lon": 18.0686},
-    {"name": "Oslo", "country": "Norway", "lat": 59.9139, "lon": 10.7522},
-    {"name": "Helsinki", "country": "Finland", "lat": 60.1699, "lon": 24.9384},
-    {"name": "Warsaw", "country": "Poland", "lat": 52.2297, "lon": 21.0122},
-    {"name": "Prague", "country": "Czech Republic", "lat": 50.0755, "lon": 14.4378},
-    {"name": "Budapest", "country": "Hungary", "lat": 47.4979, "lon": 19.0402},
-    {"name": "Bucharest", "country": "Romania", "lat": 44.4268, "lon": 26.1025},
-    {"name": "Kiev", "country": "Ukraine", "lat": 50.4501, "lon": 30.5234},
-    {"name": "St. Petersburg", "country": "Russia", "lat": 59.9343, "lon": 30.3351},
-    {"name": "Tehran", "country": "Iran", "lat": 35.6892, "lon": 51.3890},
-    {"name": "Baghdad", "country": "Iraq", "lat": 33.3152, "lon": 44.3661},
-    {"name": "Riyadh", "country": "Saudi Arabia", "lat": 24.7136, "lon": 46.6753},
-    {"name": "Karachi", "country": "Pakistan", "lat": 24.8607, "lon": 67.0011},
-    {"name": "Dhaka", "country": "Bangladesh", "lat": 23.8103, "lon": 90.4125},
-    {"name": "Ho Chi Minh City", "country": "Vietnam", "lat": 10.8231, "lon": 106.6297},
-    {"name": "Taipei", "country": "Taiwan", "lat": 25.0330, "lon": 121.5654},
-    {"name": "Osaka", "country": "Japan", "lat": 34.6937, "lon": 135.5023},
-    {"name": "Perth", "country": "Australia", "lat": -31.9505, "lon": 115.8605},
-    {"name": "Melbourne", "country": "Australia", "lat": -37.8136, "lon": 144.9631},
-    {"name": "Brisbane", "country": "Australia", "lat": -27.4698, "lon": 153.0251}
-]
+import csv
+import gzip
+import os
+import re
+import threading
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# Offline gazetteer.
+# backend/data/gazetteer.tsv.gz holds every GeoNames place with population >= 15000
+# (name, admin1, country, coordinates, population, timezone and Latin-script aliases,
+# with the name and aliases stored pre-normalized) and backend/data/countries.tsv
+# the country table. Both are rebuilt with
+# scripts/build_gazetteer.py. They are loaded once per process into a hash index
+# keyed on accent- and case-folded names, so forward lookups never touch the network.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+GAZETTEER_PATH = os.path.join(DATA_DIR, 'gazetteer.tsv.gz')
+COUNTRIES_PATH = os.path.join(DATA_DIR, 'countries.tsv')
+
+class GeocodingError(Exception):
+    pass
+
+
+class LocationNotFoundError(GeocodingError):
+    # Neither the gazetteer nor Nominatim know the place.
+    pass
+
+
+class GeocoderUnavailableError(GeocodingError):
+    # Not in the gazetteer, and Nominatim timed out or failed.
+    pass
+
+
+Place = namedtuple('Place', [
+    'name', 'key', 'admin1', 'admin1_code', 'country_code', 'latitude', 'longitude', 'population', 'timezone'
+])
+
+# Common ways people (and the frontend country list) write countries that GeoNames
+# doesn't carry as the official short name.
+COUNTRY_ALIASES = {
+    "usa": "US", "us": "US", "u s a": "US", "u s": "US", "america": "US",
+    "united states of america": "US",
+    "uk": "GB", "u k": "GB", "great britain": "GB", "britain": "GB",
+    "england": "GB", "scotland": "GB", "wales": "GB", "northern ireland": "GB",
+    "uae": "AE", "emirates": "AE",
+    "czech republic": "CZ", "czechia czech republic": "CZ",
+    "burma": "MM", "myanmar formerly burma": "MM",
+    "palestine": "PS", "palestine state": "PS", "state of palestine": "PS",
+    "congo congo brazzaville": "CG", "congo brazzaville": "CG", "congo": "CG",
+    "congo kinshasa": "CD", "drc": "CD", "dr congo": "CD",
+    "vatican city": "VA", "holy see": "VA",
+    "timor leste": "TL", "east timor": "TL",
+    "cote d ivoire": "CI", "cote divoire": "CI",
+    "korea": "KR", "republic of korea": "KR",
+    "cape verde": "CV", "swaziland": "SZ", "macedonia": "MK",
+    "netherlands": "NL", "holland": "NL",
+    "turkiye": "TR", "russian federation": "RU",
+    "federated states of micronesia": "FM",
+    # Endonyms
+    "brasil": "BR", "deutschland": "DE", "espana": "ES", "italia": "IT", "osterreich": "AT",
+    "schweiz": "CH", "suisse": "CH", "sverige": "SE", "norge": "NO", "danmark": "DK",
+    "suomi": "FI", "polska": "PL", "nederland": "NL", "belgique": "BE", "nippon": "JP",
+}
+
+_ABBREVIATIONS = {"st": "saint", "ste": "sainte", "mt": "mount", "ft": "fort"}
+_PUNCTUATION = re.compile(r"[\s\-_,.'`’/()]+")
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(value):
+    # "São Paulo", "sao-paulo" and " SAO PAULO " all map to "sao paulo";
+    # "St. Louis" and "Saint Louis" both map to "saint louis".
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", str(value))
+    value = "".join(c for c in value if not unicodedata.combining(c)).casefold()
+    value = value.replace("ß", "ss").replace("ø", "o").replace("æ", "ae").replace("ł", "l").replace("đ", "d")
+    tokens = _PUNCTUATION.sub(" ", value).split()
+    return " ".join(_ABBREVIATIONS.get(t, t) for t in tokens)
+
+
+class Gazetteer:
+    def __init__(self, places, countries, aliases=()):
+        # aliases: (place index, [normalized alias, ...]) pairs
+        self.places = places
+        self.countries = countries
+
+        # name -> place indices, most populous first. Primary names are kept
+        # separate from aliases so "Colonia" finds Colonia before Cologne.
+        self._names = {}
+        self._aliases = {}
+        # (country, admin1) -> place indices, most populous first
+        self._admin1 = {}
+        self._country_codes = {}
+        self._admin1_keys = [(normalize_name(p.admin1), normalize_name(p.admin1_code)) for p in places]
+
+        order = sorted(range(len(places)), key=lambda i: -places[i].population)
+        for i in order:
+            place = places[i]
+            self._names.setdefault(place.key, []).append(i)
+            admin1_name, admin1_code = self._admin1_keys[i]
+            self._admin1.setdefault((place.country_code, admin1_name), []).append(i)
+            if admin1_code:
+                self._admin1.setdefault((place.country_code, admin1_code), []).append(i)
+        for i, names in aliases:
+            for alias in names:
+                self._aliases.setdefault(alias, []).append(i)
+        for bucket in self._aliases.values():
+            bucket.sort(key=lambda i: -places[i].population)
+
+        for code, iso3, name in countries:
+            for key in (code, iso3, name):
+                self._country_codes[normalize_name(key)] = code
+        for alias, code in COUNTRY_ALIASES.items():
+            self._country_codes[alias] = code
+
+    def country_code(self, country):
+        key = normalize_name(country)
+        if not key:
+            return None
+        code = self._country_codes.get(key)
+        if code is None and " " in key:
+            # "Myanmar (formerly Burma)" style labels: try the leading words.
+            code = self._country_codes.get(key.split(" ")[0])
+        return code
+
+    def _pick(self, candidates, code, state_key):
+        # Most populous namesake in the country and, when one is given, the state.
+        # If no namesake is in that state the place isn't in the gazetteer
+        # (Springfield, Vermont is too small): None, so the caller goes on to
+        # Nominatim instead of answering with Springfield, Missouri.
+        for i in candidates:
+            place = self.places[i]
+            if code and place.country_code != code:
+                continue
+            if not state_key or state_key in self._admin1_keys[i]:
+                return place
+        return None
+
+    def lookup(self, city, country=None, state=None):
+        key = normalize_name(city)
+        if not key:
+            return None
+        code = self.country_code(country)
+        if country and code is None:
+            # A country we can't identify shouldn't silently match a namesake
+            # on another continent.
+            return None
+        state_key = normalize_name(state)
+        place = self._pick(self._names.get(key, ()), code, state_key)
+        if place is None:
+            place = self._pick(self._aliases.get(key, ()), code, state_key)
+        return place
+
+    def lookup_admin1(self, state, country):
+        # Largest place of a state/province, used when the city itself is unknown.
+        code = self.country_code(country)
+        if not code:
+            return None
+        candidates = self._admin1.get((code, normalize_name(state)))
+        return self.places[candidates[0]] if candidates else None
+
+
+def _read_countries(path):
+    countries = []
+    with open(path, encoding='utf-8') as f:
+        for row in csv.DictReader(f, delimiter='\t'):
+            countries.append((row['iso'], row['iso3'], row['name']))
+    return countries
+
+
+def _read_places(path):
+    places = []
+    alias_rows = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        next(reader)
+        for name, key, admin1, admin1_code, cc, lat, lon, population, tz, aliases in reader:
+            places.append(Place(name, key, admin1, admin1_code, cc, float(lat), float(lon), int(population), tz))
+            if aliases:
+                alias_rows.append((len(places) - 1, aliases.split('|')))
+    return places, alias_rows
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def load_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                places, aliases = _read_places(GAZETTEER_PATH)
+                _gazetteer = Gazetteer(places, _read_countries(COUNTRIES_PATH), aliases)
+    return _gazetteer
@@ -0,0 +1,312 @@
+"""
+Microbenchmarks for the astro_service entry points, with no network.
+
+Nominatim is replaced by a deterministic stand-in, and the geocode cache and
+rate limiter use a throwaway SQLite file. Each case runs a fixed, seeded set of
+inputs. The chart memo is cleared before every call unless the case is about
+the memo. Reported per case:
+  - latency p50/p95/p99/mean/max in milliseconds
+  - median time per stage: parse (datetime and Time), geocode, ephemeris
+    (engine and fast fits), and formatting (everything else). calculate_report
+    runs sections on threads, so its stage times overlap and can exceed the total.
+  - peak and retained traced allocations per call (tracemalloc, separate pass)
+  - peak RSS of the process after the case
+
+Usage:
+    python scripts/benchmark.py [--iterations N] [--only NAME ...]
+                                [--save results.json] [--compare baseline.json]
+                                [--fail-threshold PCT]
+
+--compare prints p50/p95 changes against a saved run. With --fail-threshold it
+exits with status 1 if any case's p50 got slower by more than PCT percent.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before the backend reads them at import time.
+_scratch = tempfile.mkdtemp(prefix="geoastro_bench_")
+os.environ["GEOCODE_CACHE_PATH"] = os.path.join(_scratch, "geocode_cache.sqlite3")
+os.environ["NOMINATIM_RATE"] = "1000000"
+os.environ["NOMINATIM_BURST"] = "1000000"
+
+import numpy as np
+
+from backend import astro_service
+from backend.ephemeris import get_context
+from backend.fast_ephemeris import load_fast_ephemeris
+from backend.world_cities import load_gazetteer
+from backend.reverse_geocoder import load_reverse_geocoder
+
+StubLocation = namedtuple("StubLocation", ["latitude", "longitude"])
+
+
+class StubGeolocator:
+    # Stands in for geopy's Nominatim: every query resolves to a fixed point
+    # derived from its text, so runs are repeatable and never touch the network.
+    def __init__(self):
+        self.calls = 0
+
+    def geocode(self, query, timeout=None):
+        self.calls += 1
+        h = zlib.crc32(query.encode("utf-8"))
+        return StubLocation((h % 14000) / 100.0 - 70.0, (h // 14000 % 36000) / 100.0 - 180.0)
+
+
+class StageTimer:
+    # Wraps the functions each stage goes through and adds up their time per call.
+    def __init__(self):
+        self.current = {}
+        self._patches = []
+
+    def wrap(self, owner, name, stage):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.current[stage] = self.current.get(stage, 0.0) + time.perf_counter() - start
+
+        setattr(owner, name, timed)
+        self._patches.append((owner, name, original))
+
+    def install(self):
+        ctx = get_context()
+        self.wrap(astro_service, "get_lat_lon", "geocode")
+        self.wrap(astro_service, "parse_datetime", "parse")
+        self.wrap(ctx.ts, "from_datetime", "parse")
+        self.wrap(ctx.engine, "observe", "ephemeris")
+        self.wrap(load_fast_ephemeris(), "observe", "ephemeris")
+        # The reverse lookup in perfect alignment is offline geocoding too.
+        self.wrap(load_reverse_geocoder(), "reverse", "geocode")
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patches):
+            setattr(owner, name, original)
+        self._patches = []
+
+
+def birth_inputs(count, seed):
+    # Dates spread over the ephemeris span at gazetteer cities, so geocoding is
+    # offline and every chart is different.
+    rng = random.Random(seed)
+    cities = [
+        ("New York", "USA", "NY"), ("London", "United Kingdom", ""), ("Sao Paulo", "Brazil", "SP"),
+        ("Tokyo", "Japan", ""), ("Sydney", "Australia", "NSW"), ("Cairo", "Egypt", ""),
+        ("Mumbai", "India", ""), ("Berlin", "Germany", ""),
+    ]
+    start = datetime(1905, 1, 1)
+    span = (datetime(2045, 1, 1) - start).total_seconds()
+    inputs = []
+    for _ in range(count):
+        city, country, state = rng.choice(cities)
+        dt = start + timedelta(seconds=rng.randrange(int(span)))
+        inputs.append((city, country, state, dt.strftime("%Y-%m-%d"), dt.strftime("%H:%M:%S")))
+    return inputs
+
+
+def build_cases(iterations, seed):
+    births = birth_inputs(iterations, seed)
+    ny = births[0]
+    stub_queries = [(f"Stubtown {i}", "Atlantis", "") for i in range(iterations)]
+
+    def astronomy(precision):
+        return lambda i: astro_service.calculate_astronomy(
+            births[i][0], births[i][1], births[i][3], births[i][4], births[i][2], precision)
+
+    def solar_return(precision):
+        return lambda i: astro_service.calculate_solar_return(
+            births[i][3], births[i][4], 2030, births[i][0], births[i][1], births[i][2], precision)
+
+    def alignment(i):
+        city, country, state, date, clock = births[i]
+        return astro_service.calculate_perfect_alignment(date, clock, city, country, state, "2030-06-01T12:00:00Z")
+
+    def arroyo(precision):
+        return lambda i: astro_service.calculate_arroyo_analysis(
+            births[i][3], births[i][4], births[i][0], births[i][1], births[i][2], precision)
+
+    def report(i):
+        city, country, state, date, clock = births[i]
+        birth = {"city": city, "country": country, "state": state, "date": date, "time": clock}
+        current = {"city": "London", "country": "United Kingdom", "state": "", "date": "2026-10-16",
+                   "time": f"12:{i % 60:02d}:00"}
+        return astro_service.calculate_report(birth, current)
+
+    def geocode_stub(i):
+        # Cache cleared first, so this goes through the stand-in every time.
+        astro_service.geocode_cache.clear()
+        return astro_service.get_lat_lon(*stub_queries[i])
+
+    def memo_hit(i):
+        return astro_service.calculate_astronomy(ny[0], ny[1], ny[3], ny[4], ny[2])
+
+    # name -> (function of the iteration index, clear the chart memo first)
+    return {
+        "get_lat_lon[gazetteer]": (lambda i: astro_service.get_lat_lon(births[i][0], births[i][1], births[i][2]),
+                                   False),
+        "get_lat_lon[cache]": (lambda i: astro_service.get_lat_lon("Stubtown 0", "Atlantis", ""), False),
+        "get_lat_lon[stub-nominatim]": (geocode_stub, False),
+        "calculate_astronomy": (astronomy("full"), True),
+        "calculate_astronomy[fast]": (astronomy("fast"), True),
+        "calculate_astronomy[memo-hit]": (memo_hit, False),
+        "calculate_solar_return": (solar_return("full"), True),
+        "calculate_solar_return[fast]": (solar_return("fast"), True),
+        "calculate_perfect_alignment": (alignment, True),
+        "calculate_arroyo_analysis": (arroyo("full"), True),
+        "calculate_arroyo_analysis[fast]": (arroyo("fast"), True),
+        "calculate_report": (report, True),
+    }
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1e3
+
+
+def run_case(fn, clear_memo, iterations, warmup, alloc_iterations, timer):
+    for i in range(warmup):
+        fn(i % iterations)
+
+    latencies = []
+    stages = {"parse": [], "geocode": [], "ephemeris": [], "formatting": []}
+    for i in range(iterations):
+        if clear_memo:
+            astro_service.chart_cache.clear()
+        timer.current = {}
+        start = time.perf_counter()
+        fn(i)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        measured = 0.0
+        for stage in ("parse", "geocode", "ephemeris"):
+            seconds = timer.current.get(stage, 0.0)
+            stages[stage].append(seconds)
+            measured += seconds
+        stages["formatting"].append(max(elapsed - measured, 0.0))
+
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    for i in range(alloc_iterations):
+        if clear_memo:
+            astro_service.chart_cache.clear()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn(i % iterations)
+        after, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(after - before)
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": float(np.mean(latencies)) * 1e3,
+        "max_ms": float(np.max(latencies)) * 1e3,
+        "stages_p50_ms": {stage: percentile(values, 50) for stage, values in stages.items()},
+        "alloc_peak_kb": float(np.median(peaks)) / 1024 if peaks else None,
+        "alloc_retained_kb": float(np.median(retained)) / 1024 if retained else None,
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2),
+    }
+
+
+def print_results(results):
+    print(f"{'case':34} {'p50':>8} {'p95':>8} {'p99':>8}  {'parse':>7} {'geo':>7} {'eph':>7} {'fmt':>7}  {'peak KB':>8} {'RSS MB':>7}")
+    for name, r in results.items():
+        s = r["stages_p50_ms"]
+        print(f"{name:34} {r['p50_ms']:8.3f} {r['p95_ms']:8.3f} {r['p99_ms']:8.3f}  "
+              f"{s['parse']:7.3f} {s['geocode']:7.3f} {s['ephemeris']:7.3f} {s['formatting']:7.3f}  "
+              f"{r['alloc_peak_kb']:8.1f} {r['peak_rss_mb']:7.1f}")
+
+
+def compare(results, baseline, fail_threshold):
+    print(f"\n{'case':34} {'p50 base':>9} {'p50 now':>9} {'change':>8}   {'p95 base':>9} {'p95 now':>9} {'change':>8}")
+    regressions = []
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:34} (not in baseline)")
+            continue
+        p50 = (r["p50_ms"] / base["p50_ms"] - 1) * 100
+        p95 = (r["p95_ms"] / base["p95_ms"] - 1) * 100
+        print(f"{name:34} {base['p50_ms']:9.3f} {r['p50_ms']:9.3f} {p50:+7.1f}%   "
+              f"{base['p95_ms']:9.3f} {r['p95_ms']:9.3f} {p95:+7.1f}%")
+        if fail_threshold is not None and p50 > fail_threshold:
+            regressions.append(name)
+    if regressions:
+        print(f"\nSlower than baseline by more than {fail_threshold}% (p50): {', '.join(regressions)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", nargs="*", help="run only cases whose name starts with one of these")
+    parser.add_argument("--save", help="write results as JSON")
+    parser.add_argument("--compare", help="compare with results saved by --save")
+    parser.add_argument("--fail-threshold", type=float, help="p50 slowdown in percent that fails --compare")
+    args = parser.parse_args()
+
+    astro_service.geolocator = StubGeolocator()
+    start = time.perf_counter()
+    get_context()
+    load_gazetteer()
+    load_reverse_geocoder()
+    load_fast_ephemeris()
+    print(f"Loaded data in {time.perf_counter() - start:.2f}s")
+    # So get_lat_lon[cache] finds its entry.
+    astro_service.get_lat_lon("Stubtown 0", "Atlantis", "")
+
+    timer = StageTimer()
+    timer.install()
+    results = {}
+    try:
+        for name, (fn, clear_memo) in build_cases(args.iterations, args.seed).items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            results[name] = run_case(fn, clear_memo, args.iterations, args.warmup, args.alloc_iterations, timer)
+    finally:
+        timer.uninstall()
+
+    print_results(results)
+    run = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.fail_threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
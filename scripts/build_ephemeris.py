@@ -0,0 +1,164 @@
+"""
+Build the trimmed ephemeris the API loads by default: backend/data/ephemeris.bsp
+plus ephemeris.engine.npy/.json, the position engine's coefficient block.
+
+The kernel is an excerpt of --source (any JPL type-2 SPK such as de421.bsp or
+de440.bsp) holding only the segments the chart bodies need (backend/ephemeris.py
+BODIES and the Earth) over --start..--end, clipped to what the source covers.
+The engine block is the padded (records, 3, coefficients) array that
+backend/positions.py otherwise builds in every worker; the API memory-maps it
+read-only, so all uvicorn and chart-pool workers on a host share one copy
+through the page cache, as they already do for the kernel itself.
+
+With --workers N (default 4) it then starts N processes at once for the source
+(engine built in memory) and for the trimmed kernel (engine mapped) and prints
+their startup time and per-process RSS, PSS (shared pages split between the
+processes) and private memory.
+
+Usage:
+    python scripts/build_ephemeris.py [--source de421.bsp] [--start 1850] [--end 2150]
+                                      [--output backend/data/ephemeris.bsp] [--workers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jplephem.excerpter import write_excerpt
+from skyfield.api import load
+
+from backend.ephemeris import BODIES, EPHEMERIS_FILE, TRIMMED_EPHEMERIS_PATH, EphemerisContext, engine_block_path
+
+MEMORY_FIELDS = ['Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty']
+
+
+def needed_segments(eph):
+    # (center, target) of every segment on the chart bodies' and the Earth's chains.
+    keys = set()
+    for target in [target for _, target in BODIES] + ['earth']:
+        body = eph[target]
+        for function in getattr(body, 'vector_functions', [body]):
+            keys.add((function.spk_segment.center, function.spk_segment.target))
+    return keys
+
+
+def excerpt(source, output, start_year, end_year):
+    ts = load.timescale()
+    eph = load(source)
+    keys = needed_segments(eph)
+    segments = [s for s in eph.spk.segments if (s.center, s.target) in keys]
+    start_jd = max(ts.utc(start_year, 1, 1).tdb, max(s.start_jd for s in segments))
+    end_jd = min(ts.utc(end_year + 1, 1, 1).tdb, min(s.end_jd for s in segments))
+    summaries = [(name, values) for name, values in eph.spk.daf.summaries()
+                 if (int(values[3]), int(values[2])) in keys]
+
+    with open(output + '.tmp', 'w+b') as f:
+        write_excerpt(eph.spk, f, start_jd, end_jd, summaries)
+    os.replace(output + '.tmp', output)
+    print(f"{output}: {len(summaries)} of {len(eph.spk.segments)} segments, "
+          f"{ts.tdb_jd(start_jd).utc_strftime('%Y-%m-%d')} to {ts.tdb_jd(end_jd).utc_strftime('%Y-%m-%d')}, "
+          f"{os.path.getsize(source) / 1e6:.1f} MB -> {os.path.getsize(output) / 1e6:.1f} MB")
+
+
+def build_block(kernel):
+    ctx = EphemerisContext(kernel, mmap_engine=False)
+    path = engine_block_path(kernel)
+    ctx.engine.save_block(path)
+    print(f"{path}: {ctx.engine.coefficients.shape} float64, {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+def memory():
+    # kB per smaps_rollup field for this process (Linux).
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            lines = [line.split() for line in f]
+    except OSError:
+        return {}
+    return {fields[0].rstrip(':'): int(fields[1]) for fields in lines if fields[0].rstrip(':') in MEMORY_FIELDS}
+
+
+def probe(kernel, mapped):
+    # One simulated worker: load the context, fault in the whole engine block, wait
+    # until every sibling has done the same, then report its memory.
+    start = time.perf_counter()
+    ctx = EphemerisContext(kernel, mmap_engine=mapped)
+    seconds = time.perf_counter() - start
+    float(np.asarray(ctx.engine.coefficients).sum())
+    print(json.dumps({"startup_seconds": seconds, "mapped": ctx.engine.block_path is not None}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps(memory()), flush=True)
+
+
+def measure(kernel, mapped, workers):
+    command = [sys.executable, os.path.abspath(__file__), '--probe', kernel] + ([] if mapped else ['--private'])
+    processes = [subprocess.Popen(command, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    ready = [json.loads(_last_json(process)) for process in processes]
+    for process in processes:
+        process.stdin.write("\n")
+        process.stdin.flush()
+    usage = [json.loads(_last_json(process)) for process in processes]
+    for process in processes:
+        process.wait()
+    return {
+        "kernel": kernel,
+        "mapped": all(r["mapped"] for r in ready),
+        "startup_seconds": float(np.mean([r["startup_seconds"] for r in ready])),
+        **{field: float(np.mean([u.get(field, 0) for u in usage])) / 1024 for field in MEMORY_FIELDS},
+        "total_pss": sum(u.get('Pss', 0) for u in usage) / 1024,
+    }
+
+
+def _last_json(process):
+    # EphemerisContext prints its own status line first; the probe's is JSON.
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("probe process exited early")
+        if line.startswith('{'):
+            return line
+
+
+def report(rows, workers):
+    print(f"\nPer worker, {workers} workers running at once (MB):")
+    print(f"{'':8} {'startup s':>9} {'RSS':>7} {'PSS':>7} {'private':>8} {'shared':>7} {'total PSS':>10}  kernel")
+    for label, row in rows:
+        private = row['Private_Clean'] + row['Private_Dirty']
+        shared = row['Shared_Clean'] + row['Shared_Dirty']
+        print(f"{label:8} {row['startup_seconds']:9.3f} {row['Rss']:7.1f} {row['Pss']:7.1f} {private:8.1f} "
+              f"{shared:7.1f} {row['total_pss']:10.1f}  {row['kernel']}{' (engine mapped)' if row['mapped'] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the trimmed, memory-mapped ephemeris")
+    parser.add_argument('--source', default=os.path.join(ROOT, EPHEMERIS_FILE), help="full SPK kernel")
+    parser.add_argument('--output', default=TRIMMED_EPHEMERIS_PATH)
+    parser.add_argument('--start', type=int, default=1850, help="first year to keep")
+    parser.add_argument('--end', type=int, default=2150, help="last year to keep")
+    parser.add_argument('--workers', type=int, default=4, help="processes for the memory report, 0 to skip it")
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
+    parser.add_argument('--private', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        return probe(args.probe, not args.private)
+    if os.path.abspath(args.source) == os.path.abspath(args.output):
+        parser.error("--output must differ from --source")
+
+    excerpt(args.source, args.output, args.start, args.end)
+    build_block(args.output)
+    if args.workers > 0:
+        rows = [("before", measure(args.source, False, args.workers)),
+                ("after", measure(args.output, True, args.workers))]
+        report(rows, args.workers)
+
+
+if __name__ == '__main__':
+    main()
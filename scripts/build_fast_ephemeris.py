@@ -0,0 +1,115 @@
+"""
+Rebuild backend/data/fast_ephemeris.npy and fast_ephemeris.json, the piecewise
+Chebyshev fits used by the "fast" precision mode (backend/fast_ephemeris.py).
+
+Every body is sampled with the full position engine (the same numbers as
+skyfield's observe().apparent().ecliptic_latlon()) at Chebyshev nodes of fixed
+intervals covering the whole span of the bundled ephemeris, then checked against
+the engine at random instants; the maximum error per body is written into the
+metadata and printed.
+
+Usage:
+    python scripts/build_fast_ephemeris.py [verification samples per body, default 20000]
+"""
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ephemeris import get_context, BODY_NAMES
+from backend.fast_ephemeris import FAST_EPHEMERIS_META_PATH, FAST_EPHEMERIS_PATH, FastEphemeris
+
+# (interval in days, polynomial degree) per body. The fit itself is good to a
+# small fraction of an arcsecond; what remains (a few arcseconds at most) is the
+# sharp solar light-deflection term around conjunctions with the Sun.
+FITS = {
+    'Sun': (32, 12),
+    'Moon': (16, 12),
+    'Mercury': (16, 12),
+    'Venus': (32, 12),
+    'Mars': (32, 12),
+    'Jupiter': (64, 10),
+    'Saturn': (64, 10),
+    'Uranus': (128, 10),
+    'Neptune': (128, 10),
+    'Pluto': (128, 10),
+}
+CHUNK = 20000
+
+
+def sample(ctx, name, tt):
+    longitude, latitude = [], []
+    for i in range(0, len(tt), CHUNK):
+        positions = ctx.engine.observe(ctx.ts.tt_jd(tt[i:i + CHUNK]), names=[name])
+        longitude.append(positions.longitude[0])
+        latitude.append(positions.latitude[0])
+    return np.concatenate(longitude), np.concatenate(latitude)
+
+
+def fit_body(ctx, name, start_jd, end_jd, interval, degree):
+    nodes = np.cos(np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1))[::-1]
+    # c_j = 2/(n+1) * sum_k f(x_k) T_j(x_k), with c_0 halved.
+    transform = np.cos(np.outer(np.arange(degree + 1), np.arccos(nodes))) * 2.0 / (degree + 1)
+    transform[0] /= 2.0
+
+    records = int((end_jd - start_jd) // interval)
+    starts = start_jd + interval * np.arange(records)
+    tt = (starts[:, None] + (nodes[None, :] + 1.0) / 2.0 * interval).ravel()
+    longitude, latitude = sample(ctx, name, tt)
+    longitude = np.unwrap(longitude.reshape(records, degree + 1), period=360.0, axis=1)
+    latitude = latitude.reshape(records, degree + 1)
+    return np.stack([longitude @ transform.T, latitude @ transform.T], axis=1)
+
+
+def main(samples):
+    ctx = get_context()
+    # Keep a day of margin for light time at both ends of the kernel.
+    start_jd = math.ceil(ctx.engine.start_jd) + 1.0
+    end_jd = math.floor(ctx.engine.end_jd) - 1.0
+    width = max(degree for _, degree in FITS.values()) + 1
+
+    blocks, bodies = [], []
+    offset = 0
+    for name in BODY_NAMES:
+        interval, degree = FITS[name]
+        coefficients = fit_body(ctx, name, start_jd, end_jd, interval, degree)
+        block = np.zeros((len(coefficients), 2, width))
+        block[:, :, :degree + 1] = coefficients
+        blocks.append(block)
+        bodies.append({"name": name, "offset": offset, "records": len(coefficients),
+                       "interval_days": interval, "degree": degree})
+        offset += len(coefficients)
+        print(f"{name}: {len(coefficients)} records of {interval} days, degree {degree}")
+
+    # Whole records only, so the span ends where the coarsest fit does.
+    end_jd = start_jd + min(body["records"] * body["interval_days"] for body in bodies)
+    # float32 keeps the file small; rounding adds well under 0.1 arcsecond.
+    np.save(FAST_EPHEMERIS_PATH, np.concatenate(blocks).astype(np.float32))
+    meta = {"start_jd": start_jd, "end_jd": end_jd, "time_scale": "TT",
+            "frame": "ecliptic J2000, apparent geocentric", "bodies": bodies}
+    with open(FAST_EPHEMERIS_META_PATH, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    # Verify against the full engine at random instants.
+    fast = FastEphemeris()
+    rng = np.random.default_rng(0)
+    tt = rng.uniform(start_jd, end_jd, samples)
+    for body in bodies:
+        lon, lat = fast.observe(tt, names=[body["name"]])
+        ref_lon, ref_lat = sample(ctx, body["name"], tt)
+        dlon = (lon[0] - ref_lon + 180.0) % 360.0 - 180.0
+        error = max(np.abs(dlon * np.cos(np.radians(ref_lat))).max(), np.abs(lat[0] - ref_lat).max()) * 3600
+        body["max_error_arcsec"] = round(float(error), 4)
+        print(f"{body['name']}: max error {error:.4f} arcsec over {samples} samples")
+    with open(FAST_EPHEMERIS_META_PATH, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    print(f"Wrote {FAST_EPHEMERIS_PATH} ({os.path.getsize(FAST_EPHEMERIS_PATH) / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,113 @@
+"""
+Rebuild backend/data/gazetteer.tsv.gz and backend/data/countries.tsv from the
+GeoNames dumps (https://download.geonames.org/export/dump/):
+
+    cities15000.txt  (unzipped cities15000.zip)
+    admin1CodesASCII.txt
+    countryInfo.txt
+
+Usage:
+    python scripts/build_gazetteer.py /path/to/geonames/dump
+"""
+import csv
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.world_cities import COUNTRIES_PATH, GAZETTEER_PATH, normalize_name
+
+MAX_ALIASES = 24
+ALIAS_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789 ")
+
+
+def alias_keys(name, alternates):
+    # Keep Latin-script exonyms and historic names ("Bombay", "Cologne", "Leningrad"),
+    # already normalized so loading the file doesn't have to fold them again.
+    # Lower-case romanisations and IATA codes ("bmbyy", "BOM") only add collisions.
+    seen = {normalize_name(name)}
+    keys = []
+    for alias in alternates.split(','):
+        if len(alias) < 3 or alias.islower() or (alias.isupper() and len(alias) <= 4):
+            continue
+        key = normalize_name(alias)
+        if not key or key in seen or not set(key) <= ALIAS_CHARS:
+            continue
+        seen.add(key)
+        keys.append(key)
+    return keys[:MAX_ALIASES]
+
+
+def read_admin1(path):
+    names = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            code, name, ascii_name, _ = line.rstrip('\n').split('\t')
+            names[code] = name
+    return names
+
+
+def read_countries(path):
+    countries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            cols = line.rstrip('\n').split('\t')
+            countries.append({
+                "iso": cols[0], "iso3": cols[1], "name": cols[4].strip(),
+                "capital": cols[5], "continent": cols[8],
+            })
+    return countries
+
+
+def main(dump_dir):
+    admin1 = read_admin1(os.path.join(dump_dir, 'admin1CodesASCII.txt'))
+    countries = read_countries(os.path.join(dump_dir, 'countryInfo.txt'))
+
+    rows = []
+    with open(os.path.join(dump_dir, 'cities15000.txt'), encoding='utf-8') as f:
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            name, alternates = cols[1], cols[3]
+            cc, admin1_code = cols[8], cols[10]
+            aliases = alias_keys(name, alternates)
+            rows.append([
+                name,
+                normalize_name(name),
+                admin1.get(f"{cc}.{admin1_code}", ""),
+                admin1_code,
+                cc,
+                f"{float(cols[4]):.5f}",
+                f"{float(cols[5]):.5f}",
+                cols[14] or "0",
+                cols[17],
+                "|".join(aliases),
+            ])
+
+    # Group by country so neighbouring rows compress well.
+    rows.sort(key=lambda r: (r[4], r[3], -int(r[7])))
+
+    os.makedirs(os.path.dirname(GAZETTEER_PATH), exist_ok=True)
+    with gzip.open(GAZETTEER_PATH, 'wt', encoding='utf-8', compresslevel=9) as f:
+        writer = csv.writer(f, delimiter='\t', quoting=csv.QUOTE_NONE, lineterminator='\n')
+        writer.writerow(["name", "key", "admin1", "admin1_code", "country_code", "latitude", "longitude",
+                         "population", "timezone", "aliases"])
+        writer.writerows(rows)
+
+    with open(COUNTRIES_PATH, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["iso", "iso3", "name", "capital", "continent"],
+                                delimiter='\t', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(sorted(countries, key=lambda c: c["iso"]))
+
+    print(f"Wrote {len(rows)} places to {GAZETTEER_PATH} ({os.path.getsize(GAZETTEER_PATH) / 1e6:.2f} MB)")
+    print(f"Wrote {len(countries)} countries to {COUNTRIES_PATH}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1])
@@ -0,0 +1,190 @@
+"""
+Rebuild backend/data/geo_rasters.npz, the land/country/ocean rasters used by
+backend/reverse_geocoder.py.
+
+Inputs:
+    cities1000.txt   GeoNames dump (https://download.geonames.org/export/dump/cities1000.zip),
+                     used to assign every land cell to the country of its nearest place
+    global-land-mask 1 km GLOBE land mask (pip install global-land-mask)
+
+Usage:
+    python scripts/build_geo_rasters.py /path/to/cities1000.txt
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.reverse_geocoder import RASTERS_PATH
+
+LAND_RES = 0.1
+OCEAN_RES = 0.25
+SOUTHERN_OCEAN_LAT = -60.0
+# Land south of this is Antarctica, which has no GeoNames places to vote.
+ANTARCTICA_LAT = -60.0
+
+# Seed points inside each basin. Every water cell is labelled with the basin whose
+# seed it can reach first by water, so coastlines act as the boundaries. Seeds sit
+# on both sides of the main straits (Gibraltar, Skagerrak, Yucatan, Bab-el-Mandeb)
+# so those become the dividing lines.
+OCEAN_SEEDS = [
+    ("Atlantic Ocean", [(45, -35), (25, -45), (5, -30), (-15, -20), (-35, -20), (-50, -40),
+                        (36, -9.5), (60, -25), (40, -65), (20, -60), (-5, -5)]),
+    ("Pacific Ocean", [(40, -160), (30, 160), (10, -120), (0, 180), (-20, -120), (-40, -150),
+                       (-30, 170), (50, -140), (20, 135), (-10, 160), (-50, -90), (30, -125)]),
+    ("Indian Ocean", [(-10, 80), (-30, 70), (-40, 100), (5, 65), (10, 88), (-25, 110),
+                      (-45, 40), (12.5, 48), (-15, 56), (-20, 40)]),
+    ("Arctic Ocean", [(85, 0), (80, -150), (75, 40), (76, 150), (73, -165)]),
+    ("Mediterranean Sea", [(36, -3), (38, 5), (35, 18), (34, 28), (39, 25), (42, 16)]),
+    ("Black Sea", [(43, 34)]),
+    ("Baltic Sea", [(58, 20), (55, 16), (62, 20), (60, 25)]),
+    ("North Sea", [(56, 3), (53, 4), (58, 0)]),
+    ("Caribbean Sea", [(15, -75), (14, -67), (17, -82)]),
+    ("Gulf of Mexico", [(25, -90), (27, -85)]),
+    ("Red Sea", [(20, 38), (26, 35)]),
+    ("Persian Gulf", [(27, 51)]),
+    ("Hudson Bay", [(60, -85)]),
+    ("South China Sea", [(12, 113), (5, 110), (18, 115)]),
+    ("Sea of Japan", [(40, 135)]),
+    ("Bering Sea", [(58, -175)]),
+]
+
+
+def load_ocean_mask():
+    # The GLOBE mask is True for water, north row first, 1/120 degree cells.
+    from global_land_mask import globe
+    return globe._mask[::-1]
+
+
+def block_fraction(mask, factor):
+    rows, cols = mask.shape[0] // factor, mask.shape[1] // factor
+    return mask.reshape(rows, factor, cols, factor).mean(axis=(1, 3))
+
+
+def read_places(path):
+    lat, lon, cc = [], [], []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            lat.append(float(cols[4]))
+            lon.append(float(cols[5]))
+            cc.append(cols[8])
+    return np.array(lat), np.array(lon), np.array(cc)
+
+
+def build_country_raster(land, lat, lon, cc):
+    # Nearest-place country for every land cell, one 1-degree block at a time.
+    codes = sorted(set(cc) | {"AQ"})
+    code_index = {c: i + 1 for i, c in enumerate(codes)}
+    place_code = np.array([code_index[c] for c in cc], dtype=np.uint8)
+
+    blocks = {}
+    bi = np.clip((lat + 90).astype(int), 0, 179)
+    bj = ((lon + 180) % 360).astype(int) % 360
+    for idx, key in enumerate(zip(bi, bj)):
+        blocks.setdefault(key, []).append(idx)
+    blocks = {k: np.array(v) for k, v in blocks.items()}
+
+    per_block = int(round(1 / LAND_RES))
+    country = np.zeros(land.shape, dtype=np.uint8)
+    for i in range(180):
+        for j in range(360):
+            cell_land = land[i * per_block:(i + 1) * per_block, j * per_block:(j + 1) * per_block]
+            if not cell_land.any():
+                continue
+            candidates = []
+            for k in range(1, 60):
+                candidates = [blocks[(ii, jj % 360)]
+                              for ii in range(max(0, i - k), min(179, i + k) + 1)
+                              for jj in range(j - k, j + k + 1)
+                              if (ii, jj % 360) in blocks]
+                if candidates:
+                    break
+            if not candidates:
+                continue
+            idx = np.concatenate(candidates)
+            ci, cj = np.nonzero(cell_land)
+            clat = np.radians(-90 + (i * per_block + ci + 0.5) * LAND_RES)
+            clon = np.radians(-180 + (j * per_block + cj + 0.5) * LAND_RES)
+            plat, plon = np.radians(lat[idx]), np.radians(lon[idx])
+            # Squared chord length is monotonic in great-circle distance.
+            d = (np.cos(clat)[:, None] * np.cos(clon)[:, None] - np.cos(plat) * np.cos(plon)) ** 2 \
+                + (np.cos(clat)[:, None] * np.sin(clon)[:, None] - np.cos(plat) * np.sin(plon)) ** 2 \
+                + (np.sin(clat)[:, None] - np.sin(plat)) ** 2
+            country[i * per_block + ci, j * per_block + cj] = place_code[idx[np.argmin(d, axis=1)]]
+
+    antarctica = int(round((ANTARCTICA_LAT + 90) / LAND_RES))
+    country[:antarctica][land[:antarctica]] = code_index["AQ"]
+    return country, codes
+
+
+def build_ocean_raster(water):
+    rows, cols = water.shape
+    labels = np.where(water, -1, 0).astype(np.int16)
+    names = [""]
+    for name, seeds in OCEAN_SEEDS:
+        names.append(name)
+        for lat, lon in seeds:
+            i = int((lat + 90) / OCEAN_RES)
+            j = int((lon + 180) / OCEAN_RES) % cols
+            if not water[i, j]:
+                raise ValueError(f"Seed {lat}, {lon} for {name} is on land")
+            labels[i, j] = len(names) - 1
+
+    # Multi-source flood fill over water cells (longitude wraps, latitude doesn't).
+    while True:
+        unlabeled = labels == -1
+        grown = False
+        for shift, axis in ((1, 0), (-1, 0), (1, 1), (-1, 1)):
+            neighbour = np.roll(labels, shift, axis=axis)
+            if axis == 0:
+                if shift == 1:
+                    neighbour[0, :] = 0
+                else:
+                    neighbour[-1, :] = 0
+            take = unlabeled & (neighbour > 0)
+            if take.any():
+                labels[take] = neighbour[take]
+                unlabeled &= ~take
+                grown = True
+        if not grown:
+            break
+
+    # Water nobody reached is a lake; it resolves like land.
+    labels[labels < 0] = 0
+    southern = int((SOUTHERN_OCEAN_LAT + 90) / OCEAN_RES)
+    names.append("Southern Ocean")
+    labels[:southern][water[:southern]] = len(names) - 1
+    return labels.astype(np.uint8), names
+
+
+def main(cities_path):
+    ocean_mask = load_ocean_mask()
+    land = block_fraction(ocean_mask, int(round(LAND_RES * 120))) < 0.5
+    water = block_fraction(ocean_mask, int(round(OCEAN_RES * 120))) >= 0.5
+
+    print("Assigning countries to land cells...")
+    country, codes = build_country_raster(land, *read_places(cities_path))
+    print("Labelling ocean basins...")
+    ocean, ocean_names = build_ocean_raster(water)
+
+    np.savez_compressed(
+        RASTERS_PATH,
+        land_res=LAND_RES,
+        land=np.packbits(land, axis=1),
+        country=country,
+        country_codes=np.array([""] + codes),
+        ocean_res=OCEAN_RES,
+        ocean=ocean,
+        ocean_names=np.array(ocean_names),
+    )
+    print(f"Wrote {RASTERS_PATH} ({os.path.getsize(RASTERS_PATH) / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1])
@@ -0,0 +1,92 @@
+"""
+Rebuild backend/data/zodiac_ingresses.npz, the sign ingress index used by
+backend/ingresses.py.
+
+Every body's apparent geocentric ecliptic (J2000) longitude is sampled with the
+full position engine every STEP_DAYS over 1900-2100 (clipped to the ephemeris
+span); each sample pair whose signs differ brackets a crossing, and all crossings
+of a body are then bisected together to TOLERANCE_DAYS. A body near a retrograde
+station crosses a boundary up to three times; each crossing gets its own entry.
+
+Usage:
+    python scripts/build_ingresses.py [first year, default 1900] [last year, default 2100]
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ephemeris import get_context, BODY_NAMES
+from backend.ingresses import INGRESSES_PATH, IngressIndex
+
+# The Moon spends about 2.3 days in a sign; planets never reverse twice within
+# a quarter day, so no crossing pair hides between two samples.
+STEP_DAYS = 0.25
+TOLERANCE_DAYS = 1e-6  # ~0.1 s
+CHUNK = 20000
+
+
+def longitudes(ctx, name, tt):
+    out = []
+    for i in range(0, len(tt), CHUNK):
+        out.append(ctx.engine.observe(ctx.ts.tt_jd(tt[i:i + CHUNK]), names=[name]).longitude[0])
+    return np.concatenate(out)
+
+
+def signs(ctx, name, tt):
+    return (longitudes(ctx, name, tt) // 30.0).astype(np.int64) % 12
+
+
+def crossings(ctx, name, tt, sign):
+    # Bisect every bracket [tt[i], tt[i + 1]] where the sign changes, all at once.
+    brackets = np.nonzero(sign[1:] != sign[:-1])[0]
+    lo, hi = tt[brackets], tt[brackets + 1]
+    before = sign[brackets]
+    while (hi - lo).max() > TOLERANCE_DAYS:
+        mid = (lo + hi) / 2.0
+        same = signs(ctx, name, mid) == before
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    entered = sign[brackets + 1]
+    # One sign forward (mod 12) is direct motion, one back is retrograde.
+    direction = np.where((entered - before) % 12 == 1, 1, -1)
+    return hi, entered, direction
+
+
+def main(first_year, last_year):
+    ctx = get_context()
+    start_jd = max(ctx.ts.utc(first_year, 1, 1).tt, np.ceil(ctx.engine.start_jd) + 1.0)
+    end_jd = min(ctx.ts.utc(last_year + 1, 1, 1).tt, np.floor(ctx.engine.end_jd) - 1.0)
+    tt = np.arange(start_jd, end_jd, STEP_DAYS)
+
+    times, entered, directions, offsets, initial = [], [], [], [0], []
+    for name in BODY_NAMES:
+        sign = signs(ctx, name, tt)
+        initial.append(sign[0])
+        t, s, d = crossings(ctx, name, tt, sign)
+        times.append(t)
+        entered.append(s)
+        directions.append(d)
+        offsets.append(offsets[-1] + len(t))
+        print(f"{name}: {len(t)} ingresses, {(d < 0).sum()} retrograde")
+
+    np.savez_compressed(
+        INGRESSES_PATH,
+        tt=np.concatenate(times),
+        sign=np.concatenate(entered).astype(np.int8),
+        direction=np.concatenate(directions).astype(np.int8),
+        offsets=np.array(offsets, dtype=np.int64),
+        initial=np.array(initial, dtype=np.int8),
+        names=np.array(BODY_NAMES),
+        span=np.array([start_jd, end_jd]),
+    )
+    index = IngressIndex()
+    print(f"Wrote {INGRESSES_PATH} ({os.path.getsize(INGRESSES_PATH) / 1e3:.0f} kB), "
+          f"{ctx.ts.tt_jd(index.start_jd).utc_strftime('%Y-%m-%d')} to "
+          f"{ctx.ts.tt_jd(index.end_jd).utc_strftime('%Y-%m-%d')}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1900, int(sys.argv[2]) if len(sys.argv) > 2 else 2100)
@@ -0,0 +1,79 @@
+"""
+Rebuild backend/data/lunations.npz, the lunation table used by
+backend/lunations.py.
+
+The Moon's phase angle (geocentric ecliptic-of-date longitude of the Moon minus
+that of the Sun, as almanac.moon_phase defines it) is sampled with the full
+position engine every STEP_DAYS over 1900-2100 (clipped to the ephemeris span).
+Every crossing of a multiple of 45 degrees, the boundaries of the eight phase
+names, is then bisected, all at once, to TOLERANCE_DAYS.
+
+Usage:
+    python scripts/build_lunations.py [first year, default 1900] [last year, default 2100]
+"""
+import os
+import sys
+
+import numpy as np
+from skyfield.framelib import ecliptic_frame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ephemeris import get_context
+from backend.lunations import LUNATIONS_PATH, LunationTable
+
+# The phase angle grows 11-15 degrees a day, so a quarter-day step never skips
+# an octant.
+STEP_DAYS = 0.25
+TOLERANCE_DAYS = 1e-6  # ~0.1 s
+CHUNK = 20000
+# New moon of 1923-01-17, Brown lunation 1 (TT Julian date).
+BROWN_LUNATION_1_JD = 2423436.6120
+
+
+def octants(ctx, tt):
+    out = []
+    for i in range(0, len(tt), CHUNK):
+        longitudes = ctx.engine.observe(ctx.ts.tt_jd(tt[i:i + CHUNK]), names=['Sun', 'Moon'],
+                                        frame=ecliptic_frame).longitude
+        out.append(((longitudes[1] - longitudes[0]) % 360.0 // 45.0).astype(np.int64))
+    return np.concatenate(out)
+
+
+def main(first_year, last_year):
+    ctx = get_context()
+    start_jd = max(ctx.ts.utc(first_year, 1, 1).tt, np.ceil(ctx.engine.start_jd) + 1.0)
+    end_jd = min(ctx.ts.utc(last_year + 1, 1, 1).tt, np.floor(ctx.engine.end_jd) - 1.0)
+    tt = np.arange(start_jd, end_jd, STEP_DAYS)
+    octant = octants(ctx, tt)
+
+    brackets = np.nonzero(octant[1:] != octant[:-1])[0]
+    lo, hi = tt[brackets], tt[brackets + 1]
+    before = octant[brackets]
+    while (hi - lo).max() > TOLERANCE_DAYS:
+        mid = (lo + hi) / 2.0
+        same = octants(ctx, mid) == before
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    entered = octant[brackets + 1]
+    if not (((entered - before) % 8) == 1).all():
+        raise RuntimeError("Phase angle skipped an octant; lower STEP_DAYS")
+
+    new_moons = hi[entered == 0]
+    first_lunation = 1 - int(np.argmin(np.abs(new_moons - BROWN_LUNATION_1_JD)))
+    np.savez_compressed(
+        LUNATIONS_PATH,
+        tt=hi,
+        octant=entered.astype(np.int8),
+        first_lunation=np.array(first_lunation),
+        span=np.array([start_jd, end_jd]),
+    )
+    table = LunationTable()
+    print(f"Wrote {LUNATIONS_PATH} ({os.path.getsize(LUNATIONS_PATH) / 1e3:.0f} kB): {len(hi)} phase changes, "
+          f"{len(new_moons)} new moons (lunations {first_lunation} to {first_lunation + len(new_moons) - 1}), "
+          f"{ctx.ts.tt_jd(table.start_jd).utc_strftime('%Y-%m-%d')} to "
+          f"{ctx.ts.tt_jd(table.end_jd).utc_strftime('%Y-%m-%d')}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1900, int(sys.argv[2]) if len(sys.argv) > 2 else 2100)
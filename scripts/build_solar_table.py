@@ -0,0 +1,78 @@
+"""
+Rebuild backend/data/solar_table.npy and solar_table.json, the equation of time
+and solar declination table used by backend/solar_table.py.
+
+The geocentric apparent Sun is computed with the full position engine every
+STEP_DAYS of UT1 over 1900-2100 (clipped to the ephemeris span) and rotated to
+the true equator and equinox of date:
+  equation of time = (Greenwich apparent sidereal time - right ascension + 12h) - UT1
+i.e. apparent minus mean solar time. The table is then checked against the engine
+at random instants; the maximum interpolation errors go into the metadata.
+
+Usage:
+    python scripts/build_solar_table.py [verification samples, default 20000]
+"""
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.ephemeris import get_context
+from backend.solar_table import SOLAR_TABLE_META_PATH, SOLAR_TABLE_PATH, SolarTable
+
+# Linear interpolation over six hours stays below 0.01 s of equation of time and
+# 0.2" of declination; hourly samples would only make the file six times larger.
+STEP_DAYS = 0.25
+FIRST_YEAR, LAST_YEAR = 1900, 2100
+CHUNK = 20000
+
+
+def sample(ctx, ut1):
+    eot, declination = [], []
+    for i in range(0, len(ut1), CHUNK):
+        t = ctx.ts.ut1_jd(ut1[i:i + CHUNK])
+        apparent = ctx.engine.observe(t, names=['Sun']).apparent[:, 0]
+        x, y, z = np.einsum('ijn,jn->in', t.M, apparent)
+        ra_hours = np.degrees(np.arctan2(y, x)) / 15.0
+        mean_hours = (t.ut1 - 0.5) % 1.0 * 24.0
+        minutes = ((t.gast - ra_hours + 12.0 - mean_hours + 12.0) % 24.0 - 12.0) * 60.0
+        eot.append(minutes)
+        declination.append(np.degrees(np.arctan2(z, np.hypot(x, y))))
+    return np.concatenate(eot), np.concatenate(declination)
+
+
+def main(samples):
+    ctx = get_context()
+    start = max(ctx.ts.utc(FIRST_YEAR, 1, 1).ut1, math.ceil(ctx.engine.start_jd) + 1.0)
+    end = min(ctx.ts.utc(LAST_YEAR + 1, 1, 1).ut1, math.floor(ctx.engine.end_jd) - 1.0)
+    ut1 = start + STEP_DAYS * np.arange(int((end - start) / STEP_DAYS) + 1)
+    eot, declination = sample(ctx, ut1)
+    np.save(SOLAR_TABLE_PATH, np.stack([eot, declination], axis=1).astype(np.float32))
+    meta = {"start_jd": float(start), "step_days": STEP_DAYS, "time_scale": "UT1",
+            "columns": ["equation_of_time_minutes", "declination_degrees"],
+            "frame": "apparent geocentric, true equator and equinox of date"}
+    with open(SOLAR_TABLE_META_PATH, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    table = SolarTable()
+    rng = np.random.default_rng(0)
+    check = rng.uniform(table.start_jd, table.end_jd, samples)
+    ref_eot, ref_declination = sample(ctx, check)
+    eot, declination = table.lookup(check)
+    meta["max_error_eot_seconds"] = round(float(np.abs(eot - ref_eot).max() * 60.0), 4)
+    meta["max_error_declination_arcsec"] = round(float(np.abs(declination - ref_declination).max() * 3600.0), 4)
+    with open(SOLAR_TABLE_META_PATH, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+
+    print(f"Wrote {SOLAR_TABLE_PATH} ({os.path.getsize(SOLAR_TABLE_PATH) / 1e6:.2f} MB, {len(ut1)} samples, "
+          f"{ctx.ts.ut1_jd(start).utc_strftime('%Y-%m-%d')} to {ctx.ts.ut1_jd(ut1[-1]).utc_strftime('%Y-%m-%d')}); "
+          f"max error over {samples} samples: {meta['max_error_eot_seconds']} s equation of time, "
+          f"{meta['max_error_declination_arcsec']}\" declination")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
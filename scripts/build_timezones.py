@@ -0,0 +1,161 @@
+"""
+Rebuild backend/data/timezones.npz, the zone raster used by backend/timezones.py.
+
+Every 0.1 degree cell gets an IANA zone:
+  - land: the zone of the nearest place in the country backend/data/geo_rasters.npz
+    puts the cell in (countries with a single zone need no search)
+  - water within COASTAL_CELLS of land: the zone of the nearest land cell
+  - open sea and Antarctica: the nautical zone of the cell's longitude (Etc/GMT+N)
+  - anything left (lakes, territories without places): the nearest zone around it
+
+Places come from the bundled gazetteer (backend/data/gazetteer.tsv.gz), or from a
+GeoNames dump such as cities1000.txt
+(https://download.geonames.org/export/dump/cities1000.zip), whose denser places
+draw the zone borders inside large countries more closely. The script finishes by
+checking every place's own zone against the raster and timing lookups.
+
+Usage:
+    python scripts/build_timezones.py [/path/to/cities1000.txt]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.reverse_geocoder import GeoRasters
+from backend.timezones import TIMEZONES_PATH, TimezoneIndex, nautical_zone
+from backend.world_cities import load_gazetteer
+
+RES = 0.1
+# About 30 km of coastal water follows the land next to it.
+COASTAL_CELLS = 3
+CELL_CHUNK = 4096
+
+
+def read_places(path=None):
+    if path is None:
+        places = load_gazetteer().places
+        rows = [(p.latitude, p.longitude, p.country_code, p.timezone) for p in places]
+    else:
+        rows = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                cols = line.rstrip('\n').split('\t')
+                rows.append((float(cols[4]), float(cols[5]), cols[8], cols[17]))
+    known = pytz.all_timezones_set
+    rows = [row for row in rows if row[3] in known]
+    lat, lon, cc, tz = zip(*rows)
+    return np.array(lat), np.array(lon), np.array(cc), np.array(tz)
+
+
+def unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def cell_centres(rows, cols):
+    return -90.0 + (rows + 0.5) * RES, -180.0 + (cols + 0.5) * RES
+
+
+def assign_land(zones, country, country_codes, places, zone_id):
+    lat, lon, cc, tz = places
+    for idx, code in enumerate(country_codes):
+        if not code or code == "AQ":
+            continue
+        rows, cols = np.nonzero(country == idx)
+        here = cc == code
+        if not len(rows) or not here.any():
+            continue
+        names = np.unique(tz[here])
+        if len(names) == 1:
+            zones[rows, cols] = zone_id(names[0])
+            continue
+        # Nearest place by great circle: largest dot product of unit vectors.
+        place_vectors = unit_vectors(lat[here], lon[here])
+        place_zones = np.array([zone_id(name) for name in tz[here]])
+        for start in range(0, len(rows), CELL_CHUNK):
+            r, c = rows[start:start + CELL_CHUNK], cols[start:start + CELL_CHUNK]
+            nearest = np.argmax(unit_vectors(*cell_centres(r, c)) @ place_vectors.T, axis=1)
+            zones[r, c] = place_zones[nearest]
+
+
+def dilate(zones, steps=None):
+    # Unassigned cells (-1) take a neighbour's zone, one ring per step (longitude
+    # wraps, latitude doesn't), until `steps` rings or nothing changes.
+    step = 0
+    while steps is None or step < steps:
+        step += 1
+        grown = False
+        for shift, axis in ((1, 0), (-1, 0), (1, 1), (-1, 1)):
+            neighbour = np.roll(zones, shift, axis=axis)
+            if axis == 0:
+                neighbour[0 if shift == 1 else -1, :] = -1
+            take = (zones < 0) & (neighbour >= 0)
+            if take.any():
+                zones[take] = neighbour[take]
+                grown = True
+        if not grown:
+            break
+
+
+def main(cities_path=None):
+    rasters = GeoRasters()
+    if abs(rasters.land_res - RES) > 1e-9:
+        raise ValueError(f"geo_rasters.npz land cells are {rasters.land_res} degrees, expected {RES}")
+    rows, cols = int(round(180 / RES)), int(round(360 / RES))
+    land = np.unpackbits(rasters.land, axis=1)[:, :cols].astype(bool)
+    # Ocean basins are labelled on coarser cells; sample them at our cell centres.
+    ocean_rows = ((np.arange(rows) + 0.5) * RES / rasters.ocean_res).astype(int)
+    ocean_cols = ((np.arange(cols) + 0.5) * RES / rasters.ocean_res).astype(int)
+    ocean = rasters.ocean[ocean_rows][:, ocean_cols] > 0
+    places = read_places(cities_path)
+
+    names = []
+    ids = {}
+
+    def zone_id(name):
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    zones = np.full((rows, cols), -1, dtype=np.int32)
+    print(f"Assigning zones to land cells from {len(places[0])} places...")
+    country = np.where(land, rasters.country, 0)
+    assign_land(zones, country, rasters.country_codes, places, zone_id)
+
+    print("Extending land zones over coastal water...")
+    dilate(zones, COASTAL_CELLS)
+    antarctica = country == rasters.country_codes.index("AQ")
+    sea = (zones < 0) & (ocean | antarctica)
+    _, lon = cell_centres(np.zeros(cols), np.arange(cols))
+    nautical = np.array([zone_id(nautical_zone(v)) for v in lon])
+    zones[sea] = np.broadcast_to(nautical, zones.shape)[sea]
+    dilate(zones)
+    missing = int((zones < 0).sum())
+    if missing:
+        raise ValueError(f"{missing} cells left without a zone")
+
+    np.savez_compressed(TIMEZONES_PATH, res=RES, zones=zones.astype(np.uint16), zone_names=np.array(names))
+    print(f"Wrote {TIMEZONES_PATH} ({os.path.getsize(TIMEZONES_PATH) / 1e6:.2f} MB, {len(names)} zones)")
+
+    index = TimezoneIndex()
+    lat, lon, _, tz = places
+    found = np.array(index.zone_names)[index.zone_ids(lat, lon)]
+    print(f"Places whose own zone matches the raster: {np.mean(found == tz):.2%}")
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    qlat, qlon = rng.uniform(-90, 90, n), rng.uniform(-180, 180, n)
+    seconds = rng.integers(-2_000_000_000, 2_500_000_000, n)
+    started = time.perf_counter()
+    index.utc_offsets(index.zone_ids(qlat, qlon), seconds)
+    elapsed = time.perf_counter() - started
+    print(f"{n} zone + offset lookups in {elapsed:.2f} s ({n / elapsed / 1e6:.1f}M/s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,451 @@
+"""
+Offline bulk charts: the /analyze/batch columns and Arroyo element/modality
+scores for every row of a CSV or Parquet file, without going through the API.
+
+Input rows need city, country, date (YYYY-MM-DD) and time (HH:MM[:SS], civil
+time at the place, resolved through the bundled timezone index) columns, plus an
+optional state; every input column is copied to the output as
+text. Rows are read CHUNK at a time. Each chunk's distinct places are geocoded
+once in this process (gazetteer, then the shared SQLite geocode cache, then
+Nominatim unless --offline; results are remembered for the whole run), and the
+chunk goes to a pool of worker processes that parse it, compute it with one Time
+array, one position-engine pass and one house-engine pass, and render it.
+Results are written in input order as each chunk completes:
+  - .csv output: one file, appended chunk by chunk
+  - .parquet output: a directory of part-NNNNNN.parquet files (one per chunk),
+    readable as one dataset by pyarrow or pandas.read_parquet
+At most two chunks per worker are in flight, so memory is bounded by the chunk
+size, not the input size.
+
+After every chunk is written, <output>.checkpoint.json records how far the run
+got. --resume continues an interrupted run from there: the CSV is truncated to
+the last complete chunk, later Parquet parts are removed, and the already-done
+input rows are skipped. The checkpoint is removed once the run completes.
+
+Rows that cannot be geocoded, parsed or computed (outside the ephemeris) are
+kept, with empty results and the reason in the error column.
+
+Parquet input or output needs pyarrow (pip install pyarrow).
+
+Usage:
+    python scripts/bulk_charts.py INPUT OUTPUT [--kind both|chart|arroyo]
+                                  [--house-system placidus] [--chunk 10000]
+                                  [--workers N] [--offline] [--resume]
+"""
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import astro_service
+from backend.ephemeris import BODY_NAMES, get_context
+from backend.geocode_cache import make_key
+from backend.houses import HOUSE_SYSTEMS
+from backend.positions import ZODIAC_SIGNS
+from backend.timezones import load_timezone_index
+from backend.world_cities import GeocodingError, load_gazetteer
+
+KINDS = ("both", "chart", "arroyo")
+REQUIRED_COLUMNS = ("city", "country", "date", "time")
+# Larger chunks spend more time faulting in the engine's per-row temporaries than they
+# save in per-chunk overhead.
+DEFAULT_CHUNK = 10000
+BOOLEAN_COLUMNS = {"houseFallback"}
+INTEGER_COLUMNS = {key.lower() for key in (*astro_service.ARROYO_ELEMENTS, *astro_service.ARROYO_MODALITIES)}
+INTEGER_COLUMNS.add("utcOffsetMinutes")
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit("Parquet input/output needs pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+# Input
+
+def count_rows(path):
+    if is_parquet(path):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def read_chunks(path, chunk_rows, skip_chunks):
+    # Yields (chunk index, {column: list of str}) after skipping `skip_chunks`.
+    if is_parquet(path):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+        for index, batch in enumerate(batches):
+            if index < skip_chunks:
+                continue
+            columns = batch.to_pydict()
+            yield index, {name: ["" if v is None else str(v) for v in values] for name, values in columns.items()}
+        return
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        index = 0
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                if index >= skip_chunks:
+                    yield index, dict(zip(header, (list(column) for column in zip(*rows))))
+                index += 1
+                rows = []
+        if rows and index >= skip_chunks:
+            yield index, dict(zip(header, (list(column) for column in zip(*rows))))
+
+
+# Geocoding (parent process only: the cache and Nominatim rate limit live here)
+
+class Geocoder:
+    def __init__(self, offline):
+        self.offline = offline
+        self.memo = {}
+        self.gazetteer = load_gazetteer()
+
+    def resolve(self, city, country, state):
+        key = (city, country, state or None)
+        if key not in self.memo:
+            try:
+                self.memo[key] = self._lookup(*key)
+            except GeocodingError as e:
+                self.memo[key] = str(e)
+        return self.memo[key]
+
+    def _lookup(self, city, country, state):
+        if not self.offline:
+            return astro_service.get_lat_lon(city, country, state)
+        place = self.gazetteer.lookup(city, country, state)
+        if place:
+            return place.latitude, place.longitude
+        found, coords = astro_service.geocode_cache.get(make_key(city, state, country))
+        if found and coords:
+            return coords
+        return f"Could not resolve location offline: {city}, {country}"
+
+    def chunk(self, columns):
+        n = len(columns["city"])
+        states = columns.get("state") or [""] * n
+        lats = np.full(n, np.nan)
+        lons = np.full(n, np.nan)
+        errors = [None] * n
+        for i, (city, country, state) in enumerate(zip(columns["city"], columns["country"], states)):
+            location = self.resolve(city, country, state)
+            if isinstance(location, str):
+                errors[i] = location
+            else:
+                lats[i], lons[i] = location
+        return lats, lons, errors
+
+
+# Workers
+
+def init_worker():
+    get_context()
+
+
+def chart_columns(lats, lons, dates, times, errors, kind, house_system):
+    # Parse, then one vectorized pass over the chunk: {column: array or list},
+    # with failed rows left empty and their reason in "error".
+    n = len(dates)
+    parts = np.zeros((n, 6))
+    for i, (date_str, time_str) in enumerate(zip(dates, times)):
+        if errors[i] is not None:
+            continue
+        try:
+            dt = astro_service.parse_datetime(date_str, time_str)
+        except ValueError as e:
+            errors[i] = f"Invalid date/time: {e}"
+            continue
+        parts[i] = (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+    ok = np.array([error is None for error in errors])
+    safe_lats = np.where(ok, lats, 0.0)
+    safe_lons = np.where(ok, lons, 0.0)
+    arrays = astro_service.batch_chart_arrays(get_context(), safe_lats, safe_lons, parts, ok, errors, house_system)
+    longitudes = arrays["longitudes"]
+    houses = arrays["houses"]
+
+    def numbers(values):
+        return np.where(ok, values, np.nan)
+
+    def labels(values):
+        return [label if good else None for label, good in zip(values, ok)]
+
+    def signs(values):
+        return labels(np.array(ZODIAC_SIGNS, dtype=object)[(values // 30.0).astype(np.int64) % 12])
+
+    zone_names = np.array(load_timezone_index().zone_names, dtype=object)
+    out = {
+        "latitude": numbers(lats),
+        "longitude": numbers(lons),
+        "timezone": labels(zone_names[arrays["zone_ids"]]),
+        "utcOffsetMinutes": labels((arrays["utc_offset_seconds"] // 60).tolist()),
+    }
+    if kind in ("both", "chart"):
+        solar_time = arrays["solar_time_hours"]
+        out.update({
+            "trueSolarTime": labels(astro_service.decimal_hours_to_hms(h) for h in solar_time),
+            "civilTimeDifferenceMinutes": numbers(arrays["civil_minutes"]),
+            "sunAltitude": numbers(arrays["sun_altitude"]),
+            "sunAzimuth": numbers(arrays["sun_azimuth"]),
+            "sunHourAngle": numbers(arrays["sun_hour_angle"]),
+            "zodiacSign": signs(longitudes[0]),
+            "moonPhaseAngle": numbers(arrays["moon_phase_angle"]),
+            "moonPhase": labels(astro_service.MOON_PHASES[int(p // 45) % 8] for p in arrays["moon_phase_angle"]),
+        })
+        for b, name in enumerate(BODY_NAMES):
+            out[f"{name.lower()}Longitude"] = numbers(longitudes[b])
+        out["ascendant"] = numbers(houses["ascendant"])
+        out["midheaven"] = numbers(houses["midheaven"])
+        for c in range(12):
+            out[f"cusp{c + 1}"] = numbers(houses["cusps"][:, c])
+        out["houseFallback"] = labels(houses["fallback"].tolist())
+    if kind in ("both", "arroyo"):
+        scores, element, modality = astro_service.arroyo_scores(longitudes, houses["ascendant"])
+        out["ascendantSign"] = signs(houses["ascendant"])
+        for key, values in scores.items():
+            out[key.lower()] = labels(values.tolist())
+        out["dominantElement"] = labels(element)
+        out["dominantModality"] = labels(modality)
+    out["error"] = errors
+    return out
+
+
+def compute_chunk(index, columns, lats, lons, errors, kind, house_system, parquet_dir):
+    # Runs in a worker. Computes the chunk and renders it too, so the parent only
+    # appends and checkpoints: Parquet parts are written here, CSV comes back as
+    # text. Returns (index, rows, errors, (header, text) or None).
+    results = chart_columns(lats, lons, columns["date"], columns["time"], errors, kind, house_system)
+    merged = {**columns, **results}
+    failed = sum(error is not None for error in errors)
+    if parquet_dir is not None:
+        write_parquet_part(parquet_dir, index, merged)
+        return index, len(errors), failed, None
+    return index, len(errors), failed, render_csv(merged)
+
+
+# Output
+
+def render_csv(columns):
+    rendered = []
+    for values in columns.values():
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+            rendered.append(['' if v != v else repr(v) for v in values.tolist()])
+        else:
+            rendered.append(['' if v is None else v for v in values])
+    text = io.StringIO()
+    csv.writer(text).writerows(zip(*rendered))
+    header = io.StringIO()
+    csv.writer(header).writerow(list(columns))
+    return header.getvalue(), text.getvalue()
+
+
+def write_parquet_part(path, index, columns):
+    pa = require_pyarrow()
+    import pyarrow.parquet as pq
+
+    def column_type(name, values):
+        # Fixed types per column, so parts with all-empty columns still share a schema.
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+            return pa.float64()
+        if name in BOOLEAN_COLUMNS:
+            return pa.bool_()
+        if name in INTEGER_COLUMNS:
+            return pa.int64()
+        return pa.string()
+
+    table = pa.table({name: pa.array(values, type=column_type(name, values)) for name, values in columns.items()})
+    part = os.path.join(path, f"part-{index:06d}.parquet")
+    pq.write_table(table, part + ".tmp")
+    os.replace(part + ".tmp", part)
+
+
+class CsvOutput:
+    parquet_dir = None
+
+    def __init__(self, path, resume_bytes):
+        if resume_bytes is None:
+            self.f = open(path, 'w', newline='', encoding='utf-8')
+        else:
+            self.f = open(path, 'r+', newline='', encoding='utf-8')
+            self.f.truncate(resume_bytes)
+            self.f.seek(resume_bytes)
+        self.header_written = resume_bytes not in (None, 0)
+
+    def commit(self, rendered):
+        header, text = rendered
+        if not self.header_written:
+            self.f.write(header)
+            self.header_written = True
+        self.f.write(text)
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def position(self):
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetOutput:
+    # Workers write the parts; a part counts once the checkpoint has passed it.
+    def __init__(self, path, resume_chunks):
+        require_pyarrow()
+        self.parquet_dir = path
+        if resume_chunks is None and os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+        if resume_chunks is not None:
+            for name in os.listdir(path):
+                if name.startswith("part-") and int(name[5:11]) >= resume_chunks:
+                    os.remove(os.path.join(path, name))
+
+    def commit(self, rendered):
+        pass
+
+    def position(self):
+        return None
+
+    def close(self):
+        pass
+
+
+# Checkpoint
+
+def checkpoint_path(output):
+    return output.rstrip(os.sep) + ".checkpoint.json"
+
+
+def run_signature(args):
+    stat = os.stat(args.input)
+    return {"input": os.path.abspath(args.input), "input_size": stat.st_size, "input_mtime": stat.st_mtime,
+            "kind": args.kind, "house_system": args.house_system, "chunk": args.chunk}
+
+
+def save_checkpoint(path, state):
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def main(args):
+    signature = run_signature(args)
+    checkpoint = checkpoint_path(args.output)
+    state = {**signature, "chunks_done": 0, "rows_done": 0, "errors": 0, "output_bytes": 0}
+    resuming = args.resume and os.path.exists(checkpoint)
+    if resuming:
+        with open(checkpoint, encoding='utf-8') as f:
+            saved = json.load(f)
+        mismatched = [key for key in signature if saved.get(key) != signature[key]]
+        if mismatched:
+            sys.exit(f"Checkpoint {checkpoint} was written for a different run ({', '.join(mismatched)} differ)")
+        state = saved
+    elif args.resume and os.path.exists(args.output):
+        sys.exit(f"No checkpoint for {args.output}; that run already finished")
+    elif os.path.exists(args.output):
+        sys.exit(f"{args.output} exists; pass --resume to continue an interrupted run or remove it")
+
+    if is_parquet(args.output):
+        output = ParquetOutput(args.output, state["chunks_done"] if resuming else None)
+    else:
+        output = CsvOutput(args.output, state["output_bytes"] if resuming else None)
+
+    total = count_rows(args.input)
+    geocoder = Geocoder(args.offline)
+    started = time.perf_counter()
+    rows_at_start = state["rows_done"]
+    last_report = started
+    if resuming:
+        print(f"Resuming after {state['rows_done']} rows ({state['chunks_done']} chunks)", file=sys.stderr)
+
+    def report(final=False):
+        elapsed = time.perf_counter() - started
+        rate = (state["rows_done"] - rows_at_start) / elapsed if elapsed > 0 else 0.0
+        line = f"{state['rows_done']} rows"
+        if total:
+            line += f" / {total} ({100.0 * state['rows_done'] / total:.1f}%)"
+            if rate > 0 and not final:
+                line += f", ETA {(total - state['rows_done']) / rate:.0f} s"
+        line += (f", {rate:,.0f} rows/s, {state['errors']} errors, "
+                 f"{len(geocoder.memo)} places geocoded, {elapsed:.1f} s")
+        print(("Done: " if final else "") + line, file=sys.stderr)
+
+    executor = ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=init_worker)
+    pending = deque()
+
+    def drain_one():
+        nonlocal last_report
+        index, rows, failed, rendered = pending.popleft().result()
+        output.commit(rendered)
+        state["chunks_done"] = index + 1
+        state["rows_done"] += rows
+        state["errors"] += failed
+        state["output_bytes"] = output.position()
+        save_checkpoint(checkpoint, state)
+        if time.perf_counter() - last_report >= PROGRESS_INTERVAL_SECONDS:
+            last_report = time.perf_counter()
+            report()
+
+    try:
+        for index, columns in read_chunks(args.input, args.chunk, state["chunks_done"]):
+            missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+            if missing:
+                sys.exit(f"Input is missing column(s): {', '.join(missing)}")
+            lats, lons, errors = geocoder.chunk(columns)
+            pending.append(executor.submit(compute_chunk, index, columns, lats, lons, errors, args.kind,
+                                           args.house_system, output.parquet_dir))
+            while len(pending) >= 2 * args.workers:
+                drain_one()
+        while pending:
+            drain_one()
+    except KeyboardInterrupt:
+        print(f"Interrupted; {state['rows_done']} rows saved, rerun with --resume to continue", file=sys.stderr)
+        executor.shutdown(wait=False, cancel_futures=True)
+        output.close()
+        sys.exit(130)
+    executor.shutdown()
+    output.close()
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    report(final=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute charts and Arroyo scores for a CSV/Parquet file")
+    parser.add_argument("input", help="CSV or Parquet (.parquet/.pq) file")
+    parser.add_argument("output", help=".csv file or .parquet directory")
+    parser.add_argument("--kind", choices=KINDS, default="both", help="chart columns, Arroyo scores or both")
+    parser.add_argument("--house-system", choices=HOUSE_SYSTEMS, default="placidus")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--offline", action="store_true", help="gazetteer and geocode cache only, no Nominatim")
+    parser.add_argument("--resume", action="store_true", help="continue from <output>.checkpoint.json")
+    main(parser.parse_args())
@@ -0,0 +1,109 @@
+"""
+Local stand-in for Nominatim's /search endpoint, for load tests and offline runs.
+
+Every query resolves to a fixed point derived from its text. Latency and
+failures are injected per request:
+  --latency MS        mean response delay (default 50)
+  --jitter MS         uniform +/- spread around it (default 25)
+  --failure-rate P    fraction answered with HTTP 503 (default 0)
+  --timeout-rate P    fraction that hang for --hang seconds, past the client timeout (default 0)
+  --not-found-rate P  fraction answered with an empty result (default 0)
+Queries containing "Nowhere" are always not found.
+
+Point the backend at it with NOMINATIM_URL=http://127.0.0.1:PORT.
+
+Usage:
+    python scripts/fake_nominatim.py [--port 8090] [--latency 50] [--failure-rate 0.01] ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def coordinates(query):
+    h = zlib.crc32(query.encode("utf-8"))
+    return (h % 14000) / 100.0 - 70.0, (h // 14000 % 36000) / 100.0 - 180.0
+
+
+def make_server(host="127.0.0.1", port=8090, latency=50.0, jitter=25.0, failure_rate=0.0, timeout_rate=0.0,
+                not_found_rate=0.0, hang=30.0, seed=None):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    counters = {"requests": 0, "failures": 0, "timeouts": 0, "not_found": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                return self._send(200, counters)
+            if url.path != "/search":
+                return self._send(404, {"error": "not found"})
+            query = parse_qs(url.query).get("q", [""])[0]
+            with rng_lock:
+                counters["requests"] += 1
+                roll = rng.random()
+                delay = max(0.0, latency + rng.uniform(-jitter, jitter)) / 1000.0
+            if roll < timeout_rate:
+                counters["timeouts"] += 1
+                time.sleep(hang)
+                return self._send(504, {"error": "timeout"})
+            time.sleep(delay)
+            roll -= timeout_rate
+            if roll < failure_rate:
+                counters["failures"] += 1
+                return self._send(503, {"error": "injected failure"})
+            roll -= failure_rate
+            if roll < not_found_rate or "Nowhere" in query:
+                counters["not_found"] += 1
+                return self._send(200, [])
+            lat, lon = coordinates(query)
+            return self._send(200, [{"lat": str(lat), "lon": str(lon), "display_name": query}])
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.counters = counters
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Nominatim stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=25.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--not-found-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=30.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.jitter, args.failure_rate, args.timeout_rate,
+                         args.not_found_rate, args.hang, args.seed)
+    print(f"Fake Nominatim on http://{args.host}:{args.port} (latency {args.latency}+/-{args.jitter} ms)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+End-to-end load test: replays the frontend's request flow against the API.
+
+Sessions arrive open-loop (Poisson) at each --rate for --duration seconds. Each
+session runs one of these flows:
+  report  one POST /report, which is what services/apiService.ts does now
+  legacy  the earlier five-call sequence: /analyze for the birth and current
+          inputs, then /solar-return, /perfect-alignment with the returned
+          instant, then /arroyo-analysis
+Birth places are gazetteer cities. A --unknown-ratio share of them is replaced
+by made-up towns that only the (fake) Nominatim can resolve.
+
+With --spawn, it starts scripts/fake_nominatim.py and
+`uvicorn backend.main:app --workers N` on this machine, with a fresh geocode
+cache, and waits for /api/ready. Nothing leaves the box. Without --spawn it
+targets --url as is.
+
+Per rate step it prints throughput, latency p50/p95/p99/max and error rates
+per endpoint and per session. --json saves everything.
+
+Usage:
+    python scripts/load_test.py --spawn --workers 4 --rate 5 10 20 --duration 30
+    python scripts/load_test.py --url http://127.0.0.1:8000 --flow legacy --rate 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CITIES = [
+    ("New York", "NY", "USA"), ("London", "", "United Kingdom"), ("Sao Paulo", "SP", "Brazil"),
+    ("Tokyo", "", "Japan"), ("Sydney", "NSW", "Australia"), ("Cairo", "", "Egypt"),
+    ("Mumbai", "", "India"), ("Berlin", "", "Germany"), ("Mexico City", "", "Mexico"),
+    ("Lagos", "", "Nigeria"), ("Paris", "", "France"), ("Toronto", "ON", "Canada"),
+    ("Buenos Aires", "", "Argentina"), ("Madrid", "", "Spain"), ("Istanbul", "", "Turkey"),
+    ("Seoul", "", "South Korea"), ("Jakarta", "", "Indonesia"), ("Lisbon", "", "Portugal"),
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)  # endpoint -> [(latency seconds, status)]
+
+    def add(self, endpoint, seconds, status):
+        self.samples[endpoint].append((seconds, status))
+
+    def summary(self, elapsed):
+        rows = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = np.array([s for s, _ in samples])
+            statuses = defaultdict(int)
+            for _, status in samples:
+                statuses[status] += 1
+            errors = sum(n for status, n in statuses.items() if not 200 <= status < 300)
+            rows[endpoint] = {
+                "count": len(samples),
+                "errors": errors,
+                "error_rate": errors / len(samples),
+                "throughput_rps": len(samples) / elapsed,
+                "p50_ms": float(np.percentile(latencies, 50)) * 1e3,
+                "p95_ms": float(np.percentile(latencies, 95)) * 1e3,
+                "p99_ms": float(np.percentile(latencies, 99)) * 1e3,
+                "max_ms": float(latencies.max()) * 1e3,
+                # 0 = no HTTP response (connection error or client timeout).
+                "statuses": {str(k): v for k, v in sorted(statuses.items())},
+            }
+        return rows
+
+
+def session_inputs(rng, unknown_ratio, unknown_pool):
+    if rng.random() < unknown_ratio:
+        city, state, country = f"Stubtown {rng.randrange(unknown_pool)}", "", "Atlantis"
+    else:
+        city, state, country = rng.choice(CITIES)
+    birth_dt = datetime(1940, 1, 1) + timedelta(seconds=rng.randrange(80 * 365 * 86400))
+    now = datetime.now(timezone.utc)
+    current_city, current_state, current_country = rng.choice(CITIES)
+    birth = {"city": city, "state": state, "country": country,
+             "date": birth_dt.strftime("%Y-%m-%d"), "time": birth_dt.strftime("%H:%M")}
+    current = {"city": current_city, "state": current_state, "country": current_country,
+               "date": now.strftime("%Y-%m-%d"), "time": now.strftime("%H:%M")}
+    return birth, current
+
+
+def next_return_year(birth):
+    # Same rule as apiService.ts.
+    now = datetime.now()
+    born = datetime.strptime(birth["date"], "%Y-%m-%d")
+    return now.year + 1 if (now.month, now.day) > (born.month, born.day) else now.year
+
+
+async def post(client, recorder, endpoint, payload):
+    start = time.perf_counter()
+    try:
+        response = await client.post(endpoint, json=payload)
+        status = response.status_code
+    except httpx.HTTPError:
+        response, status = None, 0
+    recorder.add(endpoint, time.perf_counter() - start, status)
+    return response if status == 200 else None
+
+
+async def report_flow(client, recorder, birth, current):
+    response = await post(client, recorder, "/report",
+                          {"birth": birth, "current": current, "target_year": next_return_year(birth)})
+    return response is not None
+
+
+async def legacy_flow(client, recorder, birth, current):
+    if await post(client, recorder, "/analyze", birth) is None:
+        return False
+    if await post(client, recorder, "/analyze", current) is None:
+        return False
+    ok = True
+    solar_return = datetime.now(timezone.utc).isoformat()
+    response = await post(client, recorder, "/solar-return", {
+        "birth_date": birth["date"], "birth_time": birth["time"], "target_year": next_return_year(birth),
+        "city": birth["city"], "country": birth["country"], "state": birth["state"],
+    })
+    if response is None:
+        ok = False
+    else:
+        solar_return = response.json()["solar_return"] or solar_return
+    # The frontend carries on past a failed solar return, alignment or Arroyo call.
+    ok &= await post(client, recorder, "/perfect-alignment", {
+        "birth_date": birth["date"], "birth_time": birth["time"], "birth_city": birth["city"],
+        "birth_country": birth["country"], "birth_state": birth["state"], "solar_return": solar_return,
+    }) is not None
+    ok &= await post(client, recorder, "/arroyo-analysis", {
+        "birth_date": birth["date"], "birth_time": birth["time"],
+        "city": birth["city"], "country": birth["country"], "state": birth["state"],
+    }) is not None
+    return ok
+
+
+FLOWS = {"report": report_flow, "legacy": legacy_flow}
+
+
+async def run_step(client, args, rate, rng):
+    recorder = Recorder()
+    flow = FLOWS[args.flow]
+    tasks = []
+
+    async def session():
+        birth, current = session_inputs(rng, args.unknown_ratio, args.unknown_pool)
+        start = time.perf_counter()
+        ok = await flow(client, recorder, birth, current)
+        recorder.add("session", time.perf_counter() - start, 200 if ok else 599)
+
+    start = time.perf_counter()
+    next_arrival = start
+    while next_arrival - start < args.duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(session()))
+        next_arrival += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return {"rate": rate, "sessions": len(tasks), "elapsed_s": elapsed, "endpoints": recorder.summary(elapsed)}
+
+
+def print_step(step):
+    print(f"\n== {step['rate']:g} sessions/s: {step['sessions']} sessions in {step['elapsed_s']:.1f}s ==")
+    print(f"{'endpoint':20} {'count':>7} {'rps':>8} {'err%':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+    for endpoint, r in step["endpoints"].items():
+        statuses = " ".join(f"{k}:{v}" for k, v in r["statuses"].items())
+        print(f"{endpoint:20} {r['count']:7d} {r['throughput_rps']:8.2f} {r['error_rate'] * 100:6.2f}% "
+              f"{r['p50_ms']:9.1f} {r['p95_ms']:9.1f} {r['p99_ms']:9.1f} {r['max_ms']:9.1f}  {statuses}")
+
+
+def spawn(args):
+    scratch = tempfile.mkdtemp(prefix="geoastro_load_")
+    fake = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "scripts", "fake_nominatim.py"), "--port", str(args.nominatim_port),
+        "--latency", str(args.nominatim_latency), "--jitter", str(args.nominatim_jitter),
+        "--failure-rate", str(args.nominatim_failure_rate), "--timeout-rate", str(args.nominatim_timeout_rate),
+    ], cwd=ROOT)
+    # uvicorn's --workers doesn't reach the app; compute_pool sizes each worker's
+    # chart pool from WEB_CONCURRENCY.
+    env = dict(os.environ,
+               WEB_CONCURRENCY=str(args.workers),
+               NOMINATIM_URL=f"http://127.0.0.1:{args.nominatim_port}",
+               NOMINATIM_RATE=str(args.nominatim_rate),
+               NOMINATIM_BURST=str(max(1.0, args.nominatim_rate)),
+               GEOCODE_CACHE_PATH=os.path.join(scratch, "geocode_cache.sqlite3"))
+    port = args.url.rsplit(":", 1)[1].rstrip("/")
+    api = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", port,
+        "--workers", str(args.workers), "--log-level", "warning",
+    ], cwd=ROOT, env=env)
+    return [fake, api]
+
+
+async def wait_ready(client, timeout):
+    # Several answers in a row, so every uvicorn worker has finished starting up.
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < 10:
+        if time.monotonic() > deadline:
+            raise RuntimeError("API did not become ready")
+        try:
+            streak = streak + 1 if (await client.get("/api/ready")).status_code == 200 else 0
+        except httpx.HTTPError:
+            streak = 0
+        await asyncio.sleep(0.2 if streak == 0 else 0.05)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    rng = random.Random(args.seed)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client, args.startup_timeout)
+        steps = []
+        for rate in args.rate:
+            step = await run_step(client, args, rate, rng)
+            print_step(step)
+            steps.append(step)
+        return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test for the GeoAstro API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--flow", choices=sorted(FLOWS), default="report")
+    parser.add_argument("--rate", type=float, nargs="+", default=[5.0], help="sessions per second, one step each")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals per step")
+    parser.add_argument("--unknown-ratio", type=float, default=0.1, help="share of birth places not in the gazetteer")
+    parser.add_argument("--unknown-pool", type=int, default=200, help="distinct made-up towns")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--spawn", action="store_true", help="start the fake Nominatim and uvicorn locally")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--nominatim-port", type=int, default=8090)
+    parser.add_argument("--nominatim-latency", type=float, default=50.0)
+    parser.add_argument("--nominatim-jitter", type=float, default=25.0)
+    parser.add_argument("--nominatim-failure-rate", type=float, default=0.0)
+    parser.add_argument("--nominatim-timeout-rate", type=float, default=0.0)
+    parser.add_argument("--nominatim-rate", type=float, default=1.0,
+                        help="rate limit the API applies to the fake (requests/s, shared by workers)")
+    args = parser.parse_args()
+
+    processes = spawn(args) if args.spawn else []
+    try:
+        steps = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"flow": args.flow, "url": args.url, "workers": args.workers if args.spawn else None,
+                       "steps": steps}, f, indent=2)
+        print(f"\nSaved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,35 +13,7 @@ export const analyzeAstroData = async (
     current: AstroInput
 ): Promise<{ birthAnalysis: BirthAnalysis; currentAnalysis: AstroAnalysis; perfectAlignment: PerfectAlignment }> => {
 
-    // 1. Fetch Birth Data from Python Backend
-    console.log('[API] Step 1: Fetching birth data...');
-    const birthRes = await fetch(`${API_URL}/analyze`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(birth)
-    });
-    if (!birthRes.ok) {
-        console.error('[API] Step 1 FAILED: Birth analysis request failed', birthRes.status, birthRes.statusText);
-        throw new Error("Failed to fetch birth analysis");
-    }
-    const birthData = await birthRes.json();
-    console.log('[API] Step 1 SUCCESS: Birth data received:', birthData);
-
-    // 2. Fetch Current Data from Python Backend
-    console.log('[API] Step 2: Fetching current data...');
-    const currentRes = await fetch(`${API_URL}/analyze`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify(current)
-    });
-    if (!currentRes.ok) {
-        console.error('[API] Step 2 FAILED: Current analysis request failed', currentRes.status, currentRes.statusText);
-        throw new Error("Failed to fetch current analysis");
-    }
-    const currentData = await currentRes.json();
-    console.log('[API] Step 2 SUCCESS: Current data received:', currentData);
-
-    // 3. Fetch Solar Return for Birth Data
+    // 1. Fetch every section from the Python Backend in one request
     const now = new Date();
     const birthDate = new Date(birth.date);
     let targetYear = now.getFullYear();
@@ -56,41 +28,37 @@ export const analyzeAstroData = async (
         targetYear += 1;
     }
 
+    console.log('[API] Step 1: Fetching combined report...');
+    const reportRes = await fetch(`${API_URL}/report`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        // "Now" doesn't need to be exact to the second: share the quantized current sky.
+        body: JSON.stringify({ birth, current: { ...current, approximate: true }, target_year: targetYear })
+    });
+    if (!reportRes.ok) {
+        console.error('[API] Step 1 FAILED: Report request failed', reportRes.status, reportRes.statusText);
+        throw new Error("Failed to fetch analysis report");
+    }
+    const report = await reportRes.json();
+    console.log('[API] Step 1 SUCCESS: Report received:', report);
+    const birthData = report.birthAnalysis;
+    const currentData = report.currentAnalysis;
+
+    // 2. Solar Return for Birth Data
     let nextSolarReturn = new Date().toISOString();
     let daysUntilSolarReturn = 0;
 
-    try {
-        console.log('[API] Step 3: Fetching solar return data...');
-        const srRes = await fetch(`${API_URL}/solar-return`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                birth_date: birth.date,
-                birth_time: birth.time,
-                target_year: targetYear,
-                city: birth.city,
-                country: birth.country,
-                state: birth.state
-            })
-        });
-        if (srRes.ok) {
-            const srData = await srRes.json();
-            console.log('[API] Step 3 SUCCESS: Solar return data received:', srData);
-            if (srData.solar_return) {
-                nextSolarReturn = srData.solar_return;
-                const srDate = new Date(nextSolarReturn);
-                const diffTime = srDate.getTime() - now.getTime();
-                daysUntilSolarReturn = Math.ceil(diffTime / (1000 * 60 * 60 * 24));
-                console.log('[API] Step 3.1: Calculated nextSolarReturn:', nextSolarReturn, 'daysUntil:', daysUntilSolarReturn);
-            }
-        } else {
-            console.warn('[API] Step 3 WARNING: Solar return request not OK:', srRes.status);
-        }
-    } catch (e) {
-        console.error("[API] Step 3 ERROR: Failed to fetch solar return:", e);
+    if (report.solarReturn?.solar_return) {
+        nextSolarReturn = report.solarReturn.solar_return;
+        const srDate = new Date(nextSolarReturn);
+        const diffTime = srDate.getTime() - now.getTime();
+        daysUntilSolarReturn = Math.ceil(diffTime / (1000 * 60 * 60 * 24));
+        console.log('[API] Step 2: Calculated nextSolarReturn:', nextSolarReturn, 'daysUntil:', daysUntilSolarReturn);
+    } else {
+        console.warn('[API] Step 2 WARNING: No solar return in report:', report.errors);
     }
 
-    // 4. Construct the response objects with data normalization
+    // 3. Construct the response objects with data normalization
     const mapToAnalysis = (data: any, input: AstroInput): AstroAnalysis => {
         // Normalize coordinates to ensure they are numbers
         const normalizeCoordinates = (coords: any) => {
@@ -151,16 +119,14 @@ export const analyzeAstroData = async (
         };
     };
 
-    console.log('[API] Step 4: Mapping data to analysis objects...');
+    console.log('[API] Step 3: Mapping data to analysis objects...');
     const birthAnalysis = mapToAnalysis(birthData, birth) as BirthAnalysis;
     const currentAnalysis = mapToAnalysis(currentData, current);
-    console.log('[API] Step 4.1: birthAnalysis mapped:', birthAnalysis);
-    console.log('[API] Step 4.2: currentAnalysis mapped:', currentAnalysis);
+    console.log('[API] Step 3.1: birthAnalysis mapped:', birthAnalysis);
+    console.log('[API] Step 3.2: currentAnalysis mapped:', currentAnalysis);
 
-    // Note: Perfect alignment calculation moved to Step 5 (after solar return is calculated)
-
-    // 5. Calculate Perfect Alignment
-    console.log('[API] Step 5: Calculating perfect alignment...');
+    // 4. Perfect Alignment
+    console.log('[API] Step 4: Reading perfect alignment...');
     let perfectAlignment: PerfectAlignment = {
         city: "Unknown",
         country: "Unknown",
@@ -170,48 +136,31 @@ export const analyzeAstroData = async (
         localTimeAtReturn: "00:00:00"
     };
 
-    try {
-        const alignmentRes = await fetch(`${API_URL}/perfect-alignment`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                birth_date: birth.date,
-                birth_time: birth.time,
-                birth_city: birth.city,
-                birth_country: birth.country,
-                birth_state: birth.state,
-                solar_return: nextSolarReturn
-            })
-        });
-
-        if (alignmentRes.ok) {
-            const alignmentData = await alignmentRes.json();
-            console.log('[API] Step 5 SUCCESS: Perfect alignment calculated:', alignmentData);
-            perfectAlignment = {
-                city: alignmentData.city || "Unknown",
-                country: alignmentData.country || "Unknown",
-                countryCode: alignmentData.countryCode,
-                coordinates: {
-                    latitude: typeof alignmentData.coordinates?.latitude === 'number'
-                        ? alignmentData.coordinates.latitude
-                        : parseFloat(alignmentData.coordinates?.latitude) || 0,
-                    longitude: typeof alignmentData.coordinates?.longitude === 'number'
-                        ? alignmentData.coordinates.longitude
-                        : parseFloat(alignmentData.coordinates?.longitude) || 0
-                },
-                reasoning: alignmentData.reasoning || "Optimal location for solar return alignment.",
-                localDateAtReturn: alignmentData.localDateAtReturn || nextSolarReturn.split('T')[0],
-                localTimeAtReturn: alignmentData.localTimeAtReturn || "00:00:00"
-            };
-        } else {
-            console.warn('[API] Step 5 WARNING: Perfect alignment request not OK:', alignmentRes.status);
-        }
-    } catch (e) {
-        console.error("[API] Step 5 ERROR: Failed to calculate perfect alignment:", e);
+    const alignmentData = report.perfectAlignment;
+    if (alignmentData) {
+        console.log('[API] Step 4 SUCCESS: Perfect alignment received:', alignmentData);
+        perfectAlignment = {
+            city: alignmentData.city || "Unknown",
+            country: alignmentData.country || "Unknown",
+            countryCode: alignmentData.countryCode,
+            coordinates: {
+                latitude: typeof alignmentData.coordinates?.latitude === 'number'
+                    ? alignmentData.coordinates.latitude
+                    : parseFloat(alignmentData.coordinates?.latitude) || 0,
+                longitude: typeof alignmentData.coordinates?.longitude === 'number'
+                    ? alignmentData.coordinates.longitude
+                    : parseFloat(alignmentData.coordinates?.longitude) || 0
+            },
+            reasoning: alignmentData.reasoning || "Optimal location for solar return alignment.",
+            localDateAtReturn: alignmentData.localDateAtReturn || nextSolarReturn.split('T')[0],
+            localTimeAtReturn: alignmentData.localTimeAtReturn || "00:00:00"
+        };
+    } else {
+        console.warn('[API] Step 4 WARNING: No perfect alignment in report:', report.errors);
     }
 
-    // 6. Fetch Arroyo Analysis
-    console.log('[API] Step 6: Fetching Arroyo analysis...');
+    // 5. Arroyo Analysis
+    console.log('[API] Step 5: Reading Arroyo analysis...');
     let arroyoAnalysis: ArroyoAnalysis = {
         scores: { Fire: 0, Earth: 0, Air: 0, Water: 0, Cardinal: 0, Fixed: 0, Mutable: 0 },
         positions: {},
@@ -220,27 +169,9 @@ export const analyzeAstroData = async (
         interpretation: "Analysis unavailable."
     };
 
-    try {
-        const arroyoRes = await fetch(`${API_URL}/arroyo-analysis`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                birth_date: birth.date,
-                birth_time: birth.time,
-                city: birth.city,
-                country: birth.country,
-                state: birth.state
-            })
-        });
-
-        if (arroyoRes.ok) {
-            arroyoAnalysis = await arroyoRes.json();
-            console.log('[API] Step 6 SUCCESS: Arroyo analysis received:', arroyoAnalysis);
-        } else {
-            console.warn('[API] Step 6 WARNING: Arroyo analysis request not OK:', arroyoRes.status);
-        }
-    } catch (e) {
-        console.error("[API] Step 6 ERROR: Failed to fetch Arroyo analysis:", e);
+    if (report.arroyoAnalysis) {
+        arroyoAnalysis = report.arroyoAnalysis;
+        console.log('[API] Step 5 SUCCESS: Arroyo analysis received:', arroyoAnalysis);
     }
 
     const result = {
@@ -249,7 +180,7 @@ export const analyzeAstroData = async (
         perfectAlignment,
         arroyoAnalysis
     };
-    console.log('[API] Step 7: Returning final result object:', result);
+    console.log('[API] Step 6: Returning final result object:', result);
     return result;
 };
 
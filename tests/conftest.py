@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Charts run on threads in the test process, and the geocode cache and Nominatim
+# rate limiter get their own SQLite files instead of the shared ones in /tmp.
+_state_dir = tempfile.mkdtemp(prefix="geoastro_tests_")
+os.environ.setdefault("CHART_POOL_SIZE", "0")
+os.environ.setdefault("GEOCODE_CACHE_PATH", os.path.join(_state_dir, "geocode_cache.sqlite3"))
+os.environ.setdefault("NOMINATIM_RATE_PATH", os.path.join(_state_dir, "rate_limit.sqlite3"))
+
+
+@pytest.fixture(scope="session")
+def ctx():
+    from backend.ephemeris import get_context
+    return get_context()
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+
+SOLAR_RETURN = {"birth_date": "1990-05-15", "birth_time": "14:30", "target_year": 2024, "city": "London",
+                "country": "UK"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_solar_return(client):
+    response = client.post("/solar-return", json=SOLAR_RETURN)
+    assert response.status_code == 200
+    assert response.json()["solar_return"].startswith("2024-05-15T")
+
+
+@pytest.mark.parametrize("year", [1500, 2200])
+def test_solar_return_outside_the_ephemeris_is_422(client, year):
+    response = client.post("/solar-return", json={**SOLAR_RETURN, "target_year": year})
+    assert response.status_code == 422
+    assert "only available between" in response.json()["detail"]
+    response = client.get("/solar-return", params={**SOLAR_RETURN, "target_year": year})
+    assert response.status_code == 422
+
+
+def test_repeat_requests_hit_the_response_cache(client):
+    main.response_cache.clear()
+    params = {**SOLAR_RETURN, "target_year": 2030}
+    first = client.get("/solar-return", params=params)
+    assert first.status_code == 200 and first.headers["X-Response-Cache"] == "miss"
+    assert first.headers["Cache-Control"] == main.RESPONSE_CACHE_CONTROL
+    # POST with the fields in another order is the same request.
+    again = client.post("/solar-return", json=dict(reversed(list(params.items()))))
+    assert again.headers["X-Response-Cache"] == "hit"
+    assert again.content == first.content and again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_matching_etag_is_304(client):
+    params = {**SOLAR_RETURN, "target_year": 2031}
+    etag = client.get("/solar-return", params=params).headers["ETag"]
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        response = client.get("/solar-return", params=params, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+    stale = client.get("/solar-return", params=params, headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200 and stale.json()["solar_return"].startswith("2031-05-1")
+
+
+def test_errors_are_not_cached(client):
+    main.response_cache.clear()
+    params = {**SOLAR_RETURN, "target_year": 2200}
+    assert client.get("/solar-return", params=params).status_code == 422
+    assert main.response_cache.stats()["entries"] == 0
+    assert client.get("/solar-return", params=params).status_code == 422
+
+
+def test_ready_and_geocode_cache_stats(client):
+    ready = client.get("/api/ready").json()
+    assert ready["status"] == "ready" and "ephemeris" in ready["timings"]
+    stats = client.get("/api/geocode-cache")
+    assert stats.status_code == 200
+
+
+BIRTH = {"city": "London", "country": "UK", "state": "", "date": "1990-05-15", "time": "14:30"}
+
+
+@pytest.mark.parametrize("date", ["1990-13-15", "2090-05-15"])
+def test_bad_or_out_of_range_dates_are_422(client, date):
+    response = client.post("/analyze", json={**BIRTH, "date": date})
+    assert response.status_code == 422 and isinstance(response.json()["detail"], str)
+    response = client.post("/arroyo-analysis", json={"birth_date": date, "birth_time": "14:30", "city": "London",
+                                                     "country": "UK"})
+    assert response.status_code == 422
+    response = client.post("/report", json={"birth": {**BIRTH, "date": date}, "current": BIRTH})
+    assert response.status_code == 422
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+
+from backend import astro_service, chart_cache
+from backend.astro_service import CURRENT_SKY_QUANTIZATION, EXACT_QUANTIZATION, cached_astronomy_chart
+from backend.chart_cache import EXACT, ChartCache, Quantum, parse_quantum
+
+
+def test_snap_to_grid_and_bucket():
+    quantum = Quantum(0.5, 600)
+    assert quantum.snap(51.3, -0.2, datetime(2024, 5, 1, 12, 19, 59)) == (51.5, -0.0, datetime(2024, 5, 1, 12, 10))
+    # Buckets start on the epoch grid, before it too.
+    assert quantum.snap(0.0, 0.0, datetime(1969, 12, 31, 23, 55))[2] == datetime(1969, 12, 31, 23, 50)
+
+
+def test_exact_keeps_inputs():
+    dt = datetime(2024, 5, 1, 12, 19, 59, 123456)
+    assert EXACT.snap(51.3, -0.2, dt) == (51.3, -0.2, dt)
+    assert Quantum(None, 60).snap(51.3, -0.2, dt) == (51.3, -0.2, datetime(2024, 5, 1, 12, 19))
+
+
+def test_parse_quantum():
+    default = Quantum(1.0, 600)
+    assert parse_quantum(None, default) is default
+    assert parse_quantum("0.25, 30", default) == Quantum(0.25, 30.0)
+    assert parse_quantum(",60", default) == Quantum(None, 60.0)
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = ChartCache(max_entries=2, ttl=60)
+    calls = []
+
+    def compute(value):
+        return lambda: calls.append(value) or value
+
+    assert cache.get_or_compute("a", compute(1)) == 1
+    assert cache.get_or_compute("a", compute(2)) == 1
+    cache.get_or_compute("b", compute(3))
+    cache.get_or_compute("a", compute(4))
+    # "b" is now the least recently used.
+    cache.get_or_compute("c", compute(5))
+    assert cache.get_or_compute("b", compute(6)) == 6
+    assert cache.get_or_compute("c", compute(7)) == 5
+    assert calls == [1, 3, 5, 6]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (3, 4, 2, 2)
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(chart_cache.time, "monotonic", lambda: now[0])
+    cache = ChartCache(max_entries=10, ttl=60)
+    cache.get_or_compute("a", lambda: 1)
+    now[0] += 60
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    now[0] += 1
+    assert cache.get_or_compute("a", lambda: 3) == 3
+    assert cache.stats()["expired"] == 1
+
+
+@pytest.fixture
+def fresh_chart_cache(monkeypatch):
+    monkeypatch.setattr(astro_service, "chart_cache", ChartCache())
+    return astro_service.chart_cache
+
+
+def test_exact_charts_are_memoized_per_input(ctx, fresh_chart_cache):
+    dt = datetime(2024, 5, 1, 12, 0, 30)
+    first = cached_astronomy_chart(ctx, 51.5074, -0.1278, dt, quantization=EXACT_QUANTIZATION)
+    again = cached_astronomy_chart(ctx, 51.5074, -0.1278, dt, quantization=EXACT_QUANTIZATION)
+    assert again == first and again is not first
+    other = cached_astronomy_chart(ctx, 51.5074, -0.1278, dt.replace(second=31), quantization=EXACT_QUANTIZATION)
+    assert other["sunPosition"] != first["sunPosition"]
+    assert fresh_chart_cache.stats()["hits"] == 2
+
+
+def test_current_sky_charts_share_nearby_results(ctx, fresh_chart_cache):
+    first = cached_astronomy_chart(ctx, 51.5074, -0.1278, datetime(2024, 5, 1, 12, 0, 10),
+                                   quantization=CURRENT_SKY_QUANTIZATION)
+    nearby = cached_astronomy_chart(ctx, 51.5061, -0.1251, datetime(2024, 5, 1, 12, 0, 40),
+                                    quantization=CURRENT_SKY_QUANTIZATION)
+    assert fresh_chart_cache.stats()["misses"] == 2
+    assert nearby["coordinates"] == {"latitude": 51.5061, "longitude": -0.1251}
+    for field in ("planets", "moonPosition", "sunPosition", "solarDay"):
+        assert nearby[field] == first[field]
+    # Solar time is carried from the bucket start to the requested second.
+    assert nearby["trueSolarTime"] != first["trueSolarTime"]
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend import astro_service, geocoder
+from backend.astro_service import get_lat_lon_async
+from backend.geocode_cache import GeocodeCache
+from backend.geocoder import AsyncNominatim, RateLimitExceeded, TokenBucket
+from backend.world_cities import GeocoderUnavailableError, LocationNotFoundError
+from scripts.fake_nominatim import coordinates, make_server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # geocoder's time.time(), advanced by hand.
+    now = [1_000_000.0]
+    monkeypatch.setattr(geocoder.time, "time", lambda: now[0])
+    return now
+
+
+def bucket(tmp_path, **kwargs):
+    return TokenBucket(path=str(tmp_path / "rate.sqlite3"), **kwargs)
+
+
+def test_burst_is_free_then_requests_are_rate_spaced(tmp_path, clock):
+    limiter = bucket(tmp_path, rate=2.0, burst=3.0, max_wait=10.0)
+    waits = [limiter.reserve() for _ in range(6)]
+    assert waits == pytest.approx([0.0, 0.0, 0.0, 0.5, 1.0, 1.5])
+
+
+def test_tokens_refill_up_to_the_burst(tmp_path, clock):
+    limiter = bucket(tmp_path, rate=1.0, burst=2.0, max_wait=10.0)
+    assert [limiter.reserve() for _ in range(3)] == pytest.approx([0.0, 0.0, 1.0])
+    clock[0] += 1.5
+    assert limiter.reserve() == pytest.approx(0.5)
+    clock[0] += 100.0
+    assert [limiter.reserve() for _ in range(3)] == pytest.approx([0.0, 0.0, 1.0])
+
+
+def test_queue_longer_than_max_wait_raises_without_taking_a_token(tmp_path, clock):
+    limiter = bucket(tmp_path, rate=1.0, burst=1.0, max_wait=2.0)
+    assert [limiter.reserve() for _ in range(3)] == pytest.approx([0.0, 1.0, 2.0])
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve()
+    clock[0] += 1.0
+    assert limiter.reserve() == pytest.approx(2.0)
+
+
+def test_buckets_on_one_file_share_the_budget(tmp_path, clock):
+    first = bucket(tmp_path, rate=1.0, burst=1.0, max_wait=10.0)
+    second = bucket(tmp_path, rate=1.0, burst=1.0, max_wait=10.0)
+    other = TokenBucket(name="other", path=first.path, rate=1.0, burst=1.0, max_wait=10.0)
+    assert first.reserve() == 0.0
+    assert second.reserve() == pytest.approx(1.0)
+    assert first.reserve() == pytest.approx(2.0)
+    assert other.reserve() == 0.0
+
+
+def test_unusable_database_limits_per_process(tmp_path, clock):
+    limiter = TokenBucket(path=str(tmp_path / "missing" / "rate.sqlite3"), rate=1.0, burst=1.0, max_wait=10.0)
+    assert [limiter.reserve() for _ in range(3)] == pytest.approx([0.0, 1.0, 2.0])
+
+
+def test_wait_async_reserves_off_the_event_loop(tmp_path, monkeypatch):
+    limiter = bucket(tmp_path, rate=1000.0, burst=1.0, max_wait=10.0)
+    threads = []
+    reserve = limiter.reserve
+
+    def recording_reserve():
+        threads.append(threading.current_thread())
+        return reserve()
+
+    monkeypatch.setattr(limiter, "reserve", recording_reserve)
+
+    async def run():
+        await asyncio.gather(limiter.wait_async(), limiter.wait_async())
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+@pytest.fixture
+def nominatim(tmp_path, monkeypatch):
+    # Nominatim answers from `replies` (coords, None or an exception) and records the queries.
+    queries, replies = [], []
+
+    async def geocode(query):
+        queries.append(query)
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(astro_service, "geocode_cache", GeocodeCache(path=str(tmp_path / "geocode.sqlite3")))
+    monkeypatch.setattr(astro_service.nominatim, "geocode", geocode)
+    return queries, replies
+
+
+def test_gazetteer_places_skip_nominatim(nominatim):
+    queries, _ = nominatim
+    lat, lon = asyncio.run(get_lat_lon_async("London", "UK"))
+    assert lat == pytest.approx(51.5, abs=0.1) and lon == pytest.approx(-0.13, abs=0.1)
+    assert queries == []
+
+
+def test_no_match_is_cached_as_not_found(nominatim):
+    queries, replies = nominatim
+    replies.append(None)
+    for _ in range(2):
+        with pytest.raises(LocationNotFoundError):
+            asyncio.run(get_lat_lon_async("Nowhereville", "Atlantis"))
+    assert queries == ["Nowhereville, Atlantis"]
+
+
+def test_errors_are_unavailable_and_not_cached(nominatim):
+    queries, replies = nominatim
+    replies.extend([TimeoutError("slow"), TimeoutError("slow"), (1.0, 2.0)])
+    with pytest.raises(GeocoderUnavailableError):
+        asyncio.run(get_lat_lon_async("Nowhereville", "Atlantis"))
+    assert asyncio.run(get_lat_lon_async("Nowhereville", "Atlantis")) == (1.0, 2.0)
+    assert len(queries) == 3
+
+
+def test_unknown_city_in_a_known_state_asks_nominatim_with_the_state(nominatim):
+    queries, replies = nominatim
+    replies.append((43.2981, -72.4823))
+    assert asyncio.run(get_lat_lon_async("Springfield", "USA", "Vermont")) == (43.2981, -72.4823)
+    assert queries == ["Springfield, Vermont, USA"]
+
+
+@pytest.fixture
+def stub_server():
+    # scripts/fake_nominatim.py on a free port, answering after 200 ms.
+    server = make_server(port=0, latency=200.0, jitter=0.0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stub_client(server, tmp_path):
+    limiter = bucket(tmp_path, rate=100.0, burst=100.0, max_wait=10.0)
+    return AsyncNominatim(base_url=f"http://127.0.0.1:{server.server_address[1]}", limiter=limiter)
+
+
+def test_concurrent_identical_queries_share_one_request(stub_server, tmp_path):
+    client = stub_client(stub_server, tmp_path)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(client.geocode("Springfield, Vermont, USA") for _ in range(5)))
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+    assert results == [coordinates("Springfield, Vermont, USA")] * 5
+    assert stub_server.counters["requests"] == 1
+    assert client.counters["requests"] == 1 and client.counters["coalesced"] == 4
+    assert client.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_leaves_the_others_their_result(stub_server, tmp_path):
+    client = stub_client(stub_server, tmp_path)
+
+    async def run():
+        try:
+            tasks = [asyncio.ensure_future(client.geocode("Springfield, Vermont, USA")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            tasks[0].cancel()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            return tasks[0].cancelled(), results[1:]
+        finally:
+            await client.aclose()
+
+    cancelled, results = asyncio.run(run())
+    assert cancelled
+    assert results == [coordinates("Springfield, Vermont, USA")] * 2
+    assert stub_server.counters["requests"] == 1 and client.counters["coalesced"] == 2
+
+
+def test_no_match_is_none(stub_server, tmp_path):
+    client = stub_client(stub_server, tmp_path)
+
+    async def run():
+        try:
+            return await client.geocode("Nowhereville, Atlantis")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) is None
+    assert stub_server.counters["not_found"] == 1
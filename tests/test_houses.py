@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from skyfield.api import wgs84
+from skyfield.framelib import ecliptic_frame
+
+from backend.houses import HOUSE_SYSTEMS, chart_houses, check_house_system, house_cusps
+
+# Angles and cusps are checked through skyfield's own frames: an ecliptic
+# longitude of date is turned into a direction with ecliptic_frame and placed on
+# the sky with the observer's horizon rotation, independently of houses.py.
+
+PLACES = [(51.5074, -0.1278), (-33.8688, 151.2093), (40.7128, -74.006), (1.3521, 103.8198)]
+
+
+def angle_difference(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0)
+
+
+def ecliptic_vector(t, longitude):
+    lon = np.radians(longitude)
+    return ecliptic_frame.rotation_at(t).T @ np.array([np.cos(lon), np.sin(lon), 0.0])
+
+
+def altaz(t, lat, lon, longitude):
+    x, y, z = wgs84.latlon(lat, lon).rotation_at(t) @ ecliptic_vector(t, longitude)
+    return np.degrees(np.arctan2(z, np.hypot(x, y))), np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def hour_angle_and_declination(t, lat, lon, longitude):
+    # Local hour angle (degrees, positive west) and declination of date.
+    x, y, z = t.M @ ecliptic_vector(t, longitude)
+    ra = np.degrees(np.arctan2(y, x))
+    ha = (t.gast * 15.0 + lon - ra + 180.0) % 360.0 - 180.0
+    return ha, np.degrees(np.arctan2(z, np.hypot(x, y)))
+
+
+@pytest.mark.parametrize("lat, lon", PLACES)
+def test_ascendant_rises_in_the_east_and_midheaven_culminates(ctx, lat, lon):
+    for t in (ctx.ts.utc(1975, 2, 9, 3, 40), ctx.ts.utc(2024, 7, 30, 18, 5)):
+        houses = chart_houses(t, lat, lon)
+        alt, az = altaz(t, lat, lon, houses["ascendant"][0])
+        assert abs(alt) < 1e-6
+        assert 0.0 < az < 180.0
+        ha, _ = hour_angle_and_declination(t, lat, lon, houses["midheaven"][0])
+        assert abs(ha) < 1e-6
+        assert altaz(t, lat, lon, houses["midheaven"][0])[0] > 0.0
+
+
+@pytest.mark.parametrize("lat, lon", PLACES)
+def test_placidus_trisects_the_semi_arcs(ctx, lat, lon):
+    t = ctx.ts.utc(2001, 9, 11, 13, 0)
+    cusps = chart_houses(t, lat, lon, "placidus")["cusps"][0]
+    for house, part_of_day, part_of_night in ((11, 1 / 3, 0), (12, 2 / 3, 0), (2, 1, 1 / 3), (3, 1, 2 / 3)):
+        ha, dec = hour_angle_and_declination(t, lat, lon, cusps[house - 1])
+        day_arc = np.degrees(np.arccos(-np.tan(np.radians(lat)) * np.tan(np.radians(dec))))
+        expected = -(part_of_day * day_arc + part_of_night * (180.0 - day_arc))
+        assert angle_difference(ha, expected) < 1e-6, house
+
+
+@pytest.mark.parametrize("system", HOUSE_SYSTEMS)
+def test_cusp_structure(system):
+    ramc = np.linspace(0.0, 359.0, 37)
+    houses = house_cusps(ramc, 48.85, 23.44, system)
+    cusps = houses["cusps"]
+    assert cusps.shape == (37, 12)
+    assert not houses["fallback"].any()
+    np.testing.assert_allclose(angle_difference(cusps[:, 6:], cusps[:, :6]), 180.0, atol=1e-9)
+    if system == "whole_sign":
+        np.testing.assert_allclose(cusps % 30.0, 0.0, atol=1e-9)
+        assert (cusps[:, 0] == houses["ascendant"] // 30.0 * 30.0).all()
+        return
+    np.testing.assert_allclose(angle_difference(cusps[:, 0], houses["ascendant"]), 0.0, atol=1e-9)
+    if system == "equal":
+        np.testing.assert_allclose(angle_difference(np.diff(cusps, axis=1), 30.0), 0.0, atol=1e-9)
+    else:
+        np.testing.assert_allclose(angle_difference(cusps[:, 9], houses["midheaven"]), 0.0, atol=1e-9)
+        # Cusps run in zodiacal order around the chart.
+        assert (np.diff(np.unwrap(np.radians(cusps), axis=1), axis=1) > 0).all()
+
+
+@pytest.mark.parametrize("system", ["placidus", "koch"])
+def test_semi_arc_systems_fall_back_inside_the_polar_circle(system):
+    ramc = np.linspace(0.0, 359.0, 360)
+    polar = house_cusps(ramc, 68.0, 23.44, system)
+    porphyry = house_cusps(ramc, 68.0, 23.44, "porphyry")
+    assert polar["fallback"].any() and not polar["fallback"].all()
+    fallback = polar["fallback"]
+    np.testing.assert_allclose(polar["cusps"][fallback], porphyry["cusps"][fallback])
+    assert not house_cusps(ramc, 60.0, 23.44, system)["fallback"].any()
+
+
+def test_arrays_match_single_charts(ctx):
+    t = ctx.ts.utc(2024, 1, np.arange(1, 41))
+    lats = np.linspace(-55.0, 55.0, 40)
+    lons = np.linspace(-170.0, 170.0, 40)
+    batch = chart_houses(t, lats, lons, "placidus", chunk=16)
+    for k in (0, 17, 39):
+        single = chart_houses(t[k], lats[k], lons[k], "placidus")
+        # Arrays use IAU 2000B nutation, a single chart the full series.
+        assert angle_difference(batch["cusps"][k], single["cusps"][0]).max() < 1e-5
+
+
+def test_unknown_house_system():
+    check_house_system("koch")
+    with pytest.raises(ValueError, match="Unknown house system"):
+        check_house_system("topocentric")
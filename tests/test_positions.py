@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from backend.ephemeris import BODY_NAMES
+
+# The engine against skyfield's own per-body path,
+# observer.at(t).observe(body).apparent(), at a few places and dates.
+
+PLACES = [(51.5074, -0.1278), (-33.8688, 151.2093), (64.1466, -21.9426), (0.0, 0.0)]
+DATES = [(1950, 3, 21, 6, 0), (2000, 1, 1, 12, 0), (2024, 8, 12, 23, 45)]
+
+# 1 milliarcsecond.
+TOLERANCE_DEG = 1 / 3600 / 1000
+
+
+def angle_difference(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0)
+
+
+@pytest.mark.parametrize("lat, lon", PLACES)
+@pytest.mark.parametrize("date", DATES)
+def test_topocentric_positions_match_skyfield(ctx, lat, lon, date):
+    t = ctx.ts.utc(*date)
+    positions = ctx.engine.observe(t, lat, lon)
+    observer = ctx.observer(lat, lon).at(t)
+    for name in BODY_NAMES:
+        apparent = observer.observe(ctx.bodies[name]).apparent()
+        ecl_lat, ecl_lon, distance = apparent.ecliptic_latlon()
+        i = positions[name]
+        assert angle_difference(positions.longitude[i], ecl_lon.degrees) < TOLERANCE_DEG, name
+        assert abs(positions.latitude[i] - ecl_lat.degrees) < TOLERANCE_DEG, name
+        assert positions.distance[i] == pytest.approx(distance.au, rel=1e-9), name
+
+        alt, az, _ = apparent.altaz()
+        engine_alt, engine_az = positions.altaz(name)
+        assert abs(engine_alt - alt.degrees) < TOLERANCE_DEG, name
+        assert angle_difference(engine_az, az.degrees) < TOLERANCE_DEG, name
+
+        ha, dec, _ = apparent.hadec()
+        engine_ha, engine_dec = positions.hadec(name)
+        assert angle_difference(engine_ha * 15.0, ha.hours * 15.0) < TOLERANCE_DEG, name
+        assert abs(engine_dec - dec.degrees) < TOLERANCE_DEG, name
+
+
+def test_geocentric_positions_match_skyfield(ctx):
+    t = ctx.ts.utc(2010, 6, 15, 3, 30)
+    positions = ctx.engine.observe(t)
+    earth = ctx.earth.at(t)
+    for name in BODY_NAMES:
+        _, ecl_lon, _ = earth.observe(ctx.bodies[name]).apparent().ecliptic_latlon()
+        assert angle_difference(positions.longitude[positions[name]], ecl_lon.degrees) < TOLERANCE_DEG, name
+
+
+def test_time_arrays_match_scalar_times(ctx):
+    t = ctx.ts.utc(2024, 1, [1, 60, 120, 240])
+    lats = np.array([10.0, -20.0, 45.0, 70.0])
+    lons = np.array([100.0, -60.0, 2.0, 25.0])
+    batch = ctx.engine.observe(t, lats, lons, names=['Sun', 'Moon', 'Mars'])
+    for k in range(len(t)):
+        single = ctx.engine.observe(t[k], lats[k], lons[k], names=['Sun', 'Moon', 'Mars'])
+        np.testing.assert_allclose(batch.longitude[:, k], single.longitude, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(batch.altaz('Moon')[0][k], single.altaz('Moon')[0], rtol=0, atol=1e-9)
+
+
+def test_altaz_needs_an_observer(ctx):
+    positions = ctx.engine.observe(ctx.ts.J2000)
+    with pytest.raises(ValueError):
+        positions.altaz('Sun')
@@ -0,0 +1,66 @@
+import pytest
+
+from backend.response_cache import MAX_ENTRY_SHARE, ResponseCache, body_etag, etag_matches, request_key
+
+
+def test_request_key_ignores_field_order():
+    assert request_key("/analyze", {"a": 1, "b": "x"}) == request_key("/analyze", {"b": "x", "a": 1})
+    assert request_key("/analyze", {"a": 1}) != request_key("/solar-return", {"a": 1})
+    assert request_key("/analyze", {"a": 1}) != request_key("/analyze", {"a": 2})
+
+
+def test_etag_is_quoted_and_content_addressed():
+    etag = body_etag(b'{"x":1}')
+    assert etag.startswith('"') and etag.endswith('"') and len(etag) == 34
+    assert etag == body_etag(b'{"x":1}') != body_etag(b'{"x":2}')
+
+
+def test_etag_matches_uses_weak_comparison():
+    etag = body_etag(b"body")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+
+
+def test_get_put_and_lru_eviction_by_bytes():
+    cache = ResponseCache(max_bytes=100 * MAX_ENTRY_SHARE)
+    assert cache.get("a") is None
+    entry = cache.put("a", b"a" * 100)
+    assert cache.get("a") == entry and entry.etag == body_etag(entry.body)
+    for key in "bcdefgh":
+        cache.put(key, key.encode() * 100)
+    cache.get("a")
+    # Full at 800 bytes; "b" is now the least recently used.
+    cache.put("i", b"i" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("i") is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (8, 800, 1)
+
+
+def test_replacing_an_entry_frees_its_bytes():
+    cache = ResponseCache(max_bytes=1000)
+    cache.put("a", b"x" * 100)
+    cache.put("a", b"y" * 50)
+    assert cache.stats()["bytes"] == 50
+    assert cache.get("a").body == b"y" * 50
+
+
+def test_bodies_over_the_entry_share_are_not_stored():
+    cache = ResponseCache(max_bytes=800)
+    entry = cache.put("big", b"z" * (800 // MAX_ENTRY_SHARE + 1))
+    assert entry.etag == body_etag(entry.body)
+    assert cache.get("big") is None
+    assert cache.stats()["uncacheable"] == 1
+
+
+def test_clear():
+    cache = ResponseCache(max_bytes=1000)
+    cache.put("a", b"x")
+    cache.clear()
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
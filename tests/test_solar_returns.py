@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend import astro_service
+from backend.astro_service import SIDEREAL_YEAR_DAYS, calculate_solar_returns, solve_solar_returns
+
+LONDON = (51.5074, -0.1278)
+
+
+def sun_longitude(ctx, t):
+    # Geocentric apparent ecliptic longitude straight from skyfield.
+    _, lon, _ = ctx.earth.at(t).observe(ctx.sun).apparent().ecliptic_latlon()
+    return lon.degrees
+
+
+@pytest.mark.parametrize("target", [0.0, 90.0, 179.5, 359.99])
+def test_solver_lands_on_the_target_longitude(ctx, target):
+    guess = ctx.ts.utc(2024, 3, 20).tt + target / 360.0 * SIDEREAL_YEAR_DAYS + np.array([-3.0, 0.0, 5.0])
+    t = solve_solar_returns(ctx, target, guess)
+    for k in range(len(guess)):
+        difference = (sun_longitude(ctx, t[k]) - target + 180.0) % 360.0 - 180.0
+        # The Sun moves ~1e-5 degrees a second.
+        assert abs(difference) < 1e-6
+
+
+def test_returns_repeat_the_birth_longitude_every_year(ctx):
+    returns = calculate_solar_returns("1990-05-15", "14:30", 2000, 2010, "London", "UK", location=LONDON)
+    assert [r["year"] for r in returns] == list(range(2000, 2011))
+    birth = astro_service.load_timezone_index().localize(*LONDON, datetime(1990, 5, 15, 14, 30)).utc
+    t_birth = ctx.ts.utc(birth.year, birth.month, birth.day, birth.hour, birth.minute)
+    target = ctx.engine.observe(t_birth, *LONDON, names=['Sun']).longitude[0]
+    for r in returns:
+        t = ctx.ts.from_datetime(datetime.fromisoformat(r["solar_return"].replace("Z", "+00:00")))
+        assert t.utc.year == r["year"] and t.utc.month == 5
+        # The ISO strings are rounded to the second.
+        assert abs((sun_longitude(ctx, t) - target + 180.0) % 360.0 - 180.0) < 2e-5
+
+
+def test_fast_precision_agrees_with_full(ctx):
+    full = calculate_solar_returns("1985-11-02", "06:10", 2020, 2024, "London", "UK", location=LONDON)
+    fast = calculate_solar_returns("1985-11-02", "06:10", 2020, 2024, "London", "UK", precision="fast",
+                                   location=LONDON)
+    for a, b in zip(full, fast):
+        seconds = (datetime.fromisoformat(a["solar_return"][:-1]) - datetime.fromisoformat(b["solar_return"][:-1]))
+        assert abs(seconds.total_seconds()) <= 2
+
+
+def test_years_outside_the_ephemeris_raise(ctx):
+    with pytest.raises(ValueError, match="only available between"):
+        calculate_solar_returns("1990-05-15", "14:30", 2200, 2200, "London", "UK", location=LONDON)
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from skyfield import almanac
+from skyfield.api import wgs84
+
+from backend.solar_table import SUNRISE_ALTITUDE_DEG, iso_utc, julian_date, load_solar_table
+
+# Table lookups against the Sun from skyfield, and rise/set/transit times against
+# skyfield.almanac. The table takes UTC and almanac gives UT1, which differ by
+# under a second.
+
+
+@pytest.fixture(scope="module")
+def table():
+    return load_solar_table()
+
+
+@pytest.mark.parametrize("when", [datetime(1901, 2, 11, 6), datetime(2000, 1, 1, 12), datetime(2024, 6, 21, 12),
+                                  datetime(2035, 11, 3, 21, 30)])
+def test_lookup_matches_the_apparent_sun(ctx, table, when):
+    t = ctx.ts.utc(when.year, when.month, when.day, when.hour, when.minute)
+    ra, dec, _ = ctx.earth.at(t).observe(ctx.sun).apparent().radec(epoch='date')
+    # Apparent minus mean solar time: the Sun's Greenwich hour angle + 12h - UT.
+    eot = ((t.gast - ra.hours) * 60.0 - (t.ut1 % 1.0) * 1440.0) % 1440.0
+    eot = (eot + 720.0) % 1440.0 - 720.0
+    table_eot, table_dec = table.lookup(julian_date(when))
+    assert table_eot == pytest.approx(eot, abs=1 / 60)
+    assert table_dec == pytest.approx(dec.degrees, abs=1 / 3600)
+
+
+@pytest.mark.parametrize("lat, lon, day", [
+    (51.5074, -0.1278, datetime(2024, 6, 21)),
+    (-33.8688, 151.2093, datetime(2024, 1, 3)),
+    (64.1466, -21.9426, datetime(2024, 12, 21)),
+    (0.0, 0.0, datetime(1950, 3, 1)),
+])
+def test_days_match_almanac(ctx, table, lat, lon, day):
+    result = table.days(lat, lon, julian_date(day))
+    observer = ctx.earth + wgs84.latlon(lat, lon)
+    start, end = ctx.ts.utc(day.year, day.month, day.day - 1), ctx.ts.utc(day.year, day.month, day.day + 2)
+    risings, _ = almanac.find_risings(observer, ctx.sun, start, end, horizon_degrees=SUNRISE_ALTITUDE_DEG)
+    settings, _ = almanac.find_settings(observer, ctx.sun, start, end, horizon_degrees=SUNRISE_ALTITUDE_DEG)
+    transits = almanac.find_transits(observer, ctx.sun, start, end)
+
+    def seconds_off(times, jd):
+        return np.min(np.abs(times.ut1 - jd)) * 86400.0
+
+    assert seconds_off(transits, result["noon"]) < 1.5
+    assert seconds_off(risings, result["sunrise"]) < 5.0
+    assert seconds_off(settings, result["sunset"]) < 5.0
+    assert result["day_length"] == pytest.approx((result["sunset"] - result["sunrise"]) * 24.0)
+
+
+def test_london_solar_noon_at_midsummer(table):
+    result = table.days(51.5074, -0.1278, julian_date(datetime(2024, 6, 21)))
+    assert iso_utc(result["noon"])[0].startswith("2024-06-21T12:02")
+    assert 16.5 < result["day_length"] < 16.7
+
+
+def test_polar_day_and_night(table):
+    lat, lon = 69.6492, 18.9553
+    summer = table.days(lat, lon, julian_date(datetime(2024, 6, 21)))
+    winter = table.days(lat, lon, julian_date(datetime(2024, 12, 21)))
+    assert summer["day_length"] == 24.0 and np.isnan(summer["sunrise"]) and np.isnan(summer["sunset"])
+    assert winter["day_length"] == 0.0 and np.isnan(winter["sunrise"])
+    assert iso_utc(winter["sunset"]) == [None]
+
+
+def test_vectorized_days_match_single_days(table):
+    days = julian_date(datetime(2024, 3, 1)) + np.arange(30)
+    lats = np.linspace(-60.0, 60.0, 30)
+    batch = table.days(lats, 10.0, days)
+    for k in (0, 13, 29):
+        single = table.days(lats[k], 10.0, days[k])
+        for key in ("noon", "sunrise", "sunset", "day_length"):
+            assert batch[key][k] == pytest.approx(single[key], abs=1e-9)
+
+
+def test_dates_outside_the_table_raise(table):
+    with pytest.raises(ValueError):
+        table.lookup(table.end_jd + 1.0)
+    with pytest.raises(ValueError):
+        table.lookup(table.start_jd - 1.0)
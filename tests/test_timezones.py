@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import pytz
+
+from backend.timezones import EPOCH, epoch_seconds, format_offset, load_timezone_index, nautical_zone
+
+LONDON = (51.5074, -0.1278)
+NEW_YORK = (40.7128, -74.006)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return load_timezone_index()
+
+
+def naive(seconds):
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+@pytest.mark.parametrize("lat, lon, zone", [
+    (*LONDON, "Europe/London"),
+    (*NEW_YORK, "America/New_York"),
+    (22.5726, 88.3639, "Asia/Kolkata"),
+    (-33.8688, 151.2093, "Australia/Sydney"),
+    (35.6762, 139.6503, "Asia/Tokyo"),
+    (0.0, -30.0, "Etc/GMT+2"),
+])
+def test_zone_at_places(index, lat, lon, zone):
+    assert index.zone_name(lat, lon) == zone
+
+
+def test_epoch_seconds_matches_datetime():
+    rng = np.random.default_rng(1)
+    seconds = rng.integers(int((datetime(1, 1, 1) - EPOCH).total_seconds()),
+                           int((datetime(9999, 12, 31) - EPOCH).total_seconds()), 5000)
+    moments = [naive(s) for s in seconds] + [datetime(2000, 2, 29, 23, 59, 59), datetime(1900, 3, 1),
+                                             datetime(1969, 12, 31, 23, 59, 59)]
+    parts = [(m.year, m.month, m.day, m.hour, m.minute, m.second) for m in moments]
+    expected = [int((m - EPOCH).total_seconds()) for m in moments]
+    assert epoch_seconds(parts).tolist() == expected
+
+
+def test_utc_offsets_match_pytz(index):
+    rng = np.random.default_rng(2)
+    zones = rng.choice(len(index.zone_names), 300)
+    seconds = rng.integers(int((datetime(1850, 1, 1) - EPOCH).total_seconds()),
+                           int((datetime(2037, 1, 1) - EPOCH).total_seconds()), len(zones))
+    offsets, dst = index.utc_offsets(zones, seconds)
+    for zone, s, offset, is_dst in zip(zones, seconds, offsets, dst):
+        local = pytz.utc.localize(naive(s)).astimezone(pytz.timezone(index.zone_names[zone]))
+        assert offset == local.utcoffset().total_seconds(), (index.zone_names[zone], naive(s))
+        assert is_dst == bool(local.dst()), (index.zone_names[zone], naive(s))
+
+
+def test_unambiguous_local_times_match_pytz(index):
+    rng = np.random.default_rng(3)
+    zones = rng.choice(len(index.zone_names), 300)
+    seconds = rng.integers(int((datetime(1900, 1, 1) - EPOCH).total_seconds()),
+                           int((datetime(2037, 1, 1) - EPOCH).total_seconds()), len(zones))
+    offsets, _ = index.local_offsets(zones, seconds)
+    checked = 0
+    for zone, s, offset in zip(zones, seconds, offsets):
+        try:
+            local = pytz.timezone(index.zone_names[zone]).localize(naive(s), is_dst=None)
+        except (pytz.AmbiguousTimeError, pytz.NonExistentTimeError):
+            continue
+        assert offset == local.utcoffset().total_seconds(), (index.zone_names[zone], naive(s))
+        checked += 1
+    assert checked > 250
+
+
+@pytest.mark.parametrize("place, local, offset, dst", [
+    # Clocks going forward: the skipped hour keeps the offset from before.
+    (LONDON, datetime(2024, 3, 31, 1, 30), 0, False),
+    (LONDON, datetime(2024, 3, 31, 2, 0), 3600, True),
+    # Clocks going back: the repeated hour resolves to its first pass.
+    (LONDON, datetime(2024, 10, 27, 1, 30), 3600, True),
+    (LONDON, datetime(2024, 10, 27, 2, 0), 0, False),
+    (NEW_YORK, datetime(2024, 3, 10, 2, 30), -18000, False),
+    (NEW_YORK, datetime(2024, 11, 3, 1, 30), -14400, True),
+])
+def test_localize_gaps_and_folds(index, place, local, offset, dst):
+    civil = index.localize(*place, local)
+    assert (civil.offset_seconds, civil.dst) == (offset, dst)
+    assert civil.utc == local - timedelta(seconds=offset)
+    assert civil.local == local
+
+
+def test_to_local_round_trips(index):
+    utc = datetime(1990, 5, 15, 13, 30)
+    civil = index.to_local(*LONDON, utc)
+    assert (civil.local, civil.zone, civil.offset_seconds, civil.dst) == (
+        datetime(1990, 5, 15, 14, 30), "Europe/London", 3600, True)
+    assert index.localize(*LONDON, civil.local).utc == utc
+
+
+@pytest.mark.parametrize("place, utc, offset, dst", [
+    # pytz's tables stop in 2037; later years repeat the last 28-year cycle.
+    (LONDON, datetime(2045, 3, 26, 0, 59), 0, False),
+    (LONDON, datetime(2045, 3, 26, 1, 0), 3600, True),
+    (LONDON, datetime(2045, 7, 1), 3600, True),
+    (LONDON, datetime(2045, 12, 1), 0, False),
+    (NEW_YORK, datetime(2060, 7, 1), -14400, True),
+    ((-33.8688, 151.2093), datetime(2050, 1, 1), 39600, True),
+    ((22.5726, 88.3639), datetime(2090, 7, 1), 19800, False),
+])
+def test_offsets_after_2037(index, place, utc, offset, dst):
+    civil = index.to_local(*place, utc)
+    assert (civil.offset_seconds, civil.dst) == (offset, dst)
+
+
+def test_nautical_zone_and_format_offset():
+    assert nautical_zone(0.0) == "Etc/GMT"
+    assert nautical_zone(-75.0) == "Etc/GMT+5"
+    assert nautical_zone(172.0) == "Etc/GMT-11"
+    assert nautical_zone(179.9) == "Etc/GMT-12"
+    assert format_offset(19800) == "+05:30"
+    assert format_offset(-12600) == "-03:30"
+    assert format_offset(0) == "+00:00"
@@ -0,0 +1,44 @@
+import pytest
+
+from backend.world_cities import load_gazetteer, normalize_name
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return load_gazetteer()
+
+
+def test_normalize_name():
+    assert normalize_name(" São-Paulo ") == normalize_name("SAO PAULO") == "sao paulo"
+    assert normalize_name("St. Louis") == "saint louis"
+    assert normalize_name(None) == ""
+
+
+@pytest.mark.parametrize("city, country, state, admin1", [
+    ("Springfield", "USA", None, "Missouri"),
+    ("Springfield", "USA", "Illinois", "Illinois"),
+    ("Springfield", "United States", "IL", "Illinois"),
+    ("New York", "USA", "NY", "New York"),
+    ("London", "UK", "England", "England"),
+    ("Sao Paulo", "Brasil", None, "Sao Paulo"),
+])
+def test_lookup_picks_the_namesake_in_the_state(gazetteer, city, country, state, admin1):
+    assert gazetteer.lookup(city, country, state).admin1 == admin1
+
+
+def test_state_without_a_namesake_is_not_found(gazetteer):
+    # Springfield, Vermont is too small for the gazetteer; Springfield, Missouri
+    # must not stand in for it.
+    assert gazetteer.lookup("Springfield", "USA", "Vermont") is None
+    assert gazetteer.lookup_admin1("Vermont", "USA").admin1 == "Vermont"
+
+
+def test_country_narrows_namesakes(gazetteer):
+    assert gazetteer.lookup("London", "Canada").country_code == "CA"
+    assert gazetteer.lookup("London", "UK").country_code == "GB"
+
+
+def test_unknown_country_is_not_found(gazetteer):
+    assert gazetteer.lookup("Springfield", "Atlantis") is None
+    assert gazetteer.lookup("Springfield", "Atlantis", "Vermont") is None
+    assert gazetteer.lookup_admin1("Vermont", "Atlantis") is None
@@ -28,25 +28,52 @@ export interface AstroAnalysis {
     altitude: number;
     constellation: string;
     longitude: number;
+    signIngress?: string | null; // When the Sun entered its current sign (UTC)
+    signEgress?: string | null; // When it leaves it
   };
   zodiacSign: string; // Strictly the Tropical Zodiac sign based on date
   moonPosition?: {
     phase: string;
-    constellation: string;
+    constellation: string; // Zodiac sign of the Moon
+    signIngress?: string | null;
+    signEgress?: string | null;
+    lunation?: number | null; // Brown lunation number
+    ageDays?: number | null; // Days since the last new moon
+    previousPhase?: { phase: string; time: string } | null;
+    nextPhase?: { phase: string; time: string } | null;
+    nextNewMoon?: string | null;
+    nextFullMoon?: string | null;
   };
   planets?: Record<string, {
     longitude: number;
     zodiacSign: string;
     degree: number;
+    signIngress?: string | null;
+    signEgress?: string | null;
   }>;
   cosmicFact: string;
-  equationOfTime: string;
+  equationOfTime: string; // Apparent minus mean solar time, e.g. "+14.6 minutes"
+  solarDay?: {
+    date: string; // Local date at the place (YYYY-MM-DD)
+    solarNoon: string; // UTC
+    sunrise: string | null; // null through polar day or night
+    sunset: string | null;
+    dayLengthHours: number | null;
+    declination: number; // Sun's declination at solar noon, degrees
+  } | null;
+  timezone?: TimeZoneInfo;
   temperature: string;
   realBirthdayObservation?: RealBirthdayObservation;
   nextSolarReturn?: string; // When the sun returns to the exact birth longitude
   daysUntilSolarReturn?: number; // Days remaining until the next solar return
 }
 
+export interface TimeZoneInfo {
+  zone: string; // IANA zone of the place, e.g. "Europe/London"
+  utcOffset: string; // In force at the chart's instant, e.g. "+01:00"
+  dst: boolean;
+}
+
 export interface BirthAnalysis extends AstroAnalysis {
   // Inherits all fields. 
   // Specific birth fields are now available in base to allow Current Observer to show them if relevant.
@@ -61,8 +88,9 @@ export interface PerfectAlignment {
     longitude: number;
   };
   reasoning: string;
-  localDateAtReturn: string;
+  localDateAtReturn: string; // Civil date and time at the location
   localTimeAtReturn: string;
+  timezone?: TimeZoneInfo;
 }
 
 export interface GeoLocation {
@@ -94,4 +122,24 @@ export interface ArroyoAnalysis {
   dominantElement: string;
   dominantModality: string;
   interpretation: string;
-}
\ No newline at end of file
+  houses?: {
+    system: string;
+    ascendant: number; // Ecliptic longitude of date, degrees
+    midheaven: number;
+    cusps: number[]; // Cusps 1-12
+    fallback: boolean; // Placidus/Koch undefined at this latitude; Porphyry cusps
+  };
+}
+
+export interface SolarCalendar {
+  coordinates: GeoLocation;
+  timezone: string; // IANA zone of the place
+  count: number;
+  date: string[];
+  solarNoon: string[];
+  sunrise: (string | null)[];
+  sunset: (string | null)[];
+  dayLengthHours: (number | null)[];
+  equationOfTimeMinutes: number[];
+  declination: number[];
+}